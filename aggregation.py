@@ -0,0 +1,155 @@
+"""
+Weighted sentiment aggregation: weighted mean, variance and effective sample size
+"""
+
+import time
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class WeightedStats(NamedTuple):
+    mean: float
+    variance: float
+    effective_sample_size: float
+    total_weight: float
+    count: int
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+
+EMPTY_STATS = WeightedStats(0.0, 0.0, 0.0, 0.0, 0)
+
+
+def _stats_from_sums(sum_w: float, sum_wx: float, sum_wx2: float, sum_w2: float, count: int) -> WeightedStats:
+    if sum_w <= 0:
+        return WeightedStats(0.0, 0.0, 0.0, 0.0, count)
+    mean = sum_wx / sum_w
+    # Clamp tiny negative values left by floating point cancellation
+    variance = max(sum_wx2 / sum_w - mean * mean, 0.0)
+    # Kish effective sample size: equals count for equal weights, smaller when a few items dominate
+    ess = sum_w * sum_w / sum_w2
+    return WeightedStats(float(mean), float(variance), float(ess), float(sum_w), count)
+
+
+def weighted_stats(values: Sequence[float], weights: Optional[Sequence[float]] = None) -> WeightedStats:
+    """Weighted mean, variance and effective sample size from one pass of dot products"""
+    x = np.asarray(values, dtype=float)
+    if x.size == 0:
+        return EMPTY_STATS
+    w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=float)
+    wx = w * x
+    return _stats_from_sums(w.sum(), wx.sum(), wx @ x, w @ w, int(x.size))
+
+
+def log_upvote_weights(upvotes: Sequence[float], max_weight: Optional[float] = None) -> np.ndarray:
+    """1 + log(1 + upvotes), so heavily upvoted posts count more without drowning out the rest"""
+    weights = 1.0 + np.log1p(np.clip(np.asarray(upvotes, dtype=float), 0, None))
+    return np.minimum(weights, max_weight) if max_weight else weights
+
+
+def recency_weights(timestamps: Sequence[Optional[float]], half_life_hours: float,
+                    now: Optional[float] = None) -> np.ndarray:
+    """Exponential decay by age; items without a timestamp get full weight"""
+    ts = np.array([np.nan if t is None else t for t in timestamps], dtype=float)
+    age_hours = np.clip(((now or time.time()) - ts) / 3600.0, 0, None)
+    weights = np.power(0.5, age_hours / half_life_hours)
+    return np.where(np.isnan(weights), 1.0, weights)
+
+
+def credibility_weights(sources: Sequence[Optional[str]], credibility: Dict[str, float],
+                        default: float = 1.0) -> np.ndarray:
+    """Per-source multipliers, matched case-insensitively"""
+    table = {name.lower(): weight for name, weight in credibility.items()}
+    return np.array([table.get(str(source).lower(), default) if source else default for source in sources], dtype=float)
+
+
+class WeightPolicy:
+    """Combines the configured weight functions for one kind of item and maps ESS to confidence"""
+
+    def __init__(self, upvotes: bool = False, max_upvote_weight: Optional[float] = None,
+                 half_life_hours: Optional[float] = None, credibility: Optional[Dict[str, float]] = None,
+                 default_credibility: float = 1.0, full_confidence_ess: float = 5.0):
+        self.upvotes = upvotes
+        self.max_upvote_weight = max_upvote_weight
+        self.half_life_hours = half_life_hours
+        self.credibility = credibility or {}
+        self.default_credibility = default_credibility
+        self.full_confidence_ess = full_confidence_ess
+
+    @classmethod
+    def from_config(cls, config: Dict, **defaults) -> 'WeightPolicy':
+        settings = {**defaults, **config}
+        return cls(
+            upvotes=settings.get('upvotes', False),
+            max_upvote_weight=settings.get('max_upvote_weight'),
+            half_life_hours=settings.get('half_life_hours'),
+            credibility=settings.get('credibility'),
+            default_credibility=settings.get('default_credibility', 1.0),
+            full_confidence_ess=settings.get('full_confidence_ess', 5.0)
+        )
+
+    def weights(self, count: int, upvotes: Optional[Sequence[float]] = None,
+                timestamps: Optional[Sequence[Optional[float]]] = None,
+                sources: Optional[Sequence[Optional[str]]] = None, now: Optional[float] = None) -> np.ndarray:
+        """Product of every enabled weight function; inputs that are not supplied are skipped"""
+        weights = np.ones(count)
+        if self.upvotes and upvotes is not None:
+            weights *= log_upvote_weights(upvotes, self.max_upvote_weight)
+        if self.half_life_hours and timestamps is not None:
+            weights *= recency_weights(timestamps, self.half_life_hours, now)
+        if self.credibility and sources is not None:
+            weights *= credibility_weights(sources, self.credibility, self.default_credibility)
+        return weights
+
+    def confidence(self, stats: WeightedStats) -> float:
+        """Confidence in [0, 1] that reaches 1 at full_confidence_ess effective items"""
+        if self.full_confidence_ess <= 0:
+            return 1.0 if stats.count else 0.0
+        return min(stats.effective_sample_size / self.full_confidence_ess, 1.0)
+
+
+class RunningWeightedStats:
+    """Weighted sums that can be updated one item at a time, for incremental roll-ups"""
+
+    __slots__ = ('sum_w', 'sum_wx', 'sum_wx2', 'sum_w2', 'count')
+
+    def __init__(self):
+        self.sum_w = self.sum_wx = self.sum_wx2 = self.sum_w2 = 0.0
+        self.count = 0
+
+    def add(self, value: float, weight: float = 1.0):
+        self.sum_w += weight
+        self.sum_wx += weight * value
+        self.sum_wx2 += weight * value * value
+        self.sum_w2 += weight * weight
+        self.count += 1
+
+    def remove(self, value: float, weight: float = 1.0):
+        """Undo an earlier add with the same value and weight"""
+        self.sum_w -= weight
+        self.sum_wx -= weight * value
+        self.sum_wx2 -= weight * value * value
+        self.sum_w2 -= weight * weight
+        self.count -= 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum_wx / self.sum_w if self.sum_w > 0 else 0.0
+
+    def stats(self) -> WeightedStats:
+        return _stats_from_sums(self.sum_w, self.sum_wx, self.sum_wx2, self.sum_w2, self.count)
+
+
+def build_weight_policies(aggregation_config: Dict) -> Dict[str, WeightPolicy]:
+    """Weight policies for news, social, sector and portfolio roll-ups from the aggregation config block"""
+    return {
+        'news': WeightPolicy.from_config(aggregation_config.get('news', {}), full_confidence_ess=5.0),
+        'social': WeightPolicy.from_config(
+            aggregation_config.get('social', {}), upvotes=True, max_upvote_weight=5.0, full_confidence_ess=10.0
+        ),
+        'sector': WeightPolicy.from_config(aggregation_config.get('sector', {}), full_confidence_ess=3.0),
+        'portfolio': WeightPolicy.from_config(aggregation_config.get('portfolio', {}), full_confidence_ess=5.0)
+    }
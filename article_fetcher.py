@@ -0,0 +1,157 @@
+"""
+Concurrent download and extraction of full news article text
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+USER_AGENT = "Mozilla/5.0 (compatible; sentiment-analysis/1.0)"
+
+
+def source_hosts(news_sources: Iterable[str]) -> List[str]:
+    """Host names of the configured news sources"""
+    return [urlparse(source).hostname.lower() for source in news_sources if urlparse(source).hostname]
+
+
+def extract_text(html: str, url: str = '') -> str:
+    """Main article text from an HTML page"""
+    from newspaper import Article
+
+    article = Article(url or 'http://localhost/')
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+class ArticleFetcher:
+    """Downloads article bodies over a bounded connection pool and caches the extracted text by URL"""
+
+    def __init__(self, cache, throttle: Callable[[str], None], allowed_hosts: Optional[List[str]] = None,
+                 max_workers: int = 8, pool_size: int = 16, timeout: float = 10.0, max_chars: int = 5000,
+                 max_bytes: int = 2_000_000, instrumentation=None):
+        self.cache = cache
+        self.throttle = throttle
+        # An empty allowlist permits every host
+        self.allowed_hosts = [host.lower() for host in (allowed_hosts or [])]
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.instrumentation = instrumentation
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="articles")
+        self._session = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _timer(self, stage: str):
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.timer(stage)
+
+    def _count(self, counter: str, amount: int = 1):
+        if self.instrumentation is not None:
+            self.instrumentation.increment(counter, amount)
+
+    @property
+    def session(self):
+        """Shared requests session whose connection pool is capped at pool_size per host"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                                          pool_block=True)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = USER_AGENT
+                    self._session = session
+        return self._session
+
+    def is_allowed(self, url: str) -> bool:
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            return False
+        if not self.allowed_hosts:
+            return True
+        return any(host == allowed or host.endswith('.' + allowed) for allowed in self.allowed_hosts)
+
+    def _download(self, url: str) -> str:
+        self.throttle('articles')
+        with self._timer('article_download'):
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                # Read at most max_bytes so an oversized page cannot stall a worker
+                content = response.raw.read(self.max_bytes, decode_content=True)
+                declared = 'charset' in response.headers.get('Content-Type', '')
+                encoding = response.encoding if declared else 'utf-8'
+        self._count('articles_downloaded')
+        with self._timer('article_parse'):
+            text = extract_text(content.decode(encoding, errors='replace'), url)
+        return text[:self.max_chars]
+
+    def fetch_text(self, url: str) -> str:
+        """Extracted text for one URL; concurrent requests for the same URL share one download"""
+        with self._lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._inflight[url] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            text = self.cache.get_or_fetch('articles', url, lambda: self._download(url))
+            future.set_result(text)
+            return text
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def fetch_many(self, urls: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Fetch allowed URLs concurrently; failed or disallowed URLs are left out"""
+        unique = [url for url in dict.fromkeys(url for url in urls if url) if self.is_allowed(url)]
+        futures = {url: self._executor.submit(self.fetch_text, url) for url in unique}
+
+        texts = {}
+        for url, future in futures.items():
+            try:
+                texts[url] = future.result()
+            except Exception as e:
+                self._count('article_failures')
+                self.logger.warning(f"Could not fetch article {url}: {e}")
+        return texts
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+
+def build_article_fetcher(article_config: Dict, news_sources: Iterable[str], cache,
+                          throttle: Callable[[str], None], instrumentation=None) -> Optional[ArticleFetcher]:
+    """Create the article body stage described by the article_bodies config block, or None if disabled"""
+    if not article_config.get('enabled', False):
+        return None
+
+    return ArticleFetcher(
+        cache,
+        throttle,
+        allowed_hosts=source_hosts(news_sources) if article_config.get('restrict_to_news_sources', True) else None,
+        max_workers=article_config.get('max_workers', 8),
+        pool_size=article_config.get('pool_size', 16),
+        timeout=article_config.get('timeout_seconds', 10),
+        max_chars=article_config.get('max_chars', 5000),
+        instrumentation=instrumentation
+    )
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtest of the sentiment recommendation rules over stored sentiment and daily prices
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Recommendation codes; the labels match _get_stock_recommendation
+STRONG_SELL, SELL, HOLD, BUY, STRONG_BUY = -2, -1, 0, 1, 2
+CODE_NAMES = {
+    STRONG_SELL: 'strong_sell', SELL: 'sell', HOLD: 'hold', BUY: 'buy', STRONG_BUY: 'strong_buy'
+}
+
+DEFAULT_THRESHOLDS = {'strong_buy': 0.3, 'buy': 0.1, 'sell': -0.1, 'strong_sell': -0.3}
+THRESHOLD_KEYS = ('strong_buy', 'buy', 'sell', 'strong_sell')
+TRADING_DAYS = 252
+
+
+def recommendation_codes(sentiment: np.ndarray, price_change: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    """_get_stock_recommendation applied element-wise, as codes from STRONG_SELL to STRONG_BUY"""
+    sentiment = np.asarray(sentiment, dtype=float)
+    price_change = np.asarray(price_change, dtype=float)
+    return np.select(
+        [
+            (sentiment > thresholds['strong_buy']) & (price_change > 0),
+            sentiment > thresholds['buy'],
+            (sentiment < thresholds['strong_sell']) & (price_change < 0),
+            sentiment < thresholds['sell'],
+        ],
+        [STRONG_BUY, BUY, STRONG_SELL, SELL],
+        default=HOLD
+    ).astype(np.int8)
+
+
+class Panel(NamedTuple):
+    """Date x symbol arrays of sentiment and closing prices"""
+    dates: np.ndarray
+    symbols: List[str]
+    sentiment: np.ndarray
+    close: np.ndarray
+
+
+def build_panel(sentiment_frame: 'pd.DataFrame', close_frame: 'pd.DataFrame', max_staleness_days: int = 3) -> Panel:
+    """Align stored results (timestamp, symbol, weighted_sentiment rows) with a date x symbol close panel
+
+    The last result of each day is that day's signal. It is carried forward for at most
+    max_staleness_days trading days when no newer result exists.
+    """
+    import pandas as pd
+
+    frame = sentiment_frame[['timestamp', 'symbol', 'weighted_sentiment']].dropna()
+    frame = frame.assign(date=pd.to_datetime(frame['timestamp']).dt.normalize()).sort_values('timestamp')
+    daily = frame.pivot_table(index='date', columns='symbol', values='weighted_sentiment', aggfunc='last')
+
+    symbols = [symbol for symbol in close_frame.columns if symbol in daily.columns]
+    close = close_frame[symbols].sort_index()
+    close.index = pd.DatetimeIndex(close.index).normalize()
+    # Results stamped on non-trading days count towards the next trading day; later ones have no price yet
+    daily = daily[symbols]
+    positions = close.index.searchsorted(daily.index)
+    daily = daily[positions < len(close.index)]
+    daily.index = close.index[positions[positions < len(close.index)]]
+    daily = daily.groupby(level=0).last().reindex(close.index).ffill(limit=max_staleness_days)
+
+    return Panel(
+        close.index.values.astype('datetime64[D]'), symbols,
+        daily.to_numpy(dtype=float), close.to_numpy(dtype=float)
+    )
+
+
+class Cumulative(NamedTuple):
+    """Forward returns sorted by key with prefix sums, so any key range is summed in O(log n)"""
+    keys: np.ndarray
+    forward: np.ndarray
+    up: np.ndarray
+    down: np.ndarray
+
+
+def _cumulative(keys: np.ndarray, forward: np.ndarray) -> Cumulative:
+    order = np.argsort(keys, kind='stable')
+    forward = forward[order]
+
+    def prefix(values):
+        return np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+
+    return Cumulative(keys[order], prefix(forward), prefix(forward > 0), prefix(forward < 0))
+
+
+def _range_sums(cumulative: Cumulative, lo, hi):
+    """Count, forward return sum, rises and falls of the sorted entries in [lo, hi)"""
+    return (
+        hi - lo,
+        cumulative.forward[hi] - cumulative.forward[lo],
+        cumulative.up[hi] - cumulative.up[lo],
+        cumulative.down[hi] - cumulative.down[lo]
+    )
+
+
+def _date_key(date_index, sentiment):
+    # Sentiment lies in [-1, 1], so each date occupies [date, date + 0.5] and dates never overlap
+    return date_index + (np.clip(sentiment, -1, 1) + 1) / 4
+
+
+class Observations(NamedTuple):
+    """Flattened symbol-days with a signal, the day's price change and the forward return
+
+    by_date orders observations by (date, sentiment); rising and falling hold the days with a
+    positive or negative price change ordered by sentiment. Each threshold then becomes a
+    binary search instead of a pass over every symbol-day.
+    """
+    sentiment: np.ndarray
+    price_change: np.ndarray
+    forward_return: np.ndarray
+    date_index: np.ndarray
+    symbol_index: np.ndarray
+    n_dates: int
+    holding_days: int
+    by_date: Cumulative
+    rising: Cumulative
+    falling: Cumulative
+
+
+def observations(panel: Panel, holding_days: int = 1) -> Observations:
+    """Signals on day t (after the close) paired with the return from close t to close t + holding_days"""
+    close = panel.close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change = np.full_like(close, np.nan)
+        price_change[1:] = (close[1:] / close[:-1] - 1) * 100
+        forward = np.full_like(close, np.nan)
+        forward[:-holding_days] = close[holding_days:] / close[:-holding_days] - 1
+
+    valid = np.isfinite(panel.sentiment) & np.isfinite(price_change) & np.isfinite(forward)
+    date_index, symbol_index = np.nonzero(valid)
+    sentiment, price_change, forward = panel.sentiment[valid], price_change[valid], forward[valid]
+    rising, falling = price_change > 0, price_change < 0
+    return Observations(
+        sentiment, price_change, forward, date_index.astype(np.int32), symbol_index.astype(np.int32),
+        close.shape[0], holding_days,
+        _cumulative(_date_key(date_index, sentiment), forward),
+        _cumulative(sentiment[rising], forward[rising]),
+        _cumulative(sentiment[falling], forward[falling])
+    )
+
+
+def _check_order(thresholds: Dict[str, float]):
+    if not thresholds['strong_buy'] >= thresholds['buy'] > thresholds['sell'] >= thresholds['strong_sell']:
+        raise ValueError(f"thresholds must satisfy strong_buy >= buy > sell >= strong_sell: {thresholds}")
+
+
+def evaluate(obs: Observations, thresholds: Dict[str, float], allow_short: bool = True,
+             cost_bps: float = 0.0) -> Dict[str, float]:
+    """Returns and hit rates of trading every recommendation for holding_days
+
+    Buys go long and sells go short (or flat without allow_short), one unit per symbol-day.
+    A hit is a position whose price moved its way; cost_bps is charged against returns only.
+    The portfolio return of a period is the mean return of that day's open positions.
+    """
+    _check_order(thresholds)
+    # With ordered thresholds every strong signal lies inside its plain region, so positions
+    # depend on buy and sell alone and both regions are contiguous within a date
+    by_date = obs.by_date
+    days = np.arange(obs.n_dates)
+    first = np.searchsorted(by_date.keys, days)
+    last = np.searchsorted(by_date.keys, days + 1)
+    above = np.searchsorted(by_date.keys, _date_key(days, thresholds['buy']), side='right')
+    below = np.searchsorted(by_date.keys, _date_key(days, thresholds['sell']), side='left')
+    long_count, long_forward, long_up, _ = _range_sums(by_date, above, last)
+    short_count, short_forward, _, short_down = _range_sums(by_date, first, below)
+
+    strong_buy = _range_sums(
+        obs.rising, np.searchsorted(obs.rising.keys, thresholds['strong_buy'], side='right'), len(obs.rising.keys)
+    )
+    strong_sell = _range_sums(obs.falling, 0, np.searchsorted(obs.falling.keys, thresholds['strong_sell']))
+    buy_region = (long_count.sum(), long_forward.sum(), long_up.sum())
+    sell_region = (short_count.sum(), short_forward.sum(), short_down.sum())
+
+    # (count, forward return sum, moves the recommendation's way) per code
+    classes = {
+        STRONG_BUY: (strong_buy[0], strong_buy[1], strong_buy[2]),
+        BUY: tuple(region - strong for region, strong in zip(buy_region, strong_buy[:3])),
+        STRONG_SELL: (strong_sell[0], strong_sell[1], strong_sell[3]),
+        SELL: (sell_region[0] - strong_sell[0], sell_region[1] - strong_sell[1], sell_region[2] - strong_sell[3]),
+    }
+    classes[HOLD] = (
+        len(obs.sentiment) - buy_region[0] - sell_region[0],
+        by_date.forward[-1] - buy_region[1] - sell_region[1],
+        0
+    )
+
+    if not allow_short:
+        short_count, short_forward, short_down = 0 * short_count, 0 * short_forward, 0 * short_down
+    period_counts = long_count + short_count
+    period_sums = long_forward - short_forward - period_counts * (cost_bps / 10000)
+
+    metrics = dict(thresholds)
+    trades = int(period_counts.sum())
+    metrics['trades'] = trades
+    metrics['hit_rate'] = float((long_up.sum() + short_down.sum()) / trades) if trades else 0.0
+    metrics['mean_trade_return'] = float(period_sums.sum() / trades) if trades else 0.0
+
+    # Per recommendation: how often it was given and how often the price then moved its way
+    for code, name in CODE_NAMES.items():
+        count, forward_sum, right_way = classes[code]
+        metrics[f'{name}_count'] = int(round(count))
+        metrics[f'{name}_mean_forward_return'] = float(forward_sum / count) if count else 0.0
+        if code != HOLD:
+            metrics[f'{name}_hit_rate'] = float(right_way / count) if count else 0.0
+
+    period_returns = np.divide(period_sums, period_counts, out=np.zeros(obs.n_dates), where=period_counts > 0)
+    # Non-overlapping periods only, so compounding is not counted holding_days times
+    period_returns = period_returns[::obs.holding_days]
+    std = period_returns.std()
+    periods_per_year = TRADING_DAYS / obs.holding_days
+    equity = np.cumprod(1 + period_returns)
+    metrics['total_return'] = float(equity[-1] - 1) if len(equity) else 0.0
+    metrics['sharpe'] = float(period_returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0
+    metrics['max_drawdown'] = float((1 - equity / np.maximum.accumulate(equity)).max()) if len(equity) else 0.0
+    return metrics
+
+
+def threshold_grid(grid: Dict[str, Sequence[float]], base: Optional[Dict[str, float]] = None) -> List[Dict[str, float]]:
+    """Every ordered combination (strong_buy >= buy > sell >= strong_sell) of the listed values"""
+    base = {**DEFAULT_THRESHOLDS, **(base or {})}
+    axes = [list(grid.get(key) or [base[key]]) for key in THRESHOLD_KEYS]
+    combinations = []
+    for strong_buy, buy, sell, strong_sell in itertools.product(*axes):
+        if strong_buy >= buy > sell >= strong_sell:
+            combinations.append({'strong_buy': strong_buy, 'buy': buy, 'sell': sell, 'strong_sell': strong_sell})
+    return combinations
+
+
+# Each worker process receives the observations once, in the pool initializer
+_worker_obs = None
+
+
+def _init_worker(obs: Observations):
+    global _worker_obs
+    _worker_obs = obs
+
+
+def _evaluate_chunk(combinations: List[Dict[str, float]], allow_short: bool, cost_bps: float) -> List[Dict]:
+    return [evaluate(_worker_obs, thresholds, allow_short, cost_bps) for thresholds in combinations]
+
+
+def sweep(obs: Observations, combinations: Iterable[Dict[str, float]], processes: int = 0,
+          allow_short: bool = True, cost_bps: float = 0.0, chunk_size: int = 64) -> 'pd.DataFrame':
+    """Evaluate many threshold sets, across worker processes when processes > 1; best Sharpe first"""
+    import pandas as pd
+
+    combinations = list(combinations)
+    start = time.perf_counter()
+    if processes > 1 and len(combinations) > chunk_size:
+        chunks = [combinations[i:i + chunk_size] for i in range(0, len(combinations), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(obs,)) as pool:
+            rows = [row for chunk in pool.map(_evaluate_chunk, chunks, itertools.repeat(allow_short),
+                                              itertools.repeat(cost_bps)) for row in chunk]
+    else:
+        rows = [evaluate(obs, thresholds, allow_short, cost_bps) for thresholds in combinations]
+
+    elapsed = time.perf_counter() - start
+    logging.getLogger(__name__).info(
+        f"Evaluated {len(rows)} threshold sets over {len(obs.sentiment)} symbol-days in {elapsed:.2f}s"
+    )
+    frame = pd.DataFrame(rows)
+    return frame.sort_values('sharpe', ascending=False, ignore_index=True) if rows else frame
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from history_store import HistoryStore
+    from market_data import MarketDataFetcher
+    from cache import build_provider_cache
+
+    parser = argparse.ArgumentParser(description="Backtest the recommendation rules on stored sentiment history")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+    parser.add_argument('--start', help="first date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last date (YYYY-MM-DD)")
+    parser.add_argument('--symbols', nargs='*', help="symbols to include (default: all stored)")
+    parser.add_argument('--sweep', action='store_true', help="evaluate the threshold grid from the backtest config")
+    parser.add_argument('--processes', type=int, help="worker processes for the sweep")
+    parser.add_argument('--top', type=int, default=10, help="sweep rows to print")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    backtest_config = config.get('backtest', {})
+    thresholds = {**DEFAULT_THRESHOLDS, **config.get('stock_analysis', {}).get('sentiment_threshold', {})}
+
+    history_path = config.get('history_store', {}).get('path', 'history')
+    if not os.path.isabs(history_path):
+        history_path = os.path.join(os.path.dirname(os.path.abspath(args.config)), history_path)
+    results = HistoryStore(history_path).query(
+        args.symbols, args.start, args.end, columns=['timestamp', 'symbol', 'weighted_sentiment']
+    )
+    if results.empty:
+        print(f"No stored results under {history_path}; enable history_store and run some analyses first")
+        return 1
+
+    symbols = sorted(results['symbol'].unique())
+    market_data = MarketDataFetcher(build_provider_cache({'cache_duration_minutes': 0}), lambda provider, call: call())
+    # One extra week of prices covers the forward return of the last signals
+    start = args.start or str(results['timestamp'].min().date())
+    end = str((results['timestamp'].max() + timedelta(days=7)).date())
+    closes = market_data.get_close_panel(symbols, start=start, end=end)
+
+    panel = build_panel(results, closes, backtest_config.get('max_staleness_days', 3))
+    obs = observations(panel, backtest_config.get('holding_days', 1))
+    allow_short = backtest_config.get('allow_short', True)
+    cost_bps = backtest_config.get('cost_bps', 0.0)
+
+    if args.sweep:
+        processes = args.processes if args.processes is not None else backtest_config.get('processes', 0)
+        frame = sweep(obs, threshold_grid(backtest_config.get('grid', {}), thresholds), processes, allow_short, cost_bps)
+        print(frame.head(args.top).to_string())
+    else:
+        print(json.dumps(evaluate(obs, thresholds, allow_short, cost_bps), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Columnar batch scoring for large lists of texts
+"""
+
+import logging
+import os
+import time
+from contextlib import nullcontext
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from scorers import RAW_WIDTH, CombinedEngine, ScorerEngine, build_engine
+
+SCORE_COLUMNS = (
+    'vader_compound', 'vader_positive', 'vader_negative', 'vader_neutral',
+    'textblob_polarity', 'textblob_subjectivity', 'combined_score'
+)
+
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+
+def label_scores(scores: np.ndarray) -> np.ndarray:
+    """Vectorized counterpart of SentimentAnalyzer._get_sentiment_label"""
+    labels = np.full(len(scores), 'neutral', dtype=object)
+    labels[scores >= POSITIVE_THRESHOLD] = 'positive'
+    labels[scores <= NEGATIVE_THRESHOLD] = 'negative'
+    return labels
+
+
+def as_text(value) -> str:
+    """Text to score for a corpus value: missing values (None, NaN) are empty, others their str()"""
+    if isinstance(value, str):
+        return value
+    if value is None or value != value:
+        return ""
+    return str(value)
+
+
+def columns_from_raw(raw: np.ndarray) -> Dict[str, np.ndarray]:
+    """Build score columns from raw (compound, pos, neg, neu, polarity, subjectivity, combined) rows"""
+    combined = raw[:, 6]
+    return {
+        'vader_compound': raw[:, 0],
+        'vader_positive': raw[:, 1],
+        'vader_negative': raw[:, 2],
+        'vader_neutral': raw[:, 3],
+        'textblob_polarity': raw[:, 4],
+        'textblob_subjectivity': raw[:, 5],
+        'combined_score': combined,
+        'sentiment_label': label_scores(combined)
+    }
+
+
+class BatchScorer:
+    """Scores many texts at once with one engine and returns one NumPy array per score column"""
+
+    def __init__(self, vader=None, memo=None, instrumentation=None, engine: Optional[ScorerEngine] = None):
+        # Engines load their lexicons on first use, so memo-only runs never load them
+        self.engine = engine or CombinedEngine(vader)
+        self.memo = memo
+        self.instrumentation = instrumentation
+
+    @property
+    def vader(self):
+        """The engine's VADER analyzer, or the process-wide one for engines without it"""
+        from scorers import shared_vader
+        return getattr(self.engine, 'vader', None) or shared_vader()
+
+    def raw_scores(self, texts: List[str]) -> np.ndarray:
+        """Score every text, one raw row (see scorers.RAW_WIDTH) each"""
+        raw = self.engine.raw_scores(texts, self.instrumentation)
+        if self.instrumentation and texts:
+            self.instrumentation.increment('texts_scored', len(texts))
+        return raw
+
+    def score(self, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Score texts; results match analyze_text for every row"""
+        timer = self.instrumentation.timer('batch_scoring') if self.instrumentation else nullcontext()
+        with timer:
+            plan = MemoPlan(texts, self.memo, self.engine.memo_key)
+            if plan.missing:
+                plan.fill(self.raw_scores(plan.missing))
+            return plan.columns()
+
+    def iter_scores(self, texts: Iterable[str], chunk_size: int = 2000) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield score columns chunk by chunk, reading texts lazily (in-process ParallelScorer.iter_scores)"""
+        iterator = iter(texts)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield self.score(chunk)
+
+
+class MemoPlan:
+    """Deduplicates a batch and resolves what it can from the engine's entries in the score memo"""
+
+    def __init__(self, texts: Iterable[str], memo=None, engine: str = 'combined'):
+        texts = texts.tolist() if hasattr(texts, 'tolist') else list(texts)
+        self.memo = memo
+
+        # Repeated texts (syndicated headlines, cross-posts) are scored once
+        unique = {}
+        self.inverse = np.empty(len(texts), dtype=np.intp)
+        for i, text in enumerate(texts):
+            self.inverse[i] = unique.setdefault(as_text(text), len(unique))
+        unique = list(unique)
+
+        self.raw = np.empty((len(unique), RAW_WIDTH))
+        self.keys = None
+        missing_rows = range(len(unique))
+        if memo is not None:
+            self.keys = [memo.key_for(text, engine) for text in unique]
+            found = memo.get_many(self.keys)
+            missing_rows = []
+            for row, key in enumerate(self.keys):
+                if key in found:
+                    self.raw[row] = found[key]
+                else:
+                    missing_rows.append(row)
+
+        self.missing_rows = list(missing_rows)
+        self.missing = [unique[row] for row in self.missing_rows]
+
+    def fill(self, raw: np.ndarray):
+        """Store freshly scored rows for the missing texts"""
+        self.raw[self.missing_rows] = raw
+        if self.memo is not None:
+            self.memo.set_many({
+                self.keys[row]: tuple(values) for row, values in zip(self.missing_rows, raw.tolist())
+            })
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return columns_from_raw(self.raw[self.inverse])
+
+
+def concat_scores(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Join per-chunk score columns into one set of columns"""
+    if not chunks:
+        return {column: np.empty(0) for column in SCORE_COLUMNS + ('sentiment_label',)}
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+
+
+# Each worker process builds its scorer once, in the pool initializer
+_worker_scorer = None
+
+
+def _init_worker(engine: str = 'combined', scoring_config: Optional[Dict] = None):
+    global _worker_scorer
+    _worker_scorer = BatchScorer(engine=build_engine(engine, scoring_config))
+
+
+def _score_chunk(texts: List[str]) -> np.ndarray:
+    return _worker_scorer.raw_scores(texts)
+
+
+class ParallelScorer:
+    """Scores large corpora in chunks across a pool of worker processes"""
+
+    def __init__(self, processes: Optional[int] = None, chunk_size: int = 2000, memo=None,
+                 engine: str = 'combined', scoring_config: Optional[Dict] = None):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.scoring_config = scoring_config
+        # The memo is consulted and updated in this process; workers only see misses
+        self.memo = memo
+        self.memo_key = build_engine(engine, scoring_config).memo_key
+        self.logger = logging.getLogger(__name__)
+        self.last_run = {}
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # The pool outlives a single call so workers stay initialized between corpora
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_init_worker, initargs=(self.engine, self.scoring_config)
+            )
+        return self._executor
+
+    def iter_scores(self, texts: Iterable[str]) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield score columns chunk by chunk, in input order"""
+        pool = self._pool()
+        iterator = iter(texts)
+        pending = deque()
+        # Keep a bounded number of chunks in flight so the input is read lazily
+        max_pending = self.processes * 2
+        scored = 0
+        start = time.perf_counter()
+
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(iterator, self.chunk_size))
+                if not chunk:
+                    break
+                plan = MemoPlan(chunk, self.memo, self.memo_key)
+                future = pool.submit(_score_chunk, plan.missing) if plan.missing else None
+                pending.append((plan, future))
+
+            if not pending:
+                break
+
+            plan, future = pending.popleft()
+            if future is not None:
+                plan.fill(future.result())
+            result = plan.columns()
+            scored += len(result['combined_score'])
+            yield result
+
+        elapsed = time.perf_counter() - start
+        self.last_run = {
+            'texts': scored,
+            'seconds': elapsed,
+            'texts_per_second': scored / elapsed if elapsed > 0 else 0.0,
+            'processes': self.processes,
+            'chunk_size': self.chunk_size,
+            'engine': self.engine
+        }
+        self.logger.info(
+            f"Scored {scored} texts in {elapsed:.2f}s "
+            f"({self.last_run['texts_per_second']:.0f} texts/sec, {self.processes} processes)"
+        )
+
+    def score(self, texts: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Score a corpus and return the joined columns"""
+        return concat_scores(list(self.iter_scores(texts)))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the sentiment analysis pipeline
+Runs against fixture providers so results are reproducible and comparable between changes
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from batch_scorer import BatchScorer
+from cache import ResultStore, build_provider_cache
+from backtest import build_panel, observations, sweep, threshold_grid
+from fixtures import (FaultInjector, FixtureMarket, FixtureReddit, Latency, generate_backtest_history,
+                      generate_fixtures, load_fixtures, record_fixtures)
+from market_data import MarketDataFetcher
+from provider_access import ProviderRegistry, build_provider_access
+from scorers import ENGINES, build_engine
+from sentiment_analyzer import SentimentAnalyzer
+
+# Metrics where a larger value is an improvement; every other metric is lower-is-better
+HIGHER_IS_BETTER = ('texts_per_sec', 'symbols_per_sec', 'combinations_per_sec')
+# Diagnostic counters of the fault drill: reported, but neither better nor worse when they move
+NOT_COMPARED = ('fault_drill.providers.', 'fault_drill.injected.')
+
+
+class StageTimer:
+    """Records wall time of analyzer methods under stage names"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, obj, method_name: str, stage: str):
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+        setattr(obj, method_name, timed)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {stage: latency_summary(samples) for stage, samples in self.samples.items()}
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000
+    return {
+        'count': len(samples),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(values.mean())
+    }
+
+
+def build_offline_analyzer(data: Dict, latency: Latency, config_path: str,
+                           faults: Optional[FaultInjector] = None) -> SentimentAnalyzer:
+    """Analyzer wired to fixture providers, with caches, memo, rate limits and export disabled
+
+    With faults, fixture providers fail as configured and requests go through the provider
+    access layer (retries, adaptive rates, breakers) with pacing off and backoff waits scaled
+    down a hundredfold, so a drill runs in seconds.
+    """
+    analyzer = SentimentAnalyzer(config_path)
+    market = FixtureMarket(data, latency, faults)
+
+    if faults is None:
+        analyzer.providers = ProviderRegistry({})
+    else:
+        access_config = analyzer.config.get('provider_access', {})
+        analyzer.providers = build_provider_access({'rate_limit_delay': 0}, {
+            **access_config,
+            'backoff_base': access_config.get('backoff_base', 0.5) / 100,
+            'backoff_max': access_config.get('backoff_max', 20.0) / 100
+        })
+    # Every fetch stage reads the zero-TTL cache, so each run repeats the same provider work
+    analyzer.cache = build_provider_cache({'cache_duration_minutes': 0})
+    analyzer.reddit_posts.cache = analyzer.cache
+    if analyzer.articles:
+        analyzer.articles.cache = analyzer.cache
+    analyzer.results = ResultStore(0)
+    analyzer.market_data = MarketDataFetcher(
+        analyzer.cache, analyzer._request, ticker_factory=market.ticker, download=market.download,
+        instrumentation=analyzer.instrumentation
+    )
+    analyzer.instrumentation.register_collector('provider_cache', analyzer.cache.stats)
+    analyzer.instrumentation.register_collector('result_store', analyzer.results.stats)
+    analyzer.reddit = FixtureReddit(data, latency, faults)
+    analyzer.score_memo = None
+    for scorer in analyzer.scorers.values():
+        scorer.memo = None
+    analyzer.instrumentation.unregister_collector('score_memo')
+    if analyzer.sink:
+        analyzer.sink.close()
+        analyzer.sink = None
+    return analyzer
+
+
+def corpus_from_fixtures(data: Dict, size: int) -> List[str]:
+    """Unique texts built from fixture headlines and posts"""
+    base = [article['title'] for entry in data['symbols'].values() for article in entry['news']]
+    base += [f"{post['title']}. {post['selftext']}" for post in data.get('reddit', [])]
+    return [f"{base[i % len(base)]} ({i})" for i in range(size)]
+
+
+def clear_indexes(analyzer: SentimentAnalyzer):
+    """Forget indexed documents and near-duplicate clusters, so a rerun ingests and scores everything again"""
+    if analyzer.documents is not None:
+        analyzer.documents.clear()
+    if analyzer.near_duplicates is not None:
+        analyzer.near_duplicates.clear()
+
+
+def measure(run: Callable[[], None], track_memory: bool,
+            reset: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """Time one run; peak memory comes from a second, traced run so tracing cost stays out of timings
+
+    reset, if given, runs before the traced run so it repeats the first run's work.
+    """
+    start = time.perf_counter()
+    run()
+    metrics = {'seconds': time.perf_counter() - start}
+
+    if track_memory:
+        if reset is not None:
+            reset()
+        tracemalloc.start()
+        run()
+        metrics['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return metrics
+
+
+def run_benchmarks(args) -> Dict:
+    if args.fixtures:
+        data = load_fixtures(args.fixtures)
+    else:
+        symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+        data = generate_fixtures(symbols, seed=args.seed)
+
+    latency = Latency(args.latency, args.jitter, seed=args.seed)
+    symbols = list(data['symbols'])
+    corpus = corpus_from_fixtures(data, args.texts)
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    results = {}
+
+    analyzer = build_offline_analyzer(data, latency, args.config)
+    metrics = measure(lambda: [analyzer.analyze_text(text) for text in corpus], args.memory,
+                      lambda: clear_indexes(analyzer))
+    metrics['texts_per_sec'] = len(corpus) / metrics['seconds']
+    results['analyze_text'] = metrics
+
+    metrics = measure(lambda: analyzer.analyze_batch(corpus), args.memory, lambda: clear_indexes(analyzer))
+    metrics['texts_per_sec'] = len(corpus) / metrics['seconds']
+    results['analyze_batch'] = metrics
+
+    # Raw throughput of every scoring engine on the same corpus, lexicons loaded beforehand
+    for name in ENGINES:
+        scorer = BatchScorer(engine=build_engine(name, config.get('scoring', {})))
+        scorer.engine.warm_up()
+        metrics = measure(lambda: scorer.raw_scores(corpus), args.memory)
+        metrics['texts_per_sec'] = len(corpus) / metrics['seconds']
+        results[f"engine_{name}"] = metrics
+
+    # Single-symbol pipeline with per-stage timings
+    analyzer = build_offline_analyzer(data, latency, args.config)
+    timer = StageTimer()
+    timer.wrap(analyzer.market_data, 'get_news', 'news_fetch')
+    timer.wrap(analyzer.market_data, 'get_history', 'price_fetch')
+    timer.wrap(analyzer.market_data, 'get_fundamentals', 'fundamentals_fetch')
+    timer.wrap(analyzer, 'fetch_reddit_posts', 'reddit_fetch')
+    timer.wrap(analyzer, 'score_texts', 'scoring')
+    timer.wrap(analyzer, 'analyze_stock_sentiment', 'symbol_total')
+    metrics = measure(lambda: [analyzer.analyze_stock_sentiment(symbol) for symbol in symbols], False)
+    metrics['symbols_per_sec'] = len(symbols) / metrics['seconds']
+    metrics['stages'] = timer.summary()
+    results['analyze_stock_sentiment'] = metrics
+
+    # Sector roll-up through the concurrent engine
+    sectors = {f"Sector{i // 5}": symbols[i:i + 5] for i in range(0, len(symbols), 5)}
+    analyzer = build_offline_analyzer(data, latency, args.config)
+    if args.workers:
+        analyzer.max_workers = args.workers
+    metrics = measure(lambda: analyzer.get_sector_sentiment(sectors), args.memory, lambda: clear_indexes(analyzer))
+    metrics['symbols_per_sec'] = len(symbols) / metrics['seconds']
+    metrics['max_workers'] = analyzer.max_workers
+    results['get_sector_sentiment'] = metrics
+
+    # The same portfolio against failing providers: how much degrades and what the breakers did
+    if args.faults:
+        faults = FaultInjector.parse(args.faults, seed=args.seed)
+        analyzer = build_offline_analyzer(data, latency, args.config, faults)
+        drill = []
+        metrics = measure(lambda: drill.extend(analyzer.analyze_symbols(symbols)), False)
+        completed = [result for result in drill if result is not None]
+        metrics['symbols_per_sec'] = len(symbols) / metrics['seconds']
+        metrics['degraded_symbols'] = sum(1 for result in completed if result['degraded'])
+        metrics['unavailable_symbols'] = sum(1 for result in completed if result['sentiment_label'] == 'unavailable')
+        metrics['injected'] = faults.stats()
+        metrics['providers'] = {
+            name: {key: value for key, value in stats.items() if key != 'state'}
+            for name, stats in analyzer.providers.stats().items() if name != 'articles'
+        }
+        results['fault_drill'] = metrics
+
+    # Threshold sweep over a synthetic multi-year sentiment and price panel
+    history, closes = generate_backtest_history(
+        [f"SYM{i:03d}" for i in range(args.backtest_symbols)], args.backtest_days, seed=args.seed
+    )
+    obs = observations(build_panel(history, closes))
+    combinations = threshold_grid(config.get('backtest', {}).get('grid', {}))
+    metrics = measure(lambda: sweep(obs, combinations, args.backtest_processes), False)
+    metrics['combinations'] = len(combinations)
+    metrics['symbol_days'] = len(obs.sentiment)
+    metrics['combinations_per_sec'] = len(combinations) / metrics['seconds']
+    results['backtest_sweep'] = metrics
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'parameters': {
+            'fixtures': args.fixtures or 'synthetic',
+            'symbols': len(symbols),
+            'texts': len(corpus),
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'seed': args.seed,
+            'backtest_symbols': args.backtest_symbols,
+            'backtest_days': args.backtest_days,
+            'faults': args.faults
+        },
+        'results': results
+    }
+
+
+def _flatten(metrics: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not key.endswith('count') and key != 'max_workers':
+            flat[name] = value
+    return flat
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List metrics that got worse than the baseline by more than tolerance"""
+    regressions = []
+    now = _flatten(current['results'])
+    before = _flatten(baseline['results'])
+    for name, value in now.items():
+        if name not in before or not before[name] or name.endswith('.seconds') or name.startswith(NOT_COMPARED):
+            continue
+        change = (value - before[name]) / before[name]
+        worse = change < -tolerance if name.endswith(HIGHER_IS_BETTER) else change > tolerance
+        if worse:
+            regressions.append(f"{name}: {before[name]:.3f} -> {value:.3f} ({change:+.1%})")
+    return regressions
+
+
+def print_report(report: Dict):
+    print("\n⏱️  Sentiment Pipeline Benchmark")
+    print("=" * 60)
+    for scenario, metrics in report['results'].items():
+        unit = next(name for name in HIGHER_IS_BETTER if name in metrics)
+        rate = metrics[unit]
+        unit = unit.replace('_per_sec', '/sec')
+        memory = f" | peak {metrics['peak_memory_mb']:.1f} MB" if 'peak_memory_mb' in metrics else ""
+        print(f"{scenario:<26} {rate:>10.1f} {unit}{memory}")
+        for stage, summary in metrics.get('stages', {}).items():
+            print(f"  {stage:<24} p50 {summary['p50_ms']:8.2f} ms | p99 {summary['p99_ms']:8.2f} ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment pipeline against offline fixtures")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+    parser.add_argument('--fixtures', help="fixture JSON recorded with --record (default: synthetic)")
+    parser.add_argument('--record', metavar='PATH', help="record live Yahoo responses for SYMBOLS to PATH and exit")
+    parser.add_argument('--symbols', type=int, default=25, help="number of synthetic symbols")
+    parser.add_argument('--texts', type=int, default=2000, help="texts in the scoring corpus")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated provider latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument('--workers', type=int, help="max_workers for the sector run")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backtest-symbols', type=int, default=100, help="symbols in the backtest panel")
+    parser.add_argument('--backtest-days', type=int, default=750, help="trading days in the backtest panel")
+    parser.add_argument('--backtest-processes', type=int, default=0, help="worker processes for the sweep")
+    parser.add_argument('--faults', metavar='SPEC',
+                        help="also run a fault drill, e.g. errors=0.1,throttle=0.05,slow=0.05,outage=reddit")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="skip peak memory passes")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to save the JSON results")
+    parser.add_argument('--compare', metavar='BASELINE', help="fail if results regress against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument('record_symbols', nargs='*', metavar='SYMBOLS')
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record_symbols or ["AAPL", "GOOGL", "MSFT"], args.record)
+        print(f"📼 Fixtures recorded to {args.record}")
+        return 0
+
+    report = run_benchmarks(args)
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
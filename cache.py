@@ -0,0 +1,376 @@
+"""
+TTL caches for data provider responses
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the fresh values among keys"""
+        found = {}
+        for key in keys:
+            hit, value = self.get(key)
+            if hit:
+                found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl_seconds: float):
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store with per-entry expiry that survives restarts"""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+
+            value, expires_at = row
+            with self._conn:
+                if expires_at <= now:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return False, None
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+
+        return True, pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        self.set_many({key: value}, ttl_seconds)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the fresh values among keys, touching them in one transaction"""
+        keys = list(keys)
+        now = time.time()
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE expires_at > ? AND key IN ({placeholders})",
+                    [now] + batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+        return {key: pickle.loads(value) for key, value in found.items()}
+
+    def set_many(self, items: Dict[str, Any], ttl_seconds: float):
+        now = time.time()
+        rows = [
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl_seconds, now)
+            for key, value in items.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ProviderCache:
+    """Caches provider responses with a separate TTL per provider"""
+
+    def __init__(self, backend, ttls: Dict[str, float], default_ttl: float):
+        # TTLs are in seconds; a TTL of 0 disables caching for that provider
+        self.backend = backend
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, provider: str) -> float:
+        return self.ttls.get(provider, self.default_ttl)
+
+    def _record(self, provider: str, outcome: str):
+        with self._lock:
+            counters = self._stats.setdefault(provider, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def get(self, provider: str, key: str, default: Any = None) -> Any:
+        """Return a cached response, or default if absent or expired"""
+        if self.ttl_for(provider) <= 0:
+            return default
+
+        hit, value = self.backend.get(f"{provider}:{key}")
+        self._record(provider, 'hits' if hit else 'misses')
+        return value if hit else default
+
+    def contains(self, provider: str, key: str) -> bool:
+        """Check for a fresh entry without touching the hit and miss counters"""
+        if self.ttl_for(provider) <= 0:
+            return False
+        return self.backend.get(f"{provider}:{key}")[0]
+
+    def set(self, provider: str, key: str, value: Any):
+        ttl = self.ttl_for(provider)
+        if ttl > 0:
+            self.backend.set(f"{provider}:{key}", value, ttl)
+
+    def get_or_fetch(self, provider: str, key: str, fetch: Callable[[], Any], refresh: bool = False) -> Any:
+        """Return the cached response for key, calling fetch on a miss or when refresh is set"""
+        if not refresh:
+            value = self.get(provider, key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        # Exceptions propagate so failed fetches are never cached
+        value = fetch()
+        self.set(provider, key, value)
+        return value
+
+    def stats(self) -> Dict[str, Dict]:
+        """Hit and miss counters per provider"""
+        with self._lock:
+            stats = {}
+            for provider, counters in self._stats.items():
+                lookups = counters['hits'] + counters['misses']
+                stats[provider] = {
+                    'hits': counters['hits'],
+                    'misses': counters['misses'],
+                    'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+                    'ttl_seconds': self.ttl_for(provider)
+                }
+            return stats
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self._stats.clear()
+
+
+class ResultStore:
+    """Session-scoped results computed at most once per key and freshness window"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._results = {}
+        self._inflight = {}
+        self._stats = {'hits': 0, 'computed': 0, 'coalesced': 0}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], force: bool = False) -> Any:
+        """Return the fresh result for key; concurrent callers share one in-flight computation"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and not force and entry[0] > time.time():
+                self._stats['hits'] += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._results[key] = (time.time() + self.ttl_seconds, value)
+            self._stats['computed'] += 1
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one stored result, or all of them"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, stored=len(self._results), inflight=len(self._inflight))
+
+
+class ScoreMemo:
+    """Bounded memo of text scores keyed by a hash of the normalized text"""
+
+    def __init__(self, max_entries: int = 100000, path: Optional[str] = None,
+                 persistent_max_entries: int = 1000000):
+        # Scores never go stale, so entries only leave through LRU eviction
+        self.memory = MemoryCacheBackend(max_entries)
+        self.disk = SQLiteCacheBackend(path, persistent_max_entries) if path else None
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(text: str, engine: str = 'combined') -> str:
+        """Key for text scored by the engine with this memo_key (see ScorerEngine.memo_key)"""
+        # Engines tokenize on whitespace runs (the lexicon engine collapses them before matching
+        # phrases), so collapsing whitespace does not change any engine's scores
+        normalized = " ".join(text.split())
+        return hashlib.sha1(f"{engine}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Look keys up in memory, then on disk; disk hits are promoted to memory"""
+        found = self.memory.get_many(keys)
+        memory_hits = len(found)
+
+        if self.disk is not None and len(found) < len(keys):
+            from_disk = self.disk.get_many(key for key in keys if key not in found)
+            self.memory.set_many(from_disk, float('inf'))
+            found.update(from_disk)
+
+        with self._lock:
+            self._stats['hits'] += memory_hits
+            self._stats['disk_hits'] += len(found) - memory_hits
+            self._stats['misses'] += len(keys) - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, Any]):
+        if not items:
+            return
+        self.memory.set_many(items, float('inf'))
+        if self.disk is not None:
+            self.disk.set_many(items, float('inf'))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = sum(self._stats.values())
+            hits = self._stats['hits'] + self._stats['disk_hits']
+            return dict(
+                self._stats,
+                hit_rate=hits / lookups if lookups else 0.0,
+                entries=len(self.memory)
+            )
+
+
+def build_score_memo(memo_config: Dict, base_dir: Optional[str] = None) -> Optional[ScoreMemo]:
+    """Create the analyze_text memo described by the score_memo config block"""
+    if not memo_config.get('enabled', True):
+        return None
+
+    path = memo_config.get('path')
+    if path and base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    return ScoreMemo(
+        memo_config.get('max_entries', 100000),
+        path,
+        memo_config.get('persistent_max_entries', 1000000)
+    )
+
+
+def build_provider_cache(analysis_config: Dict, base_dir: Optional[str] = None) -> ProviderCache:
+    """Create the provider cache described by the stock_analysis config block"""
+    cache_config = analysis_config.get('cache', {})
+    default_ttl = analysis_config.get('cache_duration_minutes', 15) * 60
+    ttls = {
+        provider: minutes * 60
+        for provider, minutes in cache_config.get('ttl_minutes', {}).items()
+    }
+
+    backend_name = cache_config.get('backend', 'memory')
+    max_entries = cache_config.get('max_entries', 2048)
+    if backend_name == 'sqlite':
+        path = cache_config.get('path', '.sentiment_cache.sqlite')
+        if base_dir and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        backend = SQLiteCacheBackend(path, max_entries)
+    elif backend_name == 'memory':
+        backend = MemoryCacheBackend(max_entries)
+    else:
+        raise ValueError(f"Unknown cache backend: {backend_name}")
+
+    return ProviderCache(backend, ttls, default_ttl)
@@ -5,11 +5,16 @@ Displays sentiment analysis results in a readable format
 """
 
 import os
-from sentiment_analyzer import SentimentAnalyzer
-import pandas as pd
+from sentiment_analyzer import SentimentAnalyzer, format_sentiment
+from result_set import ResultSet
 from datetime import datetime
 import json
 
+CSV_COLUMNS = (
+    'symbol', 'timestamp', 'weighted_sentiment', 'sentiment_label', 'recommendation', 'news_sentiment',
+    'news_articles_count', 'current_price', 'price_change_pct', 'company_name'
+)
+
 class SentimentDashboard:
     def __init__(self):
         config_path = os.path.join(os.path.dirname(__file__), 'config.json')
@@ -22,7 +27,9 @@ class SentimentDashboard:
         stock_data = result['stock_context']
         
         # Determine color based on sentiment
-        if sentiment > 0.1:
+        if sentiment is None:
+            sentiment_color = "⚪"
+        elif sentiment > 0.1:
             sentiment_color = "🟢"
         elif sentiment < -0.1:
             sentiment_color = "🔴"
@@ -32,7 +39,7 @@ class SentimentDashboard:
         print(f"\n{sentiment_color} {symbol} - {stock_data.get('company_name', 'N/A')}")
         print("─" * 50)
         print(f"💰 Price: ${stock_data.get('current_price', 'N/A')} ({stock_data.get('price_change_pct', 'N/A'):+.2f}%)")
-        print(f"📊 Sentiment: {sentiment:.3f} ({result['sentiment_label'].upper()})")
+        print(f"📊 Sentiment: {format_sentiment(sentiment)} ({result['sentiment_label'].upper()})")
         print(f"📰 News Articles: {result['news_sentiment']['articles_count']}")
         print(f"🎯 Recommendation: {result['recommendation']}")
         
@@ -42,6 +49,9 @@ class SentimentDashboard:
         print("=" * 60)
         print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
+        # The summary is a running roll-up fed by each analysis, not a pass over the results
+        self.analyzer.track_portfolio('dashboard', symbols)
+        
         results = []
         for symbol in symbols:
             try:
@@ -49,20 +59,20 @@ class SentimentDashboard:
                 results.append(result)
                 self.display_stock_card(result)
             except Exception as e:
+                self.analyzer.rollups.discard(symbol)
                 print(f"❌ Error analyzing {symbol}: {e}")
         
         # Summary statistics
         if results:
-            sentiments = [r['weighted_sentiment'] for r in results]
-            avg_sentiment = sum(sentiments) / len(sentiments)
+            summary = self.analyzer.rollup_summary('dashboard')
             
             print(f"\n📊 PORTFOLIO SUMMARY")
             print("─" * 30)
-            print(f"Stocks Analyzed: {len(results)}")
-            print(f"Average Sentiment: {avg_sentiment:.3f}")
-            print(f"Bullish Stocks: {sum(1 for s in sentiments if s > 0.1)}")
-            print(f"Bearish Stocks: {sum(1 for s in sentiments if s < -0.1)}")
-            print(f"Neutral Stocks: {sum(1 for s in sentiments if -0.1 <= s <= 0.1)}")
+            print(f"Stocks Analyzed: {summary['stocks_analyzed']}")
+            print(f"Average Sentiment: {summary['average_sentiment']:.3f} (± {summary['sentiment_std']:.3f})")
+            print(f"Bullish Stocks: {summary['bullish_stocks']}")
+            print(f"Bearish Stocks: {summary['bearish_stocks']}")
+            print(f"Neutral Stocks: {summary['neutral_stocks']}")
         
         return results
     
@@ -97,30 +107,14 @@ class SentimentDashboard:
         return sector_results
     
     def export_to_csv(self, results, filename="sentiment_analysis.csv"):
-        """Export results to CSV file"""
-        if not results:
+        """Export results (a list of analysis results or a ResultSet) to CSV file"""
+        result_set = results if isinstance(results, ResultSet) else ResultSet.from_results(results or [])
+        if not len(result_set):
             print("No results to export")
             return
         
-        # Flatten the results for CSV export
-        csv_data = []
-        for result in results:
-            row = {
-                'symbol': result['symbol'],
-                'timestamp': result['timestamp'],
-                'weighted_sentiment': result['weighted_sentiment'],
-                'sentiment_label': result['sentiment_label'],
-                'recommendation': result['recommendation'],
-                'news_sentiment': result['news_sentiment']['sentiment'],
-                'news_articles_count': result['news_sentiment']['articles_count'],
-                'current_price': result['stock_context'].get('current_price', 'N/A'),
-                'price_change_pct': result['stock_context'].get('price_change_pct', 'N/A'),
-                'company_name': result['stock_context'].get('company_name', 'N/A')
-            }
-            csv_data.append(row)
-        
-        df = pd.DataFrame(csv_data)
-        df.to_csv(filename, index=False)
+        # Missing values are written as empty cells
+        result_set.to_dataframe()[list(CSV_COLUMNS)].to_csv(filename, index=False)
         print(f"📄 Results exported to {filename}")
 
 def main():
@@ -0,0 +1,191 @@
+"""
+Inverted index from tickers to the news items and posts that mention them
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Legal-form suffixes dropped from company names before matching them in text
+COMPANY_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd', 'limited', 'plc',
+    'holdings', 'holding', 'group', 'sa', 'ag', 'nv', 'se', 'lp', 'llc', 'class', 'a', 'b', 'c', 'the'
+}
+
+CASHTAG = re.compile(r"(?<![A-Za-z0-9])\$([A-Za-z]{1,5}(?:\.[A-Za-z])?)(?![A-Za-z0-9])")
+
+
+def item_id(item: Dict) -> str:
+    """Stable identifier for a news item or Reddit post"""
+    for field in ('id', 'uuid', 'link'):
+        if item.get(field):
+            return str(item[field])
+    return hashlib.sha1(str(item.get('title', '')).encode('utf-8')).hexdigest()
+
+
+def short_company_name(name: str) -> Optional[str]:
+    """'Apple Inc.' -> 'Apple', 'Tesla, Inc.' -> 'Tesla'; None when nothing distinctive remains"""
+    words = re.sub(r"[,.()]", " ", name or "").split()
+    while words and words[-1].lower() in COMPANY_SUFFIXES:
+        words.pop()
+    while words and words[0].lower() == 'the':
+        words.pop(0)
+    short = " ".join(words)
+    return short if len(short) >= 3 else None
+
+
+class TickerExtractor:
+    """Finds mentions of known tickers via cashtags, bare symbols and company names"""
+
+    def __init__(self, symbols: Iterable[str] = (), company_names: Optional[Dict[str, str]] = None):
+        self.symbols = set()
+        self.names = {}
+        self._symbol_pattern = None
+        self._name_pattern = None
+        self.update(symbols, company_names)
+
+    def update(self, symbols: Iterable[str] = (), company_names: Optional[Dict[str, str]] = None):
+        """Add tickers and company names, recompiling the matchers once"""
+        self.symbols.update(symbols)
+        for symbol, name in (company_names or {}).items():
+            short = short_company_name(name)
+            if short and short != symbol:
+                self.names[short] = symbol
+
+        # Single-letter tickers only match as cashtags; as bare words they are mostly noise
+        bare = [symbol for symbol in self.symbols if len(symbol) > 1]
+        if bare:
+            # Longest alternatives first so a ticker is not shadowed by a shorter prefix
+            alternatives = "|".join(re.escape(s) for s in sorted(bare, key=len, reverse=True))
+            self._symbol_pattern = re.compile(rf"(?<![A-Za-z0-9$])(?:{alternatives})(?![A-Za-z0-9])")
+        if self.names:
+            alternatives = "|".join(re.escape(n) for n in sorted(self.names, key=len, reverse=True))
+            self._name_pattern = re.compile(rf"\b(?:{alternatives})\b")
+
+    def extract(self, text: str) -> Set[str]:
+        found = {match.upper() for match in CASHTAG.findall(text)}
+        if self._symbol_pattern is not None:
+            found.update(self._symbol_pattern.findall(text))
+        if self._name_pattern is not None:
+            found.update(self.names[name] for name in self._name_pattern.findall(text))
+        return found
+
+
+class Document:
+    """One scored news item or post and the tickers it mentions"""
+
+    __slots__ = ('doc_id', 'kind', 'score', 'timestamp', 'source', 'upvotes', 'tickers', 'cluster')
+
+    def __init__(self, doc_id: str, kind: str, score: float, timestamp: Optional[float],
+                 source: Optional[str], upvotes: Optional[float], tickers: Set[str],
+                 cluster: Optional[int] = None):
+        self.doc_id = doc_id
+        self.kind = kind
+        self.score = score
+        self.timestamp = timestamp
+        self.source = source
+        self.upvotes = upvotes
+        self.tickers = tickers
+        self.cluster = cluster
+
+
+class DocumentIndex:
+    """Ingests documents once, scores them in one batch and maps each ticker to its documents"""
+
+    def __init__(self, score: Callable[[List[str], str], Tuple[Sequence[float], Optional[List[int]]]],
+                 max_documents: int = 50000):
+        # score(texts, kind) returns a score per text and, when near duplicates are clustered, cluster ids
+        self.score = score
+        self.max_documents = max_documents
+        self.extractor = TickerExtractor()
+        self._documents = OrderedDict()
+        self._postings = {}
+        self._indexed_at = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, items: List[Dict]) -> int:
+        """Index items with keys id, kind, text and optional timestamp, source, upvotes and tickers
+
+        Items already in the index are skipped, so a story carried by several tickers' feeds is
+        scored once. Each kind is scored in its own batch, so kinds can use different engines.
+        Returns the number of new documents.
+        """
+        with self._lock:
+            new_items = list({
+                item['id']: item for item in items if item['id'] not in self._documents
+            }.values())
+        if not new_items:
+            return 0
+
+        by_kind = {}
+        for item in new_items:
+            by_kind.setdefault(item['kind'], []).append(item)
+        new_items, scores, clusters = [], [], []
+        for kind, kind_items in by_kind.items():
+            kind_scores, kind_clusters = self.score([item['text'] for item in kind_items], kind)
+            new_items += kind_items
+            scores += list(kind_scores)
+            clusters += kind_clusters if kind_clusters is not None else [None] * len(kind_items)
+
+        with self._lock:
+            for item, score, cluster in zip(new_items, scores, clusters):
+                if item['id'] in self._documents:
+                    continue
+                tickers = self.extractor.extract(item['text']) | set(item.get('tickers') or ())
+                document = Document(
+                    item['id'], item['kind'], float(score), item.get('timestamp'),
+                    item.get('source'), item.get('upvotes'), tickers, cluster
+                )
+                self._documents[document.doc_id] = document
+                for ticker in tickers:
+                    self._postings.setdefault(ticker, {})[document.doc_id] = document
+
+            # Bound memory by forgetting the oldest documents
+            while len(self._documents) > self.max_documents:
+                _, evicted = self._documents.popitem(last=False)
+                for ticker in evicted.tickers:
+                    postings = self._postings.get(ticker)
+                    if postings is not None:
+                        postings.pop(evicted.doc_id, None)
+                        if not postings:
+                            del self._postings[ticker]
+        return len(new_items)
+
+    def mark_indexed(self, symbols: Iterable[str]):
+        """Record that the feeds of these symbols were just ingested"""
+        now = time.monotonic()
+        with self._lock:
+            for symbol in symbols:
+                self._indexed_at[symbol] = now
+
+    def covers(self, symbol: str, max_age: float) -> bool:
+        """Whether the symbol's own feeds were ingested within max_age seconds"""
+        with self._lock:
+            indexed_at = self._indexed_at.get(symbol)
+        return indexed_at is not None and time.monotonic() - indexed_at <= max_age
+
+    def documents(self, symbol: str, kind: Optional[str] = None, limit: Optional[int] = None) -> List[Document]:
+        """Documents mentioning a symbol, newest first"""
+        with self._lock:
+            documents = list(self._postings.get(symbol, {}).values())
+        if kind is not None:
+            documents = [document for document in documents if document.kind == kind]
+        documents.sort(key=lambda document: document.timestamp or 0, reverse=True)
+        return documents[:limit] if limit else documents
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'tickers': len(self._postings),
+                'postings': sum(len(postings) for postings in self._postings.values())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._postings.clear()
+            self._indexed_at.clear()
@@ -0,0 +1,422 @@
+"""
+Offline stand-ins for yfinance and PRAW built from recorded or synthetic fixtures
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+POSITIVE_PHRASES = [
+    "beats earnings expectations", "raises full-year guidance", "announces record revenue",
+    "wins major contract", "shares rally on strong demand", "upgraded to buy by analysts"
+]
+NEGATIVE_PHRASES = [
+    "misses revenue estimates", "cuts outlook amid weak demand", "faces regulatory probe",
+    "shares slide after downgrade", "reports disappointing margins", "announces layoffs"
+]
+NEUTRAL_PHRASES = [
+    "to present at investor conference", "files quarterly report", "schedules earnings call",
+    "names new board member", "updates product lineup", "holds annual shareholder meeting"
+]
+
+
+class Latency:
+    """Simulated provider round-trip time in seconds, with optional jitter"""
+
+    def __init__(self, seconds: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.seconds <= 0 and self.jitter <= 0:
+            return
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        time.sleep(self.seconds + extra)
+
+
+def generate_fixtures(symbols: List[str], articles_per_symbol: int = 10,
+                      posts_per_symbol: int = 10, seed: int = 42) -> Dict:
+    """Build a deterministic synthetic fixture set for the given symbols"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    data = {'symbols': {}, 'reddit': []}
+
+    for symbol in symbols:
+        news = []
+        for i in range(articles_per_symbol):
+            phrase = rng.choice(rng.choice([POSITIVE_PHRASES, NEGATIVE_PHRASES, NEUTRAL_PHRASES]))
+            news.append({
+                'uuid': f"{symbol}-news-{i}",
+                'title': f"{symbol} {phrase}",
+                'publisher': rng.choice(['Reuters', 'Bloomberg', 'MarketWatch']),
+                'link': f"https://example.com/news/{symbol.lower()}-{i}",
+                'providerPublishTime': now - rng.randint(0, 7 * 86400),
+                'relatedTickers': [symbol]
+            })
+
+        price = rng.uniform(20, 500)
+        closes = []
+        for _ in range(5):
+            price *= 1 + rng.gauss(0, 0.02)
+            closes.append(round(price, 2))
+
+        data['symbols'][symbol] = {
+            'news': news,
+            'history': {
+                'Close': closes,
+                'Volume': [rng.randint(1_000_000, 50_000_000) for _ in closes]
+            },
+            'info': {
+                'longName': f"{symbol} Holdings Inc.",
+                'marketCap': rng.randint(10**9, 3 * 10**12),
+                'trailingPE': round(rng.uniform(8, 60), 2)
+            }
+        }
+
+        for i in range(posts_per_symbol):
+            phrase = rng.choice(rng.choice([POSITIVE_PHRASES, NEGATIVE_PHRASES, NEUTRAL_PHRASES]))
+            data['reddit'].append({
+                'id': f"{symbol.lower()}{i}",
+                'subreddit': rng.choice(['stocks', 'investing', 'SecurityAnalysis', 'ValueInvesting', 'StockMarket']),
+                'title': f"${symbol} {phrase}",
+                'selftext': f"Thoughts on {symbol}? The company {phrase} and I am watching the stock closely this week.",
+                'score': rng.randint(0, 500),
+                'created_utc': now - rng.randint(0, 7 * 86400)
+            })
+
+    return data
+
+
+def generate_backtest_history(symbols: List[str], days: int = 500, signal_strength: float = 0.05,
+                              seed: int = 42):
+    """Synthetic stored results and daily closes in which sentiment weakly predicts the next day's return
+
+    Returns (results, closes): rows shaped like HistoryStore.query output and a date x symbol close panel.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    sentiment = np.clip(rng.normal(0, 0.25, (days, len(symbols))), -1, 1)
+    noise = rng.normal(0, 0.02, (days, len(symbols)))
+    # Day t's sentiment leans on the t -> t + 1 return
+    returns = np.zeros_like(noise)
+    returns[1:] = signal_strength * 0.02 * sentiment[:-1] / 0.25 + noise[1:]
+    closes = pd.DataFrame(
+        rng.uniform(20, 500, len(symbols)) * np.cumprod(1 + returns, axis=0), index=dates, columns=symbols
+    )
+
+    stamps = dates + pd.Timedelta(hours=20)
+    results = pd.DataFrame({
+        'timestamp': np.repeat(stamps.values, len(symbols)),
+        'symbol': np.tile(symbols, days),
+        'weighted_sentiment': sentiment.ravel()
+    })
+    return results, closes
+
+
+def record_fixtures(symbols: List[str], path: str, reddit=None, posts_limit: int = 25):
+    """Capture live Yahoo (and optionally Reddit) responses into a fixture file"""
+    import yfinance as yf
+
+    data = {'symbols': {}, 'reddit': []}
+    for symbol in symbols:
+        ticker = yf.Ticker(symbol)
+        hist = ticker.history(period="5d")
+        info = ticker.info or {}
+        data['symbols'][symbol] = {
+            'news': ticker.news or [],
+            'history': {
+                'Close': hist['Close'].tolist() if not hist.empty else [],
+                'Volume': hist['Volume'].tolist() if not hist.empty else []
+            },
+            'info': {field: info.get(field) for field in ('longName', 'marketCap', 'trailingPE')}
+        }
+
+        if reddit is not None:
+            for post in reddit.subreddit('stocks+investing+StockMarket').search(symbol, limit=posts_limit):
+                data['reddit'].append({
+                    'id': post.id,
+                    'subreddit': str(post.subreddit),
+                    'title': post.title,
+                    'selftext': post.selftext,
+                    'score': post.score,
+                    'created_utc': post.created_utc
+                })
+
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+class ProviderFault(Exception):
+    """An injected provider failure carrying the HTTP status a real provider would send"""
+
+    def __init__(self, provider: str, status_code: int, retry_after: Optional[float] = None):
+        reason = "Too Many Requests" if status_code == 429 else "Service Unavailable"
+        super().__init__(f"{provider}: {status_code} {reason} (injected)")
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class FaultInjector:
+    """Seeded faults for fixture providers: 429s, 5xx errors, slow responses and full outages
+
+    Fixture providers call check(provider) before serving each request.
+    """
+
+    def __init__(self, error_rate: float = 0.0, throttle_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_seconds: float = 0.5, retry_after: Optional[float] = None, outages=(),
+                 seed: Optional[int] = None):
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.retry_after = retry_after
+        self.outages = set(outages)
+        self.injected = {'errors': 0, 'throttled': 0, 'slow': 0, 'outage': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> 'FaultInjector':
+        """Build from a spec such as errors=0.1,throttle=0.05,slow=0.1,slow_seconds=0.5,outage=reddit+yahoo"""
+        options = dict(part.split('=', 1) for part in spec.split(',') if part)
+        return cls(
+            error_rate=float(options.get('errors', 0)),
+            throttle_rate=float(options.get('throttle', 0)),
+            slow_rate=float(options.get('slow', 0)),
+            slow_seconds=float(options.get('slow_seconds', 0.5)),
+            retry_after=float(options['retry_after']) if 'retry_after' in options else None,
+            outages=[name for name in options.get('outage', '').split('+') if name],
+            seed=seed
+        )
+
+    def start_outage(self, provider: str):
+        with self._lock:
+            self.outages.add(provider)
+
+    def end_outage(self, provider: str):
+        with self._lock:
+            self.outages.discard(provider)
+
+    def check(self, provider: str):
+        """Raise, or stall, the way a struggling provider would for this request"""
+        with self._lock:
+            if provider in self.outages:
+                self.injected['outage'] += 1
+                raise ProviderFault(provider, 503)
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                self.injected['throttled'] += 1
+                raise ProviderFault(provider, 429, self.retry_after)
+            if roll < self.throttle_rate + self.error_rate:
+                self.injected['errors'] += 1
+                raise ProviderFault(provider, 503)
+            slow = self._random.random() < self.slow_rate
+            if slow:
+                self.injected['slow'] += 1
+        if slow:
+            time.sleep(self.slow_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.injected)
+
+
+def load_fixtures(path: str) -> Dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class FixtureMarket:
+    """Serves fixture data through the yf.Ticker and yf.download interfaces"""
+
+    def __init__(self, data: Dict, latency: Optional[Latency] = None, faults: Optional[FaultInjector] = None):
+        self.data = data
+        self.latency = latency or Latency()
+        self.faults = faults
+        self.calls = {'news': 0, 'history': 0, 'info': 0, 'download': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, call: str):
+        with self._lock:
+            self.calls[call] += 1
+        self.latency.wait()
+        if self.faults is not None:
+            self.faults.check('yahoo')
+
+    def _history_frame(self, symbol: str) -> pd.DataFrame:
+        history = self.data['symbols'].get(symbol, {}).get('history', {})
+        if not history.get('Close'):
+            return pd.DataFrame(columns=['Close', 'Volume'])
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=len(history['Close']))
+        return pd.DataFrame(history, index=index)
+
+    def ticker(self, symbol: str) -> 'FixtureTicker':
+        """Drop-in replacement for yf.Ticker"""
+        return FixtureTicker(self, symbol)
+
+    def download(self, symbols, period: str = "5d", group_by: str = 'ticker', **kwargs) -> pd.DataFrame:
+        """Drop-in replacement for yf.download with group_by='ticker'"""
+        self._count('download')
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        frames = {symbol: self._history_frame(symbol) for symbol in symbols}
+        return pd.concat(frames, axis=1)
+
+
+class FixtureTicker:
+    """yf.Ticker look-alike backed by a FixtureMarket"""
+
+    def __init__(self, market: FixtureMarket, symbol: str):
+        self.market = market
+        self.symbol = symbol
+
+    @property
+    def news(self) -> List[Dict]:
+        self.market._count('news')
+        return list(self.market.data['symbols'].get(self.symbol, {}).get('news', []))
+
+    def history(self, period: str = "5d") -> pd.DataFrame:
+        self.market._count('history')
+        return self.market._history_frame(self.symbol)
+
+    @property
+    def info(self) -> Dict:
+        self.market._count('info')
+        return dict(self.market.data['symbols'].get(self.symbol, {}).get('info', {}))
+
+
+class FixtureReddit:
+    """praw.Reddit look-alike whose searches match fixture posts by text"""
+
+    def __init__(self, data: Dict, latency: Optional[Latency] = None, faults: Optional[FaultInjector] = None):
+        self.posts = data.get('reddit', [])
+        self.latency = latency or Latency()
+        self.faults = faults
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def subreddit(self, name: str) -> 'FixtureSubreddit':
+        return FixtureSubreddit(self, name)
+
+
+class FixtureSubreddit:
+    def __init__(self, reddit: FixtureReddit, name: str):
+        self.reddit = reddit
+        self.names = {part.lower() for part in name.split('+')}
+
+    def search(self, query: str, limit: int = 25, sort: str = 'relevance', time_filter: str = 'week'):
+        with self.reddit._lock:
+            self.reddit.calls += 1
+        self.reddit.latency.wait()
+        if self.reddit.faults is not None:
+            self.reddit.faults.check('reddit')
+
+        # Treat the query as an OR of terms, like the queries the analyzer sends
+        terms = [
+            term.strip('()$').upper() for term in query.replace('(', ' ').replace(')', ' ').split()
+            if term.upper() != 'OR'
+        ]
+        matches = []
+        for post in self.reddit.posts:
+            if post.get('subreddit', '').lower() not in self.names:
+                continue
+            text = f"{post['title']} {post['selftext']}".upper()
+            if any(term in text for term in terms):
+                matches.append(SimpleNamespace(**post))
+            if len(matches) >= limit:
+                break
+        return iter(matches)
+
+
+def article_html(title: str, paragraphs: List[str]) -> str:
+    """Minimal news page with the structure article extractors expect"""
+    body = "\n".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<nav><a href='/'>Home</a> <a href='/markets'>Markets</a></nav>"
+        f"<article><h1>{title}</h1>{body}</article>"
+        f"<footer>Copyright Example News</footer></body></html>"
+    )
+
+
+class FixtureArticleServer:
+    """Local HTTP server for article pages, so the body fetcher can be exercised offline"""
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, latency: Optional[Latency] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.pages = dict(pages or {})
+        self.latency = latency or Latency()
+        self.requests = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class ArticleHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                server.latency.wait()
+                page = server.pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                body = page.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), ArticleHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-articles", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def add_fixture_news(self, data: Dict, paragraphs: int = 4, seed: int = 42):
+        """Serve a generated body for every fixture news item and point its link at this server"""
+        rng = random.Random(seed)
+        for symbol, entry in data['symbols'].items():
+            for i, article in enumerate(entry['news']):
+                path = f"/news/{symbol.lower()}-{i}"
+                sentences = [
+                    f"{symbol} {rng.choice(rng.choice([POSITIVE_PHRASES, NEGATIVE_PHRASES, NEUTRAL_PHRASES]))}, "
+                    f"according to people familiar with the matter who asked not to be named."
+                    for _ in range(paragraphs)
+                ]
+                self.pages[path] = article_html(article['title'], sentences)
+                article['link'] = self.url(path)
+        return data
+
+    def start(self) -> 'FixtureArticleServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FixtureArticleServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
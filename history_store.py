@@ -0,0 +1,228 @@
+"""
+Append-only Parquet history of analysis results, partitioned by date and symbol
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from result_set import COLUMNS, ResultSet, arrow_type
+
+# Partition keys are stored in the directory layout rather than in the files
+PARTITION_COLUMNS = ('date', 'symbol')
+
+# Written in a partition while its compaction swaps files; dataset discovery skips names starting with '.'
+COMPACTION_MANIFEST = '.compacting.json'
+
+
+def result_schema():
+    """Arrow schema of a flattened result, partition keys first"""
+    import pyarrow as pa
+
+    fields = [pa.field('date', pa.date32()), pa.field('symbol', pa.string())]
+    fields += [pa.field(name, arrow_type(pa, type_name)) for name, type_name, _ in COLUMNS]
+    return pa.schema(fields)
+
+
+def results_table(results: Sequence[Dict]):
+    """Arrow table of flattened results"""
+    import pyarrow as pa
+
+    result_set = ResultSet.from_results(results)
+    timestamps = result_set.columns['timestamp']
+    dates = np.where(np.isnat(timestamps), np.datetime64(date.today()), timestamps.astype('datetime64[D]'))
+    table = result_set.to_arrow().add_column(0, 'date', pa.array(dates, type=pa.date32()))
+    return table.select(result_schema().names).cast(result_schema())
+
+
+def write_results_parquet(results: Sequence[Dict], path: str):
+    """Write results to a single Parquet file"""
+    import pyarrow.parquet as pq
+
+    pq.write_table(results_table(results), path)
+
+
+def _as_date(value: Union[str, date, datetime]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+class HistoryStore:
+    """Buffers results and appends them as Parquet files under date=/symbol= partitions"""
+
+    def __init__(self, path: str, flush_rows: int = 500, memory_map: bool = True):
+        import pyarrow  # noqa: F401 - fail at construction when the optional dependency is missing
+
+        self.path = path
+        self.flush_rows = flush_rows
+        self.memory_map = memory_map
+        self.logger = logging.getLogger(__name__)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        # Finish compactions an earlier process was interrupted in
+        for manifest in glob.glob(os.path.join(path, 'date=*', 'symbol=*', COMPACTION_MANIFEST)):
+            self._finish_compaction(os.path.dirname(manifest))
+        atexit.register(self.flush)
+
+    def _partitioning(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(
+            pa.schema([pa.field('date', pa.date32()), pa.field('symbol', pa.string())]), flavor='hive'
+        )
+
+    def append(self, result: Dict):
+        """Queue a result; buffered rows are written once flush_rows accumulate or on flush()"""
+        with self._lock:
+            self._pending.append(result)
+            full = len(self._pending) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def extend(self, results: Sequence[Dict]):
+        with self._lock:
+            self._pending.extend(result for result in results if result is not None)
+            full = len(self._pending) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered results as new files; existing files are never rewritten"""
+        import pyarrow.dataset as ds
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        table = results_table(pending)
+        with self._write_lock:
+            ds.write_dataset(
+                table, self.path, format='parquet', partitioning=self._partitioning(),
+                basename_template=f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore'
+            )
+        return table.num_rows
+
+    def _dataset(self):
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        if not glob.glob(os.path.join(self.path, 'date=*', 'symbol=*', '*.parquet')):
+            return None
+        return ds.dataset(
+            self.path, schema=result_schema(), format='parquet', partitioning=self._partitioning(),
+            filesystem=fs.LocalFileSystem(use_mmap=self.memory_map)
+        )
+
+    def query(self, symbols: Optional[Sequence[str]] = None, start=None, end=None,
+              columns: Optional[Sequence[str]] = None, as_arrow: bool = False):
+        """Load results, reading only the requested columns and the partitions in [start, end]"""
+        import pyarrow.dataset as ds
+
+        dataset = self._dataset()
+        if dataset is None:
+            table = result_schema().empty_table()
+            table = table.select(list(columns)) if columns else table
+            return table if as_arrow else table.to_pandas()
+
+        condition = None
+        for clause in (
+            ds.field('symbol').isin(list(symbols)) if symbols else None,
+            ds.field('date') >= _as_date(start) if start else None,
+            ds.field('date') <= _as_date(end) if end else None,
+        ):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+
+        table = dataset.to_table(columns=list(columns) if columns else None, filter=condition)
+        if 'timestamp' in table.column_names:
+            table = table.sort_by([('timestamp', 'ascending')])
+        return table if as_arrow else table.to_pandas()
+
+    def compact(self, start=None, end=None) -> int:
+        """Merge the small files of each date/symbol partition into one; returns partitions merged"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.flush()
+        merged = 0
+        with self._write_lock:
+            for partition in sorted(glob.glob(os.path.join(self.path, 'date=*', 'symbol=*'))):
+                day = _as_date(os.path.basename(os.path.dirname(partition)).split('=', 1)[1])
+                if (start and day < _as_date(start)) or (end and day > _as_date(end)):
+                    continue
+                if os.path.exists(os.path.join(partition, COMPACTION_MANIFEST)):
+                    self._finish_compaction(partition)
+                # Merged files left half-written by a crash before their manifest was saved
+                for stale in glob.glob(os.path.join(partition, '.part-*-compacted.parquet')):
+                    os.remove(stale)
+                files = sorted(glob.glob(os.path.join(partition, '*.parquet')))
+                if len(files) < 2:
+                    continue
+
+                table = pa.concat_tables([pq.read_table(f, memory_map=self.memory_map) for f in files])
+                name = f"part-{time.time_ns()}-compacted.parquet"
+                # The merged file stays hidden until its sources are gone, so no query reads a row twice
+                pq.write_table(table.sort_by([('timestamp', 'ascending')]), os.path.join(partition, f".{name}"))
+                _write_json(os.path.join(partition, COMPACTION_MANIFEST),
+                            {'target': name, 'sources': [os.path.basename(f) for f in files]})
+                self._finish_compaction(partition)
+                merged += 1
+
+        self.logger.info(f"Compacted {merged} history partitions")
+        return merged
+
+    def _finish_compaction(self, partition: str):
+        """Remove a compaction's source files, then reveal the merged file; safe to repeat after a crash"""
+        manifest_path = os.path.join(partition, COMPACTION_MANIFEST)
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        for name in manifest['sources']:
+            source = os.path.join(partition, name)
+            if os.path.exists(source):
+                os.remove(source)
+        scratch = os.path.join(partition, f".{manifest['target']}")
+        if os.path.exists(scratch):
+            os.replace(scratch, os.path.join(partition, manifest['target']))
+        os.remove(manifest_path)
+
+
+def _write_json(path: str, value: Dict):
+    # Atomic, so a crash leaves either no manifest or a complete one
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(value, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def build_history_store(store_config: Dict, base_dir: Optional[str] = None) -> Optional[HistoryStore]:
+    """Create the result history store described by the history_store config block, or None if disabled"""
+    if not store_config.get('enabled', False):
+        return None
+
+    path = store_config.get('path', 'history')
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    return HistoryStore(
+        path,
+        flush_rows=store_config.get('flush_rows', 500),
+        memory_map=store_config.get('memory_map', True)
+    )
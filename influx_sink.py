@@ -0,0 +1,244 @@
+"""
+Batched, non-blocking export of analysis results to InfluxDB
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def _escape_tag(value) -> str:
+    return str(value).replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+
+# Field types must stay fixed per measurement, so counts are always integers and the rest floats
+INTEGER_FIELDS = {'articles_count', 'posts_count', 'volume'}
+
+
+def _field_value(name: str, value) -> Optional[str]:
+    """Line-protocol field literal, or None for missing and non-numeric values"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value != value:
+        return None
+    return f"{int(value)}i" if name in INTEGER_FIELDS else repr(value)
+
+
+def result_to_line(result: Dict, sector: Optional[str] = None, measurement: str = "stock_sentiment") -> Optional[str]:
+    """Convert an analyze_stock_sentiment result to one line-protocol point"""
+    news = result.get('news_sentiment', {})
+    social = result.get('social_sentiment', {})
+    context = result.get('stock_context', {})
+
+    fields = {
+        'weighted_sentiment': result.get('weighted_sentiment'),
+        'news_sentiment': news.get('sentiment'),
+        'social_sentiment': social.get('sentiment'),
+        'news_confidence': news.get('confidence'),
+        'social_confidence': social.get('confidence'),
+        'articles_count': news.get('articles_count'),
+        'posts_count': social.get('posts_count'),
+        'price': context.get('current_price'),
+        'price_change_pct': context.get('price_change_pct'),
+        'volume': context.get('volume')
+    }
+    field_set = ",".join(
+        f"{name}={literal}" for name, literal in
+        ((name, _field_value(name, value)) for name, value in fields.items())
+        if literal is not None
+    )
+    if not field_set:
+        return None
+
+    tags = f"symbol={_escape_tag(result['symbol'])}"
+    if sector:
+        tags += f",sector={_escape_tag(sector)}"
+
+    timestamp = datetime.fromisoformat(result['timestamp']) if result.get('timestamp') else datetime.now()
+    return f"{measurement},{tags} {field_set} {int(timestamp.timestamp() * 1e9)}"
+
+
+class InfluxDBBackend:
+    """Writes line-protocol batches to an InfluxDB 2.x bucket"""
+
+    def __init__(self, url: str, token: str, org: str, bucket: str):
+        from influxdb_client import InfluxDBClient
+        from influxdb_client.client.write_api import SYNCHRONOUS
+
+        self.bucket = bucket
+        self.org = org
+        self.client = InfluxDBClient(url=url, token=token, org=org)
+        # Batching and retries are done by InfluxSink, so each write is one request
+        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+
+    def write(self, lines: List[str]):
+        self.write_api.write(bucket=self.bucket, org=self.org, record=lines)
+
+    def close(self):
+        self.client.close()
+
+
+class FileBackend:
+    """Appends line-protocol batches to a local file; a stand-in for InfluxDB in tests"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, lines: List[str]):
+        with self._lock, open(self.path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+
+    def close(self):
+        pass
+
+
+class InfluxSink:
+    """Buffers result points and flushes them in batches from a background thread"""
+
+    def __init__(self, backend, sectors: Optional[Dict[str, List[str]]] = None,
+                 measurement: str = "stock_sentiment", batch_size: int = 500,
+                 flush_interval: float = 5.0, max_buffer: int = 10000, max_retries: int = 3):
+        self.backend = backend
+        self.measurement = measurement
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        # A symbol listed under several sectors gets one point per sector, so every sector query sees it
+        self.sectors_of = {}
+        for sector, symbols in (sectors or {}).items():
+            for symbol in symbols:
+                symbol_sectors = self.sectors_of.setdefault(symbol, [])
+                if sector not in symbol_sectors:
+                    symbol_sectors.append(sector)
+        self.logger = logging.getLogger(__name__)
+        self.stats = {'written': 0, 'dropped': 0, 'failed_batches': 0}
+        self._stats_lock = threading.Lock()
+
+        self._buffer = queue.Queue(maxsize=max_buffer)
+        self._flush_requested = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="influx-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, result: Dict):
+        """Queue a result without blocking; the oldest point is dropped when the buffer is full"""
+        for sector in self.sectors_of.get(result.get('symbol')) or [None]:
+            line = result_to_line(result, sector, self.measurement)
+            if line is None:
+                return
+            self._put(line)
+
+        if self._buffer.qsize() >= self.batch_size:
+            self._flush_requested.set()
+
+    def _put(self, line: str):
+        while True:
+            try:
+                self._buffer.put_nowait(line)
+                return
+            except queue.Full:
+                try:
+                    self._buffer.get_nowait()
+                    self._count('dropped')
+                except queue.Empty:
+                    pass
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def flush(self):
+        """Ask the background thread to write everything buffered so far"""
+        self._flush_requested.set()
+
+    def _drain(self) -> List[str]:
+        lines = []
+        while len(lines) < self.batch_size:
+            try:
+                lines.append(self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+
+    def _write_with_retry(self, lines: List[str]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.backend.write(lines)
+                self._count('written', len(lines))
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.logger.error(f"Dropping {len(lines)} points after {attempt + 1} failed writes: {e}")
+                    self._count('failed_batches')
+                    self._count('dropped', len(lines))
+                    return
+                delay = min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+                self.logger.warning(f"InfluxDB write failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            while True:
+                lines = self._drain()
+                if not lines:
+                    break
+                self._write_with_retry(lines)
+
+    def close(self):
+        """Flush remaining points and stop the background thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flush_requested.set()
+        self._thread.join()
+
+        while True:
+            lines = self._drain()
+            if not lines:
+                break
+            self._write_with_retry(lines)
+        self.backend.close()
+
+
+def build_influx_sink(influx_config: Dict, sectors: Optional[Dict[str, List[str]]] = None,
+                      base_dir: Optional[str] = None) -> Optional[InfluxSink]:
+    """Create the result sink described by the influxdb config block, or None if disabled"""
+    if not influx_config.get('enabled', False):
+        return None
+
+    file_path = influx_config.get('file_path')
+    if file_path:
+        if base_dir and not os.path.isabs(file_path):
+            file_path = os.path.join(base_dir, file_path)
+        backend = FileBackend(file_path)
+    else:
+        backend = InfluxDBBackend(
+            influx_config['url'],
+            os.getenv('INFLUXDB_TOKEN', influx_config.get('token')),
+            influx_config['org'],
+            influx_config['bucket']
+        )
+
+    return InfluxSink(
+        backend,
+        sectors,
+        measurement=influx_config.get('measurement', 'stock_sentiment'),
+        batch_size=influx_config.get('batch_size', 500),
+        flush_interval=influx_config.get('flush_interval_seconds', 5.0),
+        max_buffer=influx_config.get('max_buffer', 10000),
+        max_retries=influx_config.get('max_retries', 3)
+    )
@@ -0,0 +1,251 @@
+"""
+Per-stage timing, counters and profiling hooks for the analysis pipeline
+"""
+
+import atexit
+import bisect
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+# Upper bounds in seconds, spanning in-memory scoring up to slow provider calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total_seconds': self.sum,
+            'mean_ms': self.sum / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
+class Instrumentation:
+    """Timers and counters around provider calls and scoring steps"""
+
+    def __init__(self, enabled: bool = True, trace: bool = False):
+        self.enabled = enabled
+        # Tracing logs every timed call, for one-off investigation of a slow run
+        self.trace = trace
+        self.logger = logging.getLogger(__name__)
+        self._stages = {}
+        self._symbol_stages = {}
+        self._counters = {}
+        self._collectors = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def symbol_context(self, symbol: str):
+        """Attribute timings in this thread to a symbol"""
+        previous = getattr(self._local, 'symbol', None)
+        self._local.symbol = symbol
+        try:
+            yield
+        finally:
+            self._local.symbol = previous
+
+    @contextmanager
+    def timer(self, stage: str, symbol: Optional[str] = None):
+        """Time a block under a stage name"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, symbol)
+
+    def observe(self, stage: str, seconds: float, symbol: Optional[str] = None):
+        if not self.enabled:
+            return
+        symbol = symbol or getattr(self._local, 'symbol', None)
+        with self._lock:
+            self._stages.setdefault(stage, Histogram()).observe(seconds)
+            if symbol:
+                self._symbol_stages.setdefault(symbol, {}).setdefault(stage, Histogram()).observe(seconds)
+        if self.trace:
+            self.logger.info(f"[trace] {stage}{f' {symbol}' if symbol else ''}: {seconds * 1000:.1f} ms")
+
+    def increment(self, counter: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def register_collector(self, name: str, collect: Callable[[], Dict]):
+        """Include another component's stats (e.g. cache hit counters) in reports"""
+        self._collectors[name] = collect
+
+    def unregister_collector(self, name: str):
+        self._collectors.pop(name, None)
+
+    def stats(self) -> Dict:
+        """Aggregate and per-symbol stage summaries, counters and collected component stats"""
+        with self._lock:
+            report = {
+                'stages': {stage: hist.summary() for stage, hist in self._stages.items()},
+                'symbols': {
+                    symbol: {stage: hist.summary() for stage, hist in stages.items()}
+                    for symbol, stages in self._symbol_stages.items()
+                },
+                'counters': dict(self._counters)
+            }
+        for name, collect in self._collectors.items():
+            try:
+                report[name] = collect()
+            except Exception as e:
+                report[name] = {'error': str(e)}
+        return report
+
+    def prometheus_text(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP sentiment_stage_seconds Time spent in each analysis stage",
+            "# TYPE sentiment_stage_seconds histogram"
+        ]
+        with self._lock:
+            for stage, hist in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(hist.buckets, hist.counts):
+                    cumulative += bucket_count
+                    lines.append(f'sentiment_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'sentiment_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'sentiment_stage_seconds_sum{{stage="{stage}"}} {hist.sum}')
+                lines.append(f'sentiment_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+
+            # Per-symbol series carry only sum and count to keep cardinality manageable
+            lines.append("# HELP sentiment_symbol_stage_seconds Time spent per symbol and stage")
+            lines.append("# TYPE sentiment_symbol_stage_seconds summary")
+            for symbol, stages in sorted(self._symbol_stages.items()):
+                for stage, hist in sorted(stages.items()):
+                    labels = f'symbol="{symbol}",stage="{stage}"'
+                    lines.append(f'sentiment_symbol_stage_seconds_sum{{{labels}}} {hist.sum}')
+                    lines.append(f'sentiment_symbol_stage_seconds_count{{{labels}}} {hist.count}')
+
+            lines.append("# HELP sentiment_events_total Pipeline event counters")
+            lines.append("# TYPE sentiment_events_total counter")
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f'sentiment_events_total{{event="{counter}"}} {value}')
+
+        lines.append("# HELP sentiment_component_stat Stats reported by caches and other components")
+        lines.append("# TYPE sentiment_component_stat gauge")
+        for name, collect in self._collectors.items():
+            try:
+                collected = collect()
+            except Exception:
+                continue
+            for key, value in _flatten_numbers(collected):
+                lines.append(f'sentiment_component_stat{{component="{name}",stat="{key}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics (Prometheus text) and /stats (JSON) from a background thread"""
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics'):
+                    body = instrumentation.prometheus_text().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path.startswith('/stats'):
+                    body = json.dumps(instrumentation.stats(), default=str).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        self.logger.info(f"Metrics available at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._symbol_stages.clear()
+            self._counters.clear()
+
+
+def _flatten_numbers(stats: Dict, prefix: str = ""):
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten_numbers(value, f"{name}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+_profiler = None
+
+
+def start_profiler_from_env(env_var: str = 'SENTIMENT_PROFILE') -> Optional[cProfile.Profile]:
+    """Profile the whole process when env_var names an output file; stats are written at exit"""
+    global _profiler
+    output = os.getenv(env_var)
+    if not output or _profiler is not None:
+        return _profiler
+
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+    def dump():
+        _profiler.disable()
+        _profiler.dump_stats(output)
+        summary = io.StringIO()
+        pstats.Stats(_profiler, stream=summary).sort_stats('cumulative').print_stats(20)
+        logging.getLogger(__name__).info(f"Profile written to {output}\n{summary.getvalue()}")
+
+    atexit.register(dump)
+    return _profiler
@@ -0,0 +1,163 @@
+"""
+Yahoo Finance market data fetch stage shared by the news and price context paths
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _yfinance():
+    """yfinance (and with it pandas) is imported on the first Yahoo request"""
+    import yfinance
+    return yfinance
+
+
+class MarketDataFetcher:
+    """Fetches news, recent history and fundamentals through one Ticker per symbol"""
+
+    # Only these fields of Ticker.info are used, so only they are kept in the cache
+    FUNDAMENTAL_FIELDS = ('marketCap', 'trailingPE', 'longName')
+
+    def __init__(self, cache, request: Callable[[str, Callable[[], Any]], Any],
+                 ticker_factory: Callable = None, max_tickers: int = 512, ticker_max_age: float = 60,
+                 download: Callable = None, instrumentation=None):
+        self.cache = cache
+        self.instrumentation = instrumentation
+        # request(provider, call) runs call through the provider's rate limit, retries and breaker
+        self.request = request
+        self.ticker_factory = ticker_factory
+        self.download = download
+        self.max_tickers = max_tickers
+        # Ticker memoizes news and info on the instance, so one is shared only
+        # across a single analysis pass and rebuilt after ticker_max_age seconds
+        self.ticker_max_age = ticker_max_age
+        self.logger = logging.getLogger(__name__)
+        self._tickers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ticker(self, symbol: str, fresh: bool = False):
+        """Return the shared Ticker object for a symbol"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tickers.get(symbol)
+            if entry is None or fresh or now - entry[0] > self.ticker_max_age:
+                factory = self.ticker_factory or _yfinance().Ticker
+                entry = (now, factory(symbol))
+                self._tickers[symbol] = entry
+                while len(self._tickers) > self.max_tickers:
+                    self._tickers.popitem(last=False)
+            self._tickers.move_to_end(symbol)
+            return entry[1]
+
+    def _timer(self, stage: str, symbol: Optional[str] = None):
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.timer(stage, symbol)
+
+    def _yahoo(self, stage: str, call: Callable[[], Any], symbol: Optional[str] = None) -> Any:
+        """One Yahoo request; the stage times each attempt, not the waits between them"""
+        def timed():
+            with self._timer(stage, symbol):
+                return call()
+
+        return self.request('yahoo', timed)
+
+    def get_news(self, symbol: str, refresh: bool = False) -> List[Dict]:
+        """Recent Yahoo news items for a symbol; refresh bypasses the cached list"""
+        def fetch():
+            return self._yahoo('yahoo_news', lambda: self._ticker(symbol, fresh=refresh).news or [], symbol)
+
+        return self.cache.get_or_fetch('news', symbol, fetch, refresh=refresh)
+
+    def get_history(self, symbol: str, period: str = "5d") -> 'pd.DataFrame':
+        """Recent daily price history for a symbol"""
+        def fetch():
+            return self._yahoo('yahoo_history', lambda: self._ticker(symbol).history(period=period), symbol)
+
+        return self.cache.get_or_fetch('price', f"{symbol}:{period}", fetch)
+
+    def get_fundamentals(self, symbol: str) -> Dict:
+        """The subset of Ticker.info used for stock context"""
+        def fetch():
+            info = self._yahoo('yahoo_info', lambda: self._ticker(symbol).info or {}, symbol)
+            return {field: info.get(field) for field in self.FUNDAMENTAL_FIELDS}
+
+        return self.cache.get_or_fetch('fundamentals', symbol, fetch)
+
+    def fetch(self, symbol: str) -> Dict:
+        """Fetch news, history and fundamentals for a symbol in one stage"""
+        return {
+            'news': self.get_news(symbol),
+            'history': self.get_history(symbol),
+            'fundamentals': self.get_fundamentals(symbol)
+        }
+
+    def prefetch_history(self, symbols: List[str], period: str = "5d") -> int:
+        """Download price history for many symbols in one request and seed the cache"""
+        missing = [
+            symbol for symbol in dict.fromkeys(symbols)
+            if not self.cache.contains('price', f"{symbol}:{period}")
+        ]
+        if len(missing) < 2:
+            return 0
+
+        import pandas as pd
+
+        download = self.download or _yfinance().download
+        try:
+            data = self._yahoo('yahoo_download', lambda: download(
+                missing, period=period, group_by='ticker', progress=False, threads=True
+            ))
+        except Exception as e:
+            self.logger.warning(f"Bulk history download failed, falling back to per-symbol fetches: {e}")
+            return 0
+
+        if data is None or data.empty:
+            return 0
+
+        seeded = 0
+        for symbol in missing:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                hist = data[symbol]
+            else:
+                hist = data
+            hist = hist.dropna(how='all')
+            # Leave symbols the bulk call could not resolve to the per-symbol path
+            if not hist.empty:
+                self.cache.set('price', f"{symbol}:{period}", hist)
+                seeded += 1
+
+        return seeded
+
+    def get_close_panel(self, symbols: List[str], start=None, end=None, period: Optional[str] = None) -> 'pd.DataFrame':
+        """Daily closes for many symbols in one request, one column per symbol (not cached)"""
+        import pandas as pd
+
+        symbols = list(dict.fromkeys(symbols))
+        download = self.download or _yfinance().download
+        data = self._yahoo('yahoo_download', lambda: download(
+            symbols, start=start, end=end, period=period, group_by='ticker', progress=False, threads=True
+        ))
+        if data is None or data.empty:
+            return pd.DataFrame(columns=symbols)
+
+        closes = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                closes[symbol] = data[symbol]['Close']
+            elif len(symbols) == 1:
+                closes[symbol] = data['Close']
+        panel = pd.DataFrame(closes)
+        panel.index = pd.DatetimeIndex(panel.index).tz_localize(None).normalize()
+        return panel.sort_index()
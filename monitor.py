@@ -0,0 +1,308 @@
+"""
+Continuous sentiment monitoring that re-evaluates symbols every update interval
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aggregation import RunningWeightedStats
+from rollups import RollupBook
+
+
+class SymbolAggregate:
+    """Running sentiment sums over the items currently in one symbol's feeds
+
+    Each source keeps a (score, weight, timestamp) entry per item, or per near-duplicate
+    cluster, so items that drop out of the feed are removed from the sums again and
+    reweighting an item is a remove followed by an add.
+    """
+
+    def __init__(self):
+        self.entries = {'news': {}, 'social': {}}
+        self.stats = {'news': RunningWeightedStats(), 'social': RunningWeightedStats()}
+        # Score and cluster id of every item in the current feeds, so each item is scored once
+        self.items = {}
+        self.weighted_sentiment = None
+        # Sources whose feed failed in the latest cycle; their entries are kept but not scored
+        self.degraded = ()
+        # Last value reported in an event, so slow drift still produces one eventually
+        self.emitted_sentiment = None
+
+    def update_window(self, source: str, window: Dict[str, Tuple[float, float, Optional[float]]]) -> bool:
+        """Make a source's sums cover exactly the window's entries; returns whether anything changed"""
+        entries = self.entries[source]
+        stats = self.stats[source]
+        changed = False
+        for key in [key for key in entries if key not in window]:
+            score, weight, _ = entries.pop(key)
+            stats.remove(score, weight)
+            changed = True
+        for key, entry in window.items():
+            previous = entries.get(key)
+            if previous is not None:
+                if previous[:2] == entry[:2]:
+                    continue
+                stats.remove(previous[0], previous[1])
+            stats.add(entry[0], entry[1])
+            entries[key] = entry
+            changed = True
+        if not entries:
+            # Start from exact zeros instead of the rounding left by add/remove pairs
+            self.stats[source] = RunningWeightedStats()
+        return changed
+
+    def forget_items(self, keep: Iterable[str]):
+        """Drop scores of items no longer in any feed"""
+        keep = set(keep)
+        self.items = {key: value for key, value in self.items.items() if key in keep}
+
+    @property
+    def news_count(self) -> int:
+        return self.stats['news'].count
+
+    @property
+    def posts_count(self) -> int:
+        return self.stats['social'].count
+
+    @property
+    def news_sentiment(self) -> float:
+        return self.stats['news'].mean
+
+    @property
+    def social_sentiment(self) -> float:
+        return self.stats['social'].mean
+
+
+class SentimentMonitor:
+    """Re-evaluates a watchlist and sectors every interval and emits change events"""
+
+    def __init__(self, analyzer, symbols: Optional[List[str]] = None,
+                 sectors: Optional[Dict[str, List[str]]] = None,
+                 interval: Optional[float] = None, change_threshold: float = 0.05):
+        self.analyzer = analyzer
+        self.sectors = sectors if sectors is not None else analyzer.config.get('sectors', {})
+        watchlist = symbols if symbols is not None else analyzer.config.get('watchlist', [])
+        sector_symbols = [symbol for members in self.sectors.values() for symbol in members]
+        self.symbols = list(dict.fromkeys(list(watchlist) + sector_symbols))
+        self.interval = interval if interval is not None else analyzer.config.get('update_interval', 300)
+        self.change_threshold = change_threshold
+        self.max_articles = analyzer.config.get('stock_analysis', {}).get('max_news_articles', 10)
+        self.aggregates = {symbol: SymbolAggregate() for symbol in self.symbols}
+        self.sector_sentiment = {}
+        # Sector means are running sums over member contributions; a symbol update touches only its sectors
+        self.rollups = RollupBook(analyzer.weight_policies)
+        for sector, members in self.sectors.items():
+            self.rollups.set_group(sector, members, kind='sector')
+        self._changed_sectors = set()
+        self.cycles = 0
+        self.logger = logging.getLogger(__name__)
+
+    def _fetch_items(self, symbol: str, posts_prefetched: bool = False) -> Dict[str, Optional[List[Dict]]]:
+        """Current news and post feeds of a symbol as scorable items; None for a feed that failed
+
+        News is cut to max_news_articles and includes article bodies, as in get_stock_news_sentiment.
+        """
+        items = {'news': None, 'social': None}
+        try:
+            news = self.analyzer.market_data.get_news(symbol, refresh=True)
+            items['news'] = self.analyzer._news_items(symbol, news[:self.max_articles])
+        except Exception as e:
+            self.analyzer.instrumentation.increment('degraded_news')
+            self.logger.error(f"Error fetching news for {symbol}: {e}")
+
+        try:
+            posts = self.analyzer.fetch_reddit_posts(symbol, refresh=not posts_prefetched)
+            items['social'] = self.analyzer._post_items(symbol, posts)
+        except Exception as e:
+            self.analyzer.instrumentation.increment('degraded_social')
+            self.logger.error(f"Error fetching Reddit posts for {symbol}: {e}")
+
+        return items
+
+    def run_cycle(self) -> List[Dict]:
+        """Run one monitoring cycle and return the change events it produced"""
+        self.cycles += 1
+        # A few combined multireddit searches refresh posts for the whole watchlist
+        prefetched = self.analyzer.prefetch_reddit_posts(self.symbols, refresh=True)
+
+        workers = max(1, min(self.analyzer.max_workers, len(self.symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = dict(zip(self.symbols, executor.map(
+                lambda symbol: self._fetch_items(symbol, symbol in prefetched), self.symbols
+            )))
+
+        new_counts = self._score_new_items(fetched)
+
+        # Reweight every symbol's current feed with the one-shot path's policies at a single now
+        now = time.time()
+        changed = set()
+        for symbol, feeds in fetched.items():
+            aggregate = self.aggregates[symbol]
+            for source, items in feeds.items():
+                # A failed feed keeps its previous entries, so nothing is rescored once it recovers
+                if items is not None and aggregate.update_window(source, self._window(aggregate, source, items, now)):
+                    changed.add(symbol)
+            degraded = tuple(source for source, items in feeds.items() if items is None)
+            if degraded != aggregate.degraded:
+                aggregate.degraded = degraded
+                changed.add(symbol)
+            aggregate.forget_items(
+                item['id'] for items in feeds.values() if items is not None for item in items
+            )
+
+        timestamp = datetime.now().isoformat()
+        events = []
+        for symbol in self.symbols:
+            if symbol not in changed and self.aggregates[symbol].weighted_sentiment is not None:
+                continue
+            event = self._symbol_event(symbol, new_counts[symbol], timestamp)
+            if event:
+                events.append(event)
+
+        events.extend(self._sector_events(timestamp))
+        return events
+
+    def _score_new_items(self, fetched: Dict[str, Dict[str, Optional[List[Dict]]]]) -> Dict[str, Dict[str, int]]:
+        """Score every unseen item of every symbol in one batch per source; returns new item counts"""
+        new_counts = {symbol: {'news': 0, 'social': 0} for symbol in fetched}
+        pending = {'news': [], 'social': []}
+        for symbol, feeds in fetched.items():
+            aggregate = self.aggregates[symbol]
+            for source, items in feeds.items():
+                for item in items or ():
+                    if item['id'] not in aggregate.items:
+                        pending[source].append((symbol, item))
+                        new_counts[symbol][source] += 1
+
+        dedup = self.analyzer.near_duplicates
+        for source, entries in pending.items():
+            if not entries:
+                continue
+            texts = [item['text'] for _, item in entries]
+            if dedup is not None:
+                clusters = dedup.assign(texts)
+                scores = self.analyzer._cluster_scores(clusters, texts, source)
+            else:
+                clusters = [None] * len(texts)
+                scores = self.analyzer._combined_scores(texts, source)
+            for (symbol, item), score, cluster in zip(entries, scores, clusters):
+                self.aggregates[symbol].items[item['id']] = (float(score), cluster)
+        return new_counts
+
+    def _window(self, aggregate: SymbolAggregate, source: str, items: List[Dict], now: float) -> Dict:
+        """Entries of one feed keyed by item, or by near-duplicate cluster at its heaviest copy's weight"""
+        policy = self.analyzer.weight_policies[source]
+        weights = policy.weights(
+            len(items),
+            upvotes=[item['upvotes'] for item in items] if source == 'social' else None,
+            timestamps=[item['timestamp'] for item in items],
+            sources=[item['source'] for item in items],
+            now=now
+        )
+        window = {}
+        for item, weight in zip(items, weights):
+            score, cluster = aggregate.items[item['id']]
+            key = item['id'] if cluster is None else f"cluster:{source}:{cluster}"
+            previous = window.get(key)
+            if previous is None or weight > previous[1]:
+                window[key] = (score, float(weight), item['timestamp'])
+        return window
+
+    def _symbol_event(self, symbol: str, new_counts: Dict[str, int], timestamp: str) -> Optional[Dict]:
+        aggregate = self.aggregates[symbol]
+        previous = aggregate.emitted_sentiment
+        # Failed feeds are left out and their weight spread over the others, as in analyze_stock_sentiment
+        current, available = self.analyzer._available_sentiment(
+            {'sentiment': aggregate.news_sentiment, 'degraded': 'news' in aggregate.degraded},
+            {'sentiment': aggregate.social_sentiment, 'degraded': 'social' in aggregate.degraded}
+        )
+        if not available:
+            # Nothing was measured: no neutral event, and the symbol leaves its sector means
+            aggregate.weighted_sentiment = None
+            self._changed_sectors.update(self.rollups.discard(symbol))
+            return None
+
+        aggregate.weighted_sentiment = current
+        self._changed_sectors.update(self.rollups.update(symbol, current))
+
+        label = self.analyzer._get_sentiment_label(current)
+        previous_label = self.analyzer._get_sentiment_label(previous) if previous is not None else None
+        if previous is not None and label == previous_label and abs(current - previous) < self.change_threshold:
+            return None
+
+        aggregate.emitted_sentiment = current
+        return {
+            'type': 'symbol',
+            'timestamp': timestamp,
+            'symbol': symbol,
+            'weighted_sentiment': current,
+            'previous_sentiment': previous,
+            'delta': current - previous if previous is not None else None,
+            'sentiment_label': label,
+            'label_changed': previous_label is not None and label != previous_label,
+            'new_articles': new_counts['news'],
+            'new_posts': new_counts['social'],
+            'articles_count': aggregate.news_count,
+            'posts_count': aggregate.posts_count,
+            'degraded_sources': list(aggregate.degraded)
+        }
+
+    def _sector_events(self, timestamp: str) -> List[Dict]:
+        events = []
+        changed, self._changed_sectors = self._changed_sectors, set()
+        for sector in self.sectors:
+            if sector not in changed:
+                continue
+            summary = self.rollups.summary(sector)
+            if not summary['stocks_analyzed']:
+                continue
+
+            current = summary['average_sentiment']
+            previous = self.sector_sentiment.get(sector)
+            if previous is not None and abs(current - previous) < self.change_threshold:
+                continue
+
+            self.sector_sentiment[sector] = current
+
+            events.append({
+                'type': 'sector',
+                'timestamp': timestamp,
+                'sector': sector,
+                'average_sentiment': current,
+                'previous_sentiment': previous,
+                'sentiment_label': self.analyzer._get_sentiment_label(current),
+                'stocks_analyzed': summary['stocks_analyzed']
+            })
+        return events
+
+    def stream(self, max_cycles: Optional[int] = None) -> Iterator[Dict]:
+        """Yield change events cycle after cycle, one cycle per update interval"""
+        next_run = time.monotonic()
+        while max_cycles is None or self.cycles < max_cycles:
+            started = time.monotonic()
+            events = self.run_cycle()
+            elapsed = time.monotonic() - started
+
+            # Backlog is how far the schedule has slipped behind the interval
+            next_run += self.interval
+            backlog = max(0.0, time.monotonic() - next_run)
+            self.logger.info(
+                f"Cycle {self.cycles}: {elapsed:.1f}s for {len(self.symbols)} symbols, "
+                f"{len(events)} events, backlog {backlog:.1f}s"
+            )
+            if backlog > 0:
+                self.logger.warning(
+                    f"Cycle {self.cycles} overran the {self.interval}s interval by {backlog:.1f}s"
+                )
+                # Start the next cycle right away instead of queueing the missed ones
+                next_run = time.monotonic()
+
+            for event in events:
+                yield event
+
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            time.sleep(max(0.0, next_run - time.monotonic()))
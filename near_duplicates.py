@@ -0,0 +1,183 @@
+"""
+MinHash/LSH clustering of near-identical headlines and posts, kept across refresh cycles
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^a-z0-9$]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase text with punctuation and runs of whitespace collapsed to single spaces"""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+class NearDuplicateIndex:
+    """Assigns texts to clusters of near duplicates and scores each wording in a cluster once
+
+    A text joins the first cluster whose representative has an estimated Jaccard similarity of
+    at least threshold over character shingles. Candidates come from LSH bands of the MinHash
+    signature, so lookups cost a few dict probes rather than a scan of every cluster.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, shingle_size: int = 5,
+                 max_clusters: int = 50000, max_chars: int = 2000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_clusters = max_clusters
+        self.max_chars = max_chars
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing of 32-bit shingle hashes: odd 64-bit multipliers, products wrap mod 2**64
+        self._a = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64, endpoint=False)
+
+        self._exact = {}
+        self._clusters = OrderedDict()
+        self._buckets = {}
+        self._next_id = 0
+        self._counts = {'texts': 0, 'exact_hits': 0, 'near_hits': 0, 'scored': 0}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> np.ndarray:
+        normalized = normalize(text)[:self.max_chars]
+        k = self.shingle_size
+        shingles = {normalized[i:i + k] for i in range(max(len(normalized) - k + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((hashes[:, None] * self._a + self._b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def assign(self, texts: Sequence[str]) -> List[int]:
+        """Cluster id of every text, creating clusters for texts unlike any seen before"""
+        cluster_ids = []
+        with self._lock:
+            for text in texts:
+                self._counts['texts'] += 1
+                key = normalize(text)[:self.max_chars]
+                cluster_id = self._exact.get(key)
+                if cluster_id is not None and cluster_id in self._clusters:
+                    self._counts['exact_hits'] += 1
+                    self._clusters.move_to_end(cluster_id)
+                    cluster_ids.append(cluster_id)
+                    continue
+
+                signature = self.signature(text)
+                band_keys = self._band_keys(signature)
+                cluster_id = self._match(signature, band_keys)
+                if cluster_id is None:
+                    cluster_id = self._create(text, signature, band_keys)
+                else:
+                    self._counts['near_hits'] += 1
+                    self._clusters.move_to_end(cluster_id)
+                self._exact[key] = cluster_id
+                cluster_ids.append(cluster_id)
+        return cluster_ids
+
+    def _match(self, signature: np.ndarray, band_keys: List) -> Optional[int]:
+        candidates = dict.fromkeys(
+            cluster_id for band_key in band_keys for cluster_id in self._buckets.get(band_key, ())
+        )
+        for cluster_id in candidates:
+            similarity = np.count_nonzero(self._clusters[cluster_id]['signature'] == signature) / self.num_perm
+            if similarity >= self.threshold:
+                return cluster_id
+        return None
+
+    def _create(self, text: str, signature: np.ndarray, band_keys: List) -> int:
+        cluster_id = self._next_id
+        self._next_id += 1
+        self._clusters[cluster_id] = {'text': text, 'signature': signature, 'band_keys': band_keys, 'scores': {}}
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(cluster_id)
+
+        # Forget the least recently seen clusters; stale exact-text entries are ignored on lookup
+        while len(self._clusters) > self.max_clusters:
+            evicted_id, evicted = self._clusters.popitem(last=False)
+            for band_key in evicted['band_keys']:
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.remove(evicted_id)
+                    if not bucket:
+                        del self._buckets[band_key]
+        if len(self._exact) > 4 * self.max_clusters:
+            self._exact = {key: cid for key, cid in self._exact.items() if cid in self._clusters}
+        return cluster_id
+
+    def scores(self, cluster_ids: Sequence[int], texts: Sequence[str],
+               score: Callable[[List[str]], Sequence[float]], engine: str = 'combined') -> np.ndarray:
+        """Score of each text, scoring every wording not yet scored in its cluster in one batch
+
+        texts are the texts passed to assign. Copies that normalize to the same text share a score;
+        a copy worded differently is scored itself, since one changed word ('beats' for 'misses')
+        can flip the sentiment of an otherwise near-identical headline. Scores are kept per engine,
+        so sources scored by different engines do not share them.
+        """
+        keys = [(cluster_id, normalize(text)[:self.max_chars]) for cluster_id, text in zip(cluster_ids, texts)]
+        known, missing = {}, {}
+        with self._lock:
+            for key, text in zip(keys, texts):
+                cluster = self._clusters.get(key[0])
+                value = cluster['scores'].get((engine, key[1])) if cluster is not None else None
+                if value is not None:
+                    known[key] = value
+                elif key not in missing:
+                    missing[key] = text
+
+        if missing:
+            values = [float(value) for value in score(list(missing.values()))]
+            known.update(zip(missing, values))
+            with self._lock:
+                for (cluster_id, wording), value in zip(missing, values):
+                    if cluster_id in self._clusters:
+                        self._clusters[cluster_id]['scores'][(engine, wording)] = value
+                self._counts['scored'] += len(missing)
+
+        return np.array([known[key] for key in keys], dtype=float)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, 'clusters': len(self._clusters), 'buckets': len(self._buckets)}
+
+    def clear(self):
+        with self._lock:
+            self._exact.clear()
+            self._clusters.clear()
+            self._buckets.clear()
+
+
+def collapse_clusters(scores: Sequence[float], weights: Sequence[float], cluster_ids: Sequence[int]):
+    """One (score, weight) per cluster: its heaviest copy's (the first on ties); returns scores, weights"""
+    scores = np.asarray(scores, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    cluster_ids = np.asarray(cluster_ids)
+    # Sort by cluster, heaviest first, keeping input order among equal weights
+    order = np.lexsort((np.arange(len(weights)), -weights, cluster_ids))
+    heaviest = order[np.unique(cluster_ids[order], return_index=True)[1]]
+    return scores[heaviest], weights[heaviest]
+
+
+def build_near_duplicate_index(dedup_config: Dict) -> Optional[NearDuplicateIndex]:
+    """Create the index described by the near_duplicates config block, or None if disabled"""
+    if not dedup_config.get('enabled', True):
+        return None
+
+    return NearDuplicateIndex(
+        threshold=dedup_config.get('threshold', 0.8),
+        num_perm=dedup_config.get('num_perm', 64),
+        bands=dedup_config.get('bands', 16),
+        shingle_size=dedup_config.get('shingle_size', 5),
+        max_clusters=dedup_config.get('max_clusters', 50000)
+    )
@@ -0,0 +1,324 @@
+"""
+Provider access layer: adaptive rate limits, retries with backoff and a circuit breaker per provider
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from rate_limiter import TokenBucket, build_provider_limiters
+
+_RATE_LIMIT_NAMES = ('ratelimit', 'toomanyrequests')
+_TRANSIENT_NAMES = ('timeout', 'connectionerror', 'servererror', 'serviceunavailable', 'requestexception')
+_RATE_LIMIT_TEXT = re.compile(r"\b429\b|too many requests|rate limit", re.IGNORECASE)
+
+
+class ProviderUnavailable(Exception):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status carried by an exception or its response, if any"""
+    for source in (error, getattr(error, 'response', None)):
+        code = getattr(source, 'status_code', None) or getattr(source, 'status', None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an error is the provider throttling us (HTTP 429 or a library's rate-limit error)"""
+    if status_code(error) == 429:
+        return True
+    name = type(error).__name__.lower()
+    return any(marker in name for marker in _RATE_LIMIT_NAMES) or bool(_RATE_LIMIT_TEXT.search(str(error)))
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether retrying could help: throttling, timeouts, dropped connections and 5xx responses"""
+    if is_rate_limited(error) or isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code >= 500
+    name = type(error).__name__.lower()
+    return any(marker in name for marker in _TRANSIENT_NAMES)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait, from a retry_after attribute or Retry-After header"""
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random = random) -> float:
+    """Exponential backoff with full jitter: uniform over [0, min(cap, base * 2**attempt)]"""
+    return rng.uniform(0.0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRate:
+    """Slows a token bucket below its configured rate while the provider struggles
+
+    Responses slower than target_latency cut the rate and 429s cut it harder (and pause the
+    bucket), down to min_rate. Fast successes then raise it by a fixed step, never above
+    max_rate, the configured rate.
+    """
+
+    def __init__(self, bucket: TokenBucket, min_rate: float, max_rate: float, target_latency: float = 2.0,
+                 increase: float = 0.1, slow_decrease: float = 0.8, throttle_decrease: float = 0.5):
+        self.bucket = bucket
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.target_latency = target_latency
+        # The step is a fraction of the range, so recovery takes a similar number of calls for any provider
+        self.step = increase * (self.max_rate - self.min_rate)
+        self.slow_decrease = slow_decrease
+        self.throttle_decrease = throttle_decrease
+        self.rate = max_rate
+        self._lock = threading.Lock()
+        bucket.set_rate(self.rate)
+
+    def _set(self, rate: float):
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.bucket.set_rate(self.rate)
+
+    def on_success(self, latency: float):
+        with self._lock:
+            if latency > self.target_latency:
+                self._set(self.rate * self.slow_decrease)
+            elif self.rate < self.max_rate:
+                self._set(self.rate + self.step)
+
+    def on_throttled(self, pause: Optional[float] = None):
+        with self._lock:
+            self._set(self.rate * self.throttle_decrease)
+        # Without a Retry-After hint, wait out at least one interval at the reduced rate
+        self.bucket.pause(pause if pause is not None else 1.0 / self.rate)
+
+
+class CircuitBreaker:
+    """Closed until failure_threshold consecutive failures, then open for recovery_seconds
+
+    After that one probe call is let through (half open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.clock() - self._opened_at >= self.recovery_seconds:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state == 'closed':
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_seconds - self.clock())
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """End a call that says nothing about provider health, leaving state and failures as they were"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.opened += 1
+                self.state = 'open'
+                self._opened_at = self.clock()
+            self._probing = False
+
+
+class ProviderAccess:
+    """Every request to one provider: paced, retried on transient errors and guarded by a breaker"""
+
+    def __init__(self, provider: str, bucket: TokenBucket, rate: Optional[AdaptiveRate] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.provider = provider
+        self.bucket = bucket
+        self.rate = rate
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        self._counts = {'calls': 0, 'successes': 0, 'failures': 0, 'rate_limited': 0, 'retries': 0, 'rejected': 0}
+        self._latency = None
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def throttle(self):
+        """Wait for a request slot without the retry and breaker handling"""
+        self.bucket.acquire()
+
+    def call(self, request: Callable[[], Any]) -> Any:
+        """Run request against the provider, retrying transient failures with jittered backoff
+
+        Raises ProviderUnavailable while the breaker is open, and the last error once
+        retries are exhausted; errors that retrying cannot fix propagate at once.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count('rejected')
+                raise ProviderUnavailable(self.provider, self.breaker.retry_in())
+
+            self.bucket.acquire()
+            self._count('calls')
+            start = self.clock()
+            try:
+                result = request()
+            except Exception as e:
+                if not is_transient(e):
+                    # The request itself was bad, which says nothing about the provider's health
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                self._count('failures')
+                wait = backoff_delay(attempt, self.backoff_base, self.backoff_max, self.rng)
+                if is_rate_limited(e):
+                    self._count('rate_limited')
+                    hint = retry_after(e)
+                    if self.rate is not None:
+                        self.rate.on_throttled(hint)
+                    elif hint:
+                        # An unlimited provider still honours Retry-After for every caller
+                        self.bucket.pause(hint)
+                    wait = max(wait, hint or 0.0)
+                if attempt == self.max_retries:
+                    raise
+                self._count('retries')
+                self.logger.warning(f"{self.provider} request failed ({e}); retry {attempt + 1} in {wait:.2f}s")
+                self.sleep(wait)
+                continue
+
+            latency = self.clock() - start
+            self.breaker.record_success()
+            if self.rate is not None:
+                self.rate.on_success(latency)
+            with self._lock:
+                self._counts['successes'] += 1
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counts)
+            stats['latency_ewma_ms'] = (self._latency or 0.0) * 1000
+        stats.update(
+            state=self.breaker.state,
+            circuit_open=int(self.breaker.state != 'closed'),
+            circuit_opened=self.breaker.opened,
+            rate_per_second=self.bucket.rate or 0.0
+        )
+        return stats
+
+
+class ProviderRegistry:
+    """The ProviderAccess of every configured provider, looked up by name"""
+
+    def __init__(self, providers: Dict[str, ProviderAccess]):
+        self.providers = providers
+
+    def __getitem__(self, provider: str) -> ProviderAccess:
+        return self.providers[provider]
+
+    def call(self, provider: str, request: Callable[[], Any]) -> Any:
+        """Run request through the named provider's access; unknown providers are called directly"""
+        access = self.providers.get(provider)
+        return access.call(request) if access is not None else request()
+
+    def throttle(self, provider: str):
+        access = self.providers.get(provider)
+        if access is not None:
+            access.throttle()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: access.stats() for name, access in self.providers.items()}
+
+
+def build_provider_access(analysis_config: Dict, access_config: Dict,
+                          providers=('yahoo', 'reddit', 'articles')) -> ProviderRegistry:
+    """Create per-provider access from the stock_analysis rate limits and the provider_access block
+
+    With provider_access disabled, requests are only paced by the fixed token buckets.
+    """
+    buckets = build_provider_limiters(analysis_config, providers)
+    enabled = access_config.get('enabled', True)
+    access_overrides = access_config.get('providers', {})
+
+    registry = {}
+    for provider, bucket in buckets.items():
+        if not enabled:
+            registry[provider] = ProviderAccess(provider, bucket, max_retries=0,
+                                                breaker=CircuitBreaker(failure_threshold=2 ** 31))
+            continue
+
+        settings = {**access_config, **access_overrides.get(provider, {})}
+        # The configured rate is a ceiling: the rate only drops below it, down to max_rate_limit_delay,
+        # and recovers back to it. An unlimited provider (rate_limit_delay 0) stays unlimited.
+        rate = None
+        if bucket.rate:
+            max_delay = settings.get('max_rate_limit_delay', max(20.0 / bucket.rate, 1.0))
+            rate = AdaptiveRate(
+                bucket,
+                min_rate=1.0 / max_delay if max_delay > 0 else bucket.rate,
+                max_rate=bucket.rate,
+                target_latency=settings.get('target_latency_ms', 2000) / 1000
+            )
+        registry[provider] = ProviderAccess(
+            provider, bucket, rate,
+            CircuitBreaker(settings.get('failure_threshold', 5), settings.get('recovery_seconds', 60)),
+            max_retries=settings.get('max_retries', 3),
+            backoff_base=settings.get('backoff_base', 0.5),
+            backoff_max=settings.get('backoff_max', 20.0)
+        )
+    return ProviderRegistry(registry)
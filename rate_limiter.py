@@ -0,0 +1,89 @@
+"""
+Token-bucket rate limiting for data provider requests
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket that paces requests to a single provider"""
+
+    def __init__(self, rate: Optional[float], capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        # rate is tokens per second; None or <= 0 disables limiting
+        self.rate = rate if rate and rate > 0 else None
+        self.capacity = max(float(capacity), 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._last_refill = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_delay(cls, delay: float, burst: float = 1.0) -> 'TokenBucket':
+        """Build a bucket from a minimum spacing between requests in seconds"""
+        rate = 1.0 / delay if delay and delay > 0 else None
+        return cls(rate, burst)
+
+    def _refill(self):
+        now = self.clock()
+        # No tokens accrue while paused
+        elapsed = max(0.0, now - max(self._last_refill, self._paused_until))
+        self._last_refill = now
+        if self.rate is not None:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate: Optional[float]):
+        """Change the refill rate; tokens earned at the old rate are kept"""
+        with self._lock:
+            self._refill()
+            self.rate = rate if rate and rate > 0 else None
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the next seconds (e.g. a provider's Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available; returns False if timeout expires first"""
+        deadline = None if timeout is None else self.clock() + timeout
+        while True:
+            with self._lock:
+                paused = self._paused_until - self.clock()
+                if paused <= 0:
+                    if self.rate is None:
+                        return True
+                    self._refill()
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait = (tokens - self._tokens) / self.rate
+                else:
+                    wait = paused
+
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self.sleep(wait)
+
+
+def build_provider_limiters(analysis_config: Dict, providers=('yahoo', 'reddit', 'articles')) -> Dict[str, TokenBucket]:
+    """Create one token bucket per provider from the stock_analysis config block"""
+    default_delay = analysis_config.get('rate_limit_delay', 1.0)
+    default_burst = analysis_config.get('rate_limit_burst', 1)
+    overrides = analysis_config.get('provider_rate_limits', {})
+
+    limiters = {}
+    for provider in providers:
+        settings = overrides.get(provider, {})
+        limiters[provider] = TokenBucket.from_delay(
+            settings.get('rate_limit_delay', default_delay),
+            settings.get('rate_limit_burst', default_burst)
+        )
+    return limiters
@@ -0,0 +1,189 @@
+"""
+Reddit post fetch stage shared by the social sentiment and monitoring paths
+"""
+
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Set
+
+DEFAULT_SUBREDDITS = ['stocks', 'investing', 'SecurityAnalysis', 'ValueInvesting', 'StockMarket']
+
+
+def symbol_pattern(symbol: str) -> re.Pattern:
+    """Match a ticker as a standalone uppercase token, or as a cashtag in any case ($AAPL, $aapl)"""
+    escaped = re.escape(symbol)
+    return re.compile(rf"(?<![A-Za-z0-9])(?:\$(?i:{escaped})|{escaped})(?![A-Za-z0-9])")
+
+
+class RedditFetcher:
+    """Searches subreddits over one shared PRAW session, concurrently and in combined queries"""
+
+    def __init__(self, reddit, cache, request: Callable[[str, Callable[[], Any]], Any],
+                 subreddits: Optional[List[str]] = None, max_parallel_searches: int = 5,
+                 max_query_length: int = 400, sort: str = 'relevance', instrumentation=None,
+                 client_factory: Optional[Callable[[], object]] = None):
+        self._reddit = reddit
+        # Building a PRAW client imports praw, so it is deferred until the first search
+        self._client_factory = client_factory if reddit is None else None
+        self._client_lock = threading.Lock()
+        self.cache = cache
+        # request(provider, call) runs call through the provider's rate limit, retries and breaker
+        self.request = request
+        self.subreddits = subreddits or DEFAULT_SUBREDDITS
+        self.max_query_length = max_query_length
+        # Per-subreddit and combined searches list posts in the same order, so both pick the same posts
+        self.sort = sort
+        self.instrumentation = instrumentation
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel_searches, thread_name_prefix="reddit")
+
+    @property
+    def reddit(self):
+        """The shared PRAW client, created on first access; None without credentials"""
+        if self._client_factory is not None:
+            with self._client_lock:
+                if self._client_factory is not None:
+                    self._reddit = self._client_factory()
+                    self._client_factory = None
+        return self._reddit
+
+    @reddit.setter
+    def reddit(self, client):
+        with self._client_lock:
+            self._reddit = client
+            self._client_factory = None
+
+    def _timer(self, stage: str, symbol: Optional[str] = None):
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.timer(stage, symbol)
+
+    @staticmethod
+    def _post_record(post) -> Optional[Dict]:
+        if not post.selftext or len(post.selftext) <= 20:  # Filter out very short posts
+            return None
+        return {
+            'id': post.id,
+            'subreddit': str(post.subreddit),
+            'title': post.title,
+            'text': post.selftext[:500],  # Limit text length
+            'score': post.score,
+            'created': post.created_utc
+        }
+
+    def _search(self, subreddit_name: str, query: str, limit: int, symbol: Optional[str] = None) -> List[Dict]:
+        subreddit = self.reddit.subreddit(subreddit_name)
+
+        def search():
+            with self._timer('reddit_search', symbol):
+                # PRAW listings are lazy, so the request happens while iterating
+                return list(subreddit.search(query, limit=limit, sort=self.sort, time_filter='week'))
+
+        posts = self.request('reddit', search)
+        return [record for record in map(self._post_record, posts) if record]
+
+    def search_subreddit(self, subreddit_name: str, symbol: str, limit: int, refresh: bool = False) -> List[Dict]:
+        """Search one subreddit for posts about a symbol (cached)"""
+        return self.cache.get_or_fetch(
+            'reddit', f"{subreddit_name}:{symbol}:{limit}",
+            lambda: self._search(subreddit_name, f"{symbol} OR ${symbol}", limit, symbol),
+            refresh=refresh
+        )
+
+    def fetch_posts(self, symbol: str, limit: int = 25, refresh: bool = False) -> List[Dict]:
+        """Collect recent posts about a symbol from the tracked subreddits"""
+        if not self.reddit:
+            return []
+
+        # Posts demultiplexed from a combined portfolio query, when one ran recently and found any
+        if not refresh:
+            combined = self.cache.get('reddit', f"combined:{symbol}:{limit}")
+            if combined:
+                return combined
+
+        per_subreddit = max(1, limit // len(self.subreddits))
+        futures = {
+            name: self._executor.submit(self.search_subreddit, name, symbol, per_subreddit, refresh)
+            for name in self.subreddits
+        }
+
+        all_posts, errors = [], []
+        for name, future in futures.items():
+            try:
+                all_posts.extend(future.result())
+            except Exception as e:
+                self.logger.warning(f"Error accessing subreddit {name}: {e}")
+                errors.append(e)
+        # No subreddit answered: an outage, not a symbol nobody is talking about
+        if errors and len(errors) == len(futures):
+            raise errors[-1]
+        return all_posts
+
+    def _query_batches(self, symbols: List[str]) -> List[List[str]]:
+        """Group symbols into OR queries that stay under Reddit's query length limit"""
+        batches, current, length = [], [], 0
+        for symbol in symbols:
+            term_length = len(f"{symbol} OR ${symbol} OR ")
+            if current and length + term_length > self.max_query_length:
+                batches.append(current)
+                current, length = [], 0
+            current.append(symbol)
+            length += term_length
+        if current:
+            batches.append(current)
+        return batches
+
+    def prefetch(self, symbols: List[str], limit: int = 25, refresh: bool = False) -> Set[str]:
+        """Search many symbols with a few multireddit queries and cache the posts per symbol"""
+        if not self.reddit:
+            return set()
+
+        pending = [
+            symbol for symbol in dict.fromkeys(symbols)
+            if refresh or not self.cache.contains('reddit', f"combined:{symbol}:{limit}")
+        ]
+        if len(pending) < 2:
+            return set()
+
+        multireddit = "+".join(self.subreddits)
+        batches = self._query_batches(pending)
+
+        def search_batch(batch):
+            query = " OR ".join(f"{symbol} OR ${symbol}" for symbol in batch)
+            # Listings cap at 1000 posts, which bounds how far one query can fan out
+            return self._search(multireddit, query, min(limit * len(batch), 1000))
+
+        futures = [self._executor.submit(search_batch, batch) for batch in batches]
+
+        seeded = set()
+        for batch, future in zip(batches, futures):
+            try:
+                posts = future.result()
+            except Exception as e:
+                self.logger.warning(f"Combined Reddit search failed for {len(batch)} symbols: {e}")
+                continue
+
+            # Demultiplex each post to every ticker it mentions
+            patterns = {symbol: symbol_pattern(symbol) for symbol in batch}
+            by_symbol = {symbol: [] for symbol in batch}
+            for post in posts:
+                text = f"{post['title']} {post['text']}"
+                for symbol, pattern in patterns.items():
+                    if len(by_symbol[symbol]) < limit and pattern.search(text):
+                        by_symbol[symbol].append(post)
+
+            for symbol, symbol_posts in by_symbol.items():
+                self.cache.set('reddit', f"combined:{symbol}:{limit}", symbol_posts)
+                # Busy tickers can crowd quieter ones out of a capped listing, so an
+                # empty demux does not count as covered and fetch_posts searches each subreddit instead
+                if symbol_posts:
+                    seeded.add(symbol)
+
+        self.logger.info(f"Fetched Reddit posts for {len(seeded)} symbols with {len(batches)} combined queries")
+        return seeded
+
+    def close(self):
+        self._executor.shutdown(wait=False)
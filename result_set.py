@@ -0,0 +1,242 @@
+"""
+Flat typed result records and a columnar result set backed by NumPy arrays
+"""
+
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Flattened column name, type name and path into an analyze_stock_sentiment result
+COLUMNS = (
+    ('timestamp', 'timestamp', ('timestamp',)),
+    ('weighted_sentiment', 'float64', ('weighted_sentiment',)),
+    ('sentiment_label', 'string', ('sentiment_label',)),
+    ('recommendation', 'string', ('recommendation',)),
+    ('news_sentiment', 'float64', ('news_sentiment', 'sentiment')),
+    ('news_confidence', 'float64', ('news_sentiment', 'confidence')),
+    ('news_articles_count', 'int32', ('news_sentiment', 'articles_count')),
+    ('news_sentiment_std', 'float64', ('news_sentiment', 'sentiment_std')),
+    ('news_effective_sample_size', 'float64', ('news_sentiment', 'effective_sample_size')),
+    ('news_sentiment_label', 'string', ('news_sentiment', 'sentiment_label')),
+    ('social_sentiment', 'float64', ('social_sentiment', 'sentiment')),
+    ('social_confidence', 'float64', ('social_sentiment', 'confidence')),
+    ('social_posts_count', 'int32', ('social_sentiment', 'posts_count')),
+    ('social_sentiment_std', 'float64', ('social_sentiment', 'sentiment_std')),
+    ('social_effective_sample_size', 'float64', ('social_sentiment', 'effective_sample_size')),
+    ('social_sentiment_label', 'string', ('social_sentiment', 'sentiment_label')),
+    ('current_price', 'float64', ('stock_context', 'current_price')),
+    ('price_change_pct', 'float64', ('stock_context', 'price_change_pct')),
+    ('volume', 'int64', ('stock_context', 'volume')),
+    ('market_cap', 'float64', ('stock_context', 'market_cap')),
+    ('pe_ratio', 'float64', ('stock_context', 'pe_ratio')),
+    ('company_name', 'string', ('stock_context', 'company_name')),
+    ('context_error', 'string', ('stock_context', 'error')),
+    ('degraded_sources', 'string', ('degraded_sources',)),
+)
+
+COLUMN_TYPES = {'symbol': 'string', **{name: type_name for name, type_name, _ in COLUMNS}}
+
+
+def _typed(value, type_name: str):
+    """Coerce a result value to its column type; placeholders such as 'N/A' become None"""
+    if value is None:
+        return None
+    if type_name == 'string':
+        # Lists such as degraded_sources are stored comma-separated; an empty one is missing
+        if isinstance(value, (list, tuple)):
+            return ",".join(map(str, value)) or None
+        return str(value)
+    if type_name == 'timestamp':
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number != number:
+        return None
+    return int(number) if type_name.startswith('int') else number
+
+
+def flatten_result(result: Dict) -> Dict:
+    """One typed row from an analyze_stock_sentiment result"""
+    row = {'symbol': result['symbol']}
+    for name, type_name, path in COLUMNS:
+        value = result
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row[name] = _typed(value, type_name)
+    return row
+
+
+class SentimentRecord:
+    """One analysis result as typed flat fields, None where a value is missing"""
+
+    __slots__ = tuple(COLUMN_TYPES)
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_result(cls, result: Dict) -> 'SentimentRecord':
+        return cls(**flatten_result(result))
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"SentimentRecord(symbol={self.symbol!r}, weighted_sentiment={self.weighted_sentiment!r})"
+
+
+def arrow_type(pa, type_name: str):
+    """Arrow type for a column type name"""
+    if type_name == 'timestamp':
+        return pa.timestamp('us')
+    return getattr(pa, type_name)()
+
+
+def _column_array(values: List, type_name: str):
+    """NumPy storage for one column and its missing-value mask (None when nulls are stored in-band)"""
+    if type_name == 'float64':
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64), None
+    if type_name.startswith('int'):
+        mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        data = np.fromiter((0 if value is None else value for value in values), dtype=type_name, count=len(values))
+        return data, mask
+    if type_name == 'timestamp':
+        return np.array([np.datetime64('NaT') if value is None else value for value in values],
+                        dtype='datetime64[us]'), None
+    data = np.empty(len(values), dtype=object)
+    data[:] = values
+    return data, None
+
+
+class ResultSet:
+    """Analysis results stored column by column
+
+    Floats use NaN, timestamps NaT and strings None for missing values; integer columns keep
+    a separate boolean mask. Conversions hand these arrays over whole instead of per row.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], masks: Optional[Dict[str, np.ndarray]] = None,
+                 types: Optional[Dict[str, str]] = None):
+        self.columns = columns
+        self.masks = masks or {}
+        self.types = types or {name: COLUMN_TYPES.get(name, 'string') for name in columns}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Optional[Dict]], extra: Optional[Dict[str, Sequence]] = None) -> 'ResultSet':
+        """Build from analyze_stock_sentiment results; None entries are skipped
+
+        extra adds string columns such as a sector name, one value per non-None result.
+        """
+        return cls.from_rows([flatten_result(result) for result in results if result is not None], extra)
+
+    @classmethod
+    def from_records(cls, records: Iterable[SentimentRecord]) -> 'ResultSet':
+        return cls.from_rows([record.to_dict() for record in records])
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], extra: Optional[Dict[str, Sequence]] = None) -> 'ResultSet':
+        columns, masks, types = {}, {}, {}
+        for name, type_name in list(COLUMN_TYPES.items()) + [(name, 'string') for name in (extra or {})]:
+            values = list(extra[name]) if extra and name in extra else [row.get(name) for row in rows]
+            columns[name], mask = _column_array(values, type_name)
+            types[name] = type_name
+            if mask is not None:
+                masks[name] = mask
+        return cls(columns, masks, types)
+
+    def __len__(self) -> int:
+        return len(self.columns['symbol'])
+
+    def __getitem__(self, index: int) -> SentimentRecord:
+        return SentimentRecord(**{name: self._value(name, index) for name in COLUMN_TYPES})
+
+    def __iter__(self) -> Iterator[SentimentRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def _value(self, name: str, index: int):
+        mask = self.masks.get(name)
+        if mask is not None and mask[index]:
+            return None
+        value = self.columns[name][index]
+        if isinstance(value, np.datetime64):
+            return None if np.isnat(value) else value.astype(datetime)
+        if isinstance(value, np.floating):
+            return None if np.isnan(value) else float(value)
+        return value.item() if isinstance(value, np.generic) else value
+
+    def column(self, name: str) -> np.ndarray:
+        """A column's array; integer columns with missing values come back as a masked array"""
+        mask = self.masks.get(name)
+        if mask is not None and mask.any():
+            return np.ma.MaskedArray(self.columns[name], mask=mask)
+        return self.columns[name]
+
+    def take(self, indices) -> 'ResultSet':
+        """Rows at the given positions (or boolean mask), in that order"""
+        return ResultSet(
+            {name: values[indices] for name, values in self.columns.items()},
+            {name: mask[indices] for name, mask in self.masks.items()},
+            dict(self.types)
+        )
+
+    def sort_by(self, name: str, descending: bool = False) -> 'ResultSet':
+        order = np.argsort(self.columns[name], kind='stable')
+        return self.take(order[::-1] if descending else order)
+
+    def to_dataframe(self) -> 'pd.DataFrame':
+        """DataFrame over the same arrays; integer columns become nullable Int dtypes"""
+        import pandas as pd
+
+        data = {}
+        for name, values in self.columns.items():
+            mask = self.masks.get(name)
+            data[name] = pd.arrays.IntegerArray(values, mask) if mask is not None else values
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """Arrow table with typed, nullable columns"""
+        import pyarrow as pa
+
+        arrays = []
+        for name, values in self.columns.items():
+            type_name = self.types[name]
+            if type_name == 'string':
+                arrays.append(pa.array(values, type=pa.string()))
+            else:
+                arrays.append(pa.array(values, type=arrow_type(pa, type_name), mask=self.masks.get(name),
+                                       from_pandas=True))
+        return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+    def to_lists(self) -> Dict[str, List]:
+        """Each column as a plain list with None for missing values"""
+        lists = {}
+        for name, values in self.columns.items():
+            type_name = self.types[name]
+            if type_name == 'timestamp':
+                items = [None if np.isnat(value) else value.astype(datetime).isoformat() for value in values]
+            elif type_name == 'float64':
+                items = np.where(np.isnan(values), None, values).tolist()
+            else:
+                items = values.tolist()
+            mask = self.masks.get(name)
+            if mask is not None and mask.any():
+                items = [None if missing else item for item, missing in zip(items, mask.tolist())]
+            lists[name] = items
+        return lists
+
+    def to_json(self, orient: str = 'records') -> str:
+        """JSON as a list of row objects ('records') or one list per column ('columns')"""
+        lists = self.to_lists()
+        if orient == 'columns':
+            return json.dumps(lists)
+        names = list(lists)
+        return json.dumps([dict(zip(names, row)) for row in zip(*lists.values())])
@@ -0,0 +1,160 @@
+"""
+Incrementally updated sector and portfolio sentiment roll-ups
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aggregation import RunningWeightedStats, WeightPolicy
+
+# Same cut-offs the dashboard uses for its bullish and bearish counts
+BULLISH_THRESHOLD = 0.1
+BEARISH_THRESHOLD = -0.1
+
+
+def _direction(value: float) -> int:
+    if value > BULLISH_THRESHOLD:
+        return 1
+    if value < BEARISH_THRESHOLD:
+        return -1
+    return 0
+
+
+class GroupAggregate:
+    """Running weighted stats over a group's members, updated one member at a time"""
+
+    # Re-sum from contributions after this many updates so floating point drift cannot accumulate
+    REBUILD_EVERY = 10000
+
+    def __init__(self, members: Iterable[str] = (), policy: Optional[WeightPolicy] = None):
+        self.members = set(members)
+        self.policy = policy or WeightPolicy()
+        self.stats = RunningWeightedStats()
+        self.contributions = {}
+        self.direction_counts = {1: 0, 0: 0, -1: 0}
+        self._updates = 0
+
+    def update(self, symbol: str, value: float, weight: float = 1.0) -> bool:
+        """Replace a member's contribution in O(1); returns False for non-members"""
+        if symbol not in self.members:
+            return False
+        self._withdraw(symbol)
+        self.contributions[symbol] = (value, weight)
+        self.stats.add(value, weight)
+        self.direction_counts[_direction(value)] += 1
+
+        self._updates += 1
+        if self._updates >= self.REBUILD_EVERY:
+            self.rebuild()
+        return True
+
+    def discard(self, symbol: str) -> bool:
+        """Drop a member's contribution, keeping it in the group"""
+        return self._withdraw(symbol)
+
+    def _withdraw(self, symbol: str) -> bool:
+        previous = self.contributions.pop(symbol, None)
+        if previous is None:
+            return False
+        value, weight = previous
+        self.stats.remove(value, weight)
+        self.direction_counts[_direction(value)] -= 1
+        return True
+
+    def rebuild(self):
+        self.stats = RunningWeightedStats()
+        for value, weight in self.contributions.values():
+            self.stats.add(value, weight)
+        self._updates = 0
+
+    def summary(self) -> Dict:
+        stats = self.stats.stats()
+        return {
+            'average_sentiment': stats.mean,
+            'stocks_analyzed': stats.count,
+            'sentiment_std': stats.std,
+            'effective_sample_size': stats.effective_sample_size,
+            'confidence': self.policy.confidence(stats),
+            'bullish_stocks': self.direction_counts[1],
+            'bearish_stocks': self.direction_counts[-1],
+            'neutral_stocks': self.direction_counts[0]
+        }
+
+
+class RollupBook:
+    """Named sector and portfolio aggregates plus a reverse index from symbols to groups"""
+
+    def __init__(self, policies: Optional[Dict[str, WeightPolicy]] = None):
+        self.policies = policies or {}
+        self.groups = {}
+        self.kinds = {}
+        self.latest = {}
+        self._groups_of = {}
+        self._lock = threading.Lock()
+
+    def set_group(self, name: str, members: Iterable[str], kind: str = 'sector'):
+        """Define or redefine a group; members with a known sentiment contribute immediately"""
+        members = list(dict.fromkeys(members))
+        with self._lock:
+            current = self.groups.get(name)
+            if current is not None and current.members == set(members) and self.kinds[name] == kind:
+                return
+            self._drop_group(name)
+
+            group = GroupAggregate(members, self.policies.get(kind))
+            for symbol in members:
+                self._groups_of.setdefault(symbol, set()).add(name)
+                if symbol in self.latest:
+                    group.update(symbol, *self.latest[symbol])
+            self.groups[name] = group
+            self.kinds[name] = kind
+
+    def remove_group(self, name: str):
+        with self._lock:
+            self._drop_group(name)
+
+    def _drop_group(self, name: str):
+        group = self.groups.pop(name, None)
+        self.kinds.pop(name, None)
+        if group is None:
+            return
+        for symbol in group.members:
+            names = self._groups_of.get(symbol)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._groups_of[symbol]
+
+    def update(self, symbol: str, value: float, weight: float = 1.0) -> List[str]:
+        """Record a symbol's new sentiment; returns the groups that changed"""
+        with self._lock:
+            self.latest[symbol] = (value, weight)
+            names = list(self._groups_of.get(symbol, ()))
+            for name in names:
+                self.groups[name].update(symbol, value, weight)
+            return names
+
+    def discard(self, symbol: str) -> List[str]:
+        """Forget a symbol's sentiment (e.g. after a failed analysis); returns the groups that changed"""
+        with self._lock:
+            self.latest.pop(symbol, None)
+            names = [name for name in self._groups_of.get(symbol, ()) if self.groups[name].discard(symbol)]
+            return names
+
+    def summary(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            group = self.groups.get(name)
+            return group.summary() if group is not None else None
+
+    def summaries(self, kind: Optional[str] = None) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: group.summary() for name, group in self.groups.items()
+                if kind is None or self.kinds[name] == kind
+            }
+
+    def contributions(self, name: str) -> Dict[str, Tuple[float, float]]:
+        """Each member's current (sentiment, weight) in a group"""
+        with self._lock:
+            group = self.groups.get(name)
+            return dict(group.contributions) if group is not None else {}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Lightweight text-only sentiment scoring
+Scores a file of headlines (one per line) without loading market data or Reddit providers
+"""
+
+import argparse
+import json
+import os
+import sys
+from itertools import islice
+from typing import Iterator, List, Optional, TextIO
+
+import numpy as np
+
+from batch_scorer import SCORE_COLUMNS, BatchScorer
+from cache import build_score_memo
+from scorers import ENGINES, build_engine, engine_names
+
+
+def iter_chunks(lines: TextIO, size: int) -> Iterator[List[str]]:
+    """Non-empty stripped lines in chunks of at most size"""
+    texts = (line.strip() for line in lines)
+    texts = (text for text in texts if text)
+    while True:
+        chunk = list(islice(texts, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def build_scorer(config_path: Optional[str], use_memo: bool = True, engine: Optional[str] = None) -> BatchScorer:
+    """Batch scorer sharing the analyzer's score memo and engine settings, without constructing the analyzer
+
+    engine defaults to the one configured for the 'text' source.
+    """
+    config = {}
+    if config_path and os.path.exists(config_path):
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    memo = None
+    if use_memo and config:
+        memo = build_score_memo(config.get('score_memo', {}), os.path.dirname(os.path.abspath(config_path)))
+    scoring_config = config.get('scoring', {})
+    engine = engine or engine_names(scoring_config)['text']
+    return BatchScorer(memo=memo, engine=build_engine(engine, scoring_config))
+
+
+def score_stream(lines: TextIO, out: TextIO, scorer: BatchScorer, as_json: bool = False,
+                 chunk_size: int = 2000) -> int:
+    """Score lines chunk by chunk and write one result per line; returns the number scored"""
+    scored = 0
+    for chunk in iter_chunks(lines, chunk_size):
+        scores = scorer.score(chunk)
+        combined = scores['combined_score']
+        labels = scores['sentiment_label']
+        if as_json:
+            columns = {column: np.where(np.isnan(scores[column]), None, scores[column]).tolist()
+                       for column in SCORE_COLUMNS}
+            for i, text in enumerate(chunk):
+                record = {'text': text, **{column: values[i] for column, values in columns.items()}}
+                record['sentiment_label'] = labels[i]
+                out.write(json.dumps(record) + "\n")
+        else:
+            for text, score, label in zip(chunk, combined.tolist(), labels):
+                out.write(f"{score:.4f}\t{label}\t{text}\n")
+        scored += len(chunk)
+    return scored
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score headlines or posts, one per line")
+    parser.add_argument('file', nargs='?', default='-', help="text file to score ('-' reads stdin)")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+    parser.add_argument('--json', action='store_true', help="write JSON lines with every score field")
+    parser.add_argument('--no-memo', dest='memo', action='store_false', help="do not use the score memo")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--engine', choices=list(ENGINES), help="scoring engine (default: scoring.sources.text)")
+    args = parser.parse_args(argv)
+
+    scorer = build_scorer(args.config, args.memo, args.engine)
+    if args.file == '-':
+        score_stream(sys.stdin, sys.stdout, scorer, args.json, args.chunk_size)
+    else:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            score_stream(f, sys.stdout, scorer, args.json, args.chunk_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Pluggable text scoring engines: VADER, TextBlob, both combined, or a compiled finance lexicon
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Raw score rows: (vader compound, pos, neg, neu, textblob polarity, subjectivity, combined);
+# columns an engine does not compute are NaN
+RAW_WIDTH = 7
+
+# Finance and trading-forum vocabulary on VADER's -4..4 valence scale. Zero entries silence
+# general-purpose VADER words that are neutral in market text ('gross margin', 'crude oil').
+FINANCE_LEXICON = {
+    'beat': 2.0, 'beats': 2.0, 'topped': 1.6, 'tops': 1.6, 'exceeded': 1.8, 'exceeds': 1.8,
+    'upgrade': 2.2, 'upgrades': 2.2, 'upgraded': 2.2, 'outperform': 2.0, 'outperforms': 2.0,
+    'overweight': 1.4, 'bullish': 2.5, 'bull': 1.5, 'rally': 2.0, 'rallies': 2.0, 'rallied': 2.0,
+    'soar': 2.6, 'soars': 2.6, 'soared': 2.6, 'surge': 2.4, 'surges': 2.4, 'surged': 2.4,
+    'jump': 1.8, 'jumps': 1.8, 'jumped': 1.8, 'climb': 1.4, 'climbs': 1.4, 'climbed': 1.4,
+    'rebound': 1.6, 'rebounds': 1.6, 'record': 1.2, 'raised': 1.2, 'raises': 1.2, 'buyback': 1.4,
+    'dividend': 0.8, 'breakout': 1.8, 'moon': 2.0, 'mooning': 2.4, 'tendies': 1.8, 'calls': 0.6,
+    'downgrade': -2.2, 'downgrades': -2.2, 'downgraded': -2.2, 'underperform': -2.0,
+    'underperforms': -2.0, 'underweight': -1.4, 'bearish': -2.5, 'bear': -1.5,
+    'plunge': -2.8, 'plunges': -2.8, 'plunged': -2.8, 'tumble': -2.4, 'tumbles': -2.4,
+    'tumbled': -2.4, 'slump': -2.2, 'slumps': -2.2, 'slumped': -2.2, 'sink': -1.8, 'sinks': -1.8,
+    'sank': -1.8, 'drops': -1.1, 'dropped': -1.1, 'slide': -1.4, 'slides': -1.4, 'selloff': -2.2,
+    'bankruptcy': -3.2, 'default': -2.4, 'defaults': -2.4, 'layoffs': -2.0, 'recall': -1.6,
+    'recalls': -1.6, 'probe': -1.6, 'subpoena': -2.0, 'dilution': -1.8, 'delisted': -2.8,
+    'volatile': -0.8, 'headwinds': -1.4, 'tailwinds': 1.4, 'bagholder': -2.0, 'bagholders': -2.0,
+    'puts': -0.6, 'short': -0.4,
+    'gross': 0.0, 'crude': 0.0, 'outstanding': 0.0, 'share': 0.0, 'shares': 0.0, 'liability': 0.0,
+    'tender': 0.0, 'vice': 0.0, 'cancer': 0.0, 'miss': -1.8, 'misses': -1.8, 'missed': -1.8,
+    'cut': -1.4, 'cuts': -1.4,
+}
+
+# Multi-word terms, matched before single tokens
+FINANCE_PHRASES = {
+    'beat estimates': 2.4, 'beats estimates': 2.4, 'missed estimates': -2.4, 'misses estimates': -2.4,
+    'price target raised': 2.2, 'raises price target': 2.2, 'price target cut': -2.2,
+    'cuts price target': -2.2, 'raises guidance': 2.4, 'raised guidance': 2.4, 'cuts guidance': -2.6,
+    'lowers guidance': -2.6, 'guidance cut': -2.6, 'all time high': 2.2, 'all-time high': 2.2,
+    '52-week high': 1.8, '52-week low': -1.8, 'short squeeze': 1.6, 'going concern': -3.0,
+    'to the moon': 2.6, 'buy the dip': 1.2, 'profit warning': -2.8, 'cancer drug': 0.0,
+}
+
+NEGATIONS = {
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'without', 'cannot',
+    "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "won't", "can't", "hasn't",
+    "haven't", "shouldn't", "wouldn't", 'isnt', 'arent', 'wasnt', 'dont', 'doesnt', 'didnt', 'wont', 'cant'
+}
+
+_TOKEN = re.compile(r"[a-z_][a-z0-9_'-]*")
+_NON_WORD = re.compile(r"\W+")
+
+
+def _normalize(text: str) -> str:
+    # Phrases are matched with single spaces, so 'beat  estimates' must match 'beat estimates'
+    return " ".join(text.lower().split())
+
+_vader = None
+_vader_lock = threading.Lock()
+
+
+def shared_vader():
+    """One VADER analyzer per process, shared by every engine that needs it"""
+    global _vader
+    if _vader is None:
+        with _vader_lock:
+            if _vader is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _vader = SentimentIntensityAnalyzer()
+    return _vader
+
+
+class ScorerEngine:
+    """Scores texts into raw rows of RAW_WIDTH columns"""
+
+    name = 'base'
+
+    @property
+    def memo_key(self) -> str:
+        """Identifies this engine's entries in the score memo; changes whenever its scores could"""
+        return self.name
+
+    def raw_scores(self, texts: List[str], instrumentation=None) -> np.ndarray:
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load lexicons and models now rather than on the first real batch"""
+        self.raw_scores(["Warm-up"])
+
+
+class VaderEngine(ScorerEngine):
+    """VADER only; combined is the compound score"""
+
+    name = 'vader'
+
+    def __init__(self, vader=None):
+        self._vader = vader
+
+    @property
+    def vader(self):
+        if self._vader is None:
+            self._vader = shared_vader()
+        return self._vader
+
+    def raw_scores(self, texts: List[str], instrumentation=None) -> np.ndarray:
+        raw = np.full((len(texts), RAW_WIDTH), np.nan)
+        polarity_scores = self.vader.polarity_scores
+        start = time.perf_counter()
+        for i, text in enumerate(texts):
+            vader = polarity_scores(text)
+            raw[i, :4] = (vader['compound'], vader['pos'], vader['neg'], vader['neu'])
+        raw[:, 6] = raw[:, 0]
+        if instrumentation and texts:
+            instrumentation.observe('vader', time.perf_counter() - start)
+        return raw
+
+
+class TextBlobEngine(ScorerEngine):
+    """TextBlob's pattern analyzer only; combined is the polarity"""
+
+    name = 'textblob'
+
+    def raw_scores(self, texts: List[str], instrumentation=None) -> np.ndarray:
+        # TextBlob imports NLTK, which dominates startup, so it is loaded only when texts need scoring
+        from textblob.en import sentiment as pattern_sentiment
+
+        raw = np.full((len(texts), RAW_WIDTH), np.nan)
+        start = time.perf_counter()
+        for i, text in enumerate(texts):
+            # Same pattern analyzer TextBlob(text).sentiment uses, without building the blob
+            raw[i, 4:6] = pattern_sentiment(text)
+        raw[:, 6] = raw[:, 4]
+        if instrumentation and texts:
+            instrumentation.observe('textblob', time.perf_counter() - start)
+        return raw
+
+
+class CombinedEngine(VaderEngine):
+    """VADER and TextBlob; combined is their mean (the analyzer's original scoring)"""
+
+    name = 'combined'
+
+    def raw_scores(self, texts: List[str], instrumentation=None) -> np.ndarray:
+        from textblob.en import sentiment as pattern_sentiment
+
+        raw = np.empty((len(texts), RAW_WIDTH))
+        polarity_scores = self.vader.polarity_scores
+        clock = time.perf_counter
+        vader_seconds = blob_seconds = 0.0
+        for i, text in enumerate(texts):
+            start = clock()
+            vader = polarity_scores(text)
+            raw[i, :4] = (vader['compound'], vader['pos'], vader['neg'], vader['neu'])
+            middle = clock()
+            raw[i, 4:6] = pattern_sentiment(text)
+            vader_seconds += middle - start
+            blob_seconds += clock() - middle
+        raw[:, 6] = (raw[:, 0] + raw[:, 4]) / 2
+
+        if instrumentation and texts:
+            instrumentation.observe('vader', vader_seconds)
+            instrumentation.observe('textblob', blob_seconds)
+        return raw
+
+
+class LexiconEngine(ScorerEngine):
+    """Dictionary lookups over regex tokens: VADER's word list overlaid with finance vocabulary
+
+    Multi-word phrases are first rewritten to single tokens by one compiled alternation. A term
+    preceded by a negation within three tokens is flipped and damped as in VADER, and the summed
+    valence is normalized to -1..1 with VADER's formula. Only the combined column is filled.
+    """
+
+    name = 'lexicon'
+
+    def __init__(self, words: Optional[Dict[str, float]] = None, phrases: Optional[Dict[str, float]] = None,
+                 base_lexicon: bool = True):
+        self._extra_words = {_normalize(word): float(value) for word, value in (words or {}).items()}
+        self._extra_phrases = {_normalize(phrase): float(value) for phrase, value in (phrases or {}).items()}
+        self.base_lexicon = base_lexicon
+        self._lexicon = None
+        self._phrase_tokens = None
+        self._phrase_pattern = None
+        self._lock = threading.Lock()
+        self._memo_key = None
+
+    @property
+    def memo_key(self) -> str:
+        # Scores depend on the vocabulary, so an edit to it must not be served memoized scores
+        if self._memo_key is None:
+            vocabulary = json.dumps([FINANCE_LEXICON, FINANCE_PHRASES, sorted(NEGATIONS), self._extra_words,
+                                     self._extra_phrases, self.base_lexicon], sort_keys=True)
+            self._memo_key = f"{self.name}:{hashlib.sha1(vocabulary.encode('utf-8')).hexdigest()[:16]}"
+        return self._memo_key
+
+    def _load(self):
+        with self._lock:
+            if self._lexicon is not None:
+                return
+            lexicon = {}
+            if self.base_lexicon:
+                lexicon.update((word, valence) for word, valence in shared_vader().lexicon.items()
+                               if _TOKEN.fullmatch(word))
+            lexicon.update(FINANCE_LEXICON)
+            phrases = dict(FINANCE_PHRASES)
+            for term, value in self._extra_words.items():
+                if ' ' in term:
+                    phrases[term] = value
+                else:
+                    lexicon[term] = value
+            phrases.update(self._extra_phrases)
+
+            # 'beat estimates' becomes the token '_beat_estimates', which has the phrase's valence
+            self._phrase_tokens = {}
+            for phrase, value in phrases.items():
+                token = "_" + _NON_WORD.sub('_', phrase)
+                self._phrase_tokens[phrase] = f" {token} "
+                lexicon[token] = value
+
+            # Longest phrases first so 'price target raised' wins over a shorter overlapping phrase
+            alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+            self._phrase_pattern = re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])")
+            self._lexicon = lexicon
+
+    def score(self, text: str) -> float:
+        if self._lexicon is None:
+            self._load()
+        lexicon = self._lexicon
+        lowered = self._phrase_pattern.sub(lambda match: self._phrase_tokens[match.group(0)], _normalize(text))
+
+        total = 0.0
+        tokens = _TOKEN.findall(lowered)
+        for i, token in enumerate(tokens):
+            valence = lexicon.get(token)
+            if not valence:
+                continue
+            if any(previous in NEGATIONS for previous in tokens[max(0, i - 3):i]):
+                valence *= -0.74
+            total += valence
+
+        return total / math.sqrt(total * total + 15) if total else 0.0
+
+    def raw_scores(self, texts: List[str], instrumentation=None) -> np.ndarray:
+        raw = np.full((len(texts), RAW_WIDTH), np.nan)
+        start = time.perf_counter()
+        score = self.score
+        raw[:, 6] = [score(text) for text in texts]
+        if instrumentation and texts:
+            instrumentation.observe('lexicon', time.perf_counter() - start)
+        return raw
+
+    def warm_up(self):
+        self._load()
+
+
+ENGINES = {
+    'combined': CombinedEngine,
+    'vader': VaderEngine,
+    'textblob': TextBlobEngine,
+    'lexicon': LexiconEngine,
+}
+
+# Sources an engine can be chosen for: news items, Reddit posts, and ad-hoc text (analyze_text,
+# analyze_batch, the text-only CLI and the service)
+SOURCES = ('news', 'social', 'text')
+
+
+def build_engine(name: str, scoring_config: Optional[Dict] = None) -> ScorerEngine:
+    """Create an engine by name; the lexicon engine takes its extra vocabulary from scoring_config"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown scoring engine {name!r}; expected one of {', '.join(ENGINES)}")
+    if name == 'lexicon':
+        lexicon_config = (scoring_config or {}).get('lexicon', {})
+        return LexiconEngine(
+            lexicon_config.get('words'), lexicon_config.get('phrases'), lexicon_config.get('base_lexicon', True)
+        )
+    return ENGINES[name]()
+
+
+def engine_names(scoring_config: Optional[Dict] = None) -> Dict[str, str]:
+    """Engine name for each source, from the scoring config block"""
+    scoring_config = scoring_config or {}
+    default = scoring_config.get('engine', 'combined')
+    sources = scoring_config.get('sources', {})
+    return {source: sources.get(source, default) for source in SOURCES}
+
+
+def build_engines(scoring_config: Optional[Dict] = None) -> Dict[str, ScorerEngine]:
+    """Engine per source; sources that name the same engine share one instance"""
+    by_name = {}
+    engines = {}
+    for source, name in engine_names(scoring_config).items():
+        if name not in by_name:
+            by_name[name] = build_engine(name, scoring_config)
+        engines[source] = by_name[name]
+    return engines
@@ -1,19 +1,35 @@
 import json
-import pandas as pd
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
-import yfinance as yf
-import requests
-from newspaper import Article
-import re
-import time
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, Set
 import numpy as np
 import os
 from dotenv import load_dotenv
-import praw
+from concurrent.futures import ThreadPoolExecutor
+from provider_access import build_provider_access
+from cache import ResultStore, build_provider_cache, build_score_memo
+from market_data import MarketDataFetcher
+from reddit_client import RedditFetcher
+from aggregation import build_weight_policies, weighted_stats
+from article_fetcher import build_article_fetcher
+from document_index import DocumentIndex, item_id
+from near_duplicates import build_near_duplicate_index, collapse_clusters
+from scorers import build_engines
+from batch_scorer import SCORE_COLUMNS, BatchScorer, ParallelScorer, as_text
+from history_store import build_history_store
+from result_set import ResultSet
+from rollups import GroupAggregate, RollupBook
+from influx_sink import build_influx_sink
+from instrumentation import Instrumentation, start_profiler_from_env
+
+# pandas, TextBlob, yfinance and praw are imported where first needed, so text
+# scoring and short-lived commands do not pay for the full provider stack
+if TYPE_CHECKING:
+    import pandas as pd
+
+def format_sentiment(value) -> str:
+    """A sentiment score for display; a missing one (None, or NaN in a DataFrame) is shown as n/a"""
+    return "n/a" if value is None or value != value else f"{value:.3f}"
 
 class SentimentAnalyzer:
     def __init__(self, config_path="config.json"):
@@ -23,11 +39,100 @@ class SentimentAnalyzer:
         with open(config_path, 'r') as f:
             self.config = json.load(f)
         
-        self.vader = SentimentIntensityAnalyzer()
+        # SENTIMENT_PROFILE=<file> profiles the whole run; SENTIMENT_TRACE=1 logs every timed stage
+        start_profiler_from_env()
+        instrumentation_config = self.config.get('instrumentation', {})
+        self.instrumentation = Instrumentation(
+            instrumentation_config.get('enabled', True),
+            trace=instrumentation_config.get('trace', False) or os.getenv('SENTIMENT_TRACE') == '1'
+        )
+        
+        config_dir = os.path.dirname(os.path.abspath(config_path))
+        
+        # analyze_text results are memoized by a hash of the engine and the normalized text
+        self.score_memo = build_score_memo(self.config.get('score_memo', {}), config_dir)
+        
+        # One scorer per source (news, social, text), each running the engine configured for it
+        self.scoring_config = self.config.get('scoring', {})
+        self.scorers = {
+            source: BatchScorer(None, self.score_memo, self.instrumentation, engine)
+            for source, engine in build_engines(self.scoring_config).items()
+        }
+        self.batch_scorer = self.scorers['text']
+        self.parallel_scorer = None
         self.logger = self._setup_logger()
         
-        # Initialize Reddit API if credentials are available
-        self.reddit = self._setup_reddit()
+        # Item weights (upvotes, recency, source credibility) and ESS-based confidence per roll-up
+        self.weight_policies = build_weight_policies(self.config.get('aggregation', {}))
+        
+        # Per-provider token buckets shared by all worker threads, with adaptive rates,
+        # retries and a circuit breaker per provider (provider_access block)
+        analysis_config = self.config.get('stock_analysis', {})
+        self.providers = build_provider_access(analysis_config, self.config.get('provider_access', {}))
+        self.max_workers = analysis_config.get('max_workers', 8)
+        # Recommendation cut-offs; backtest.py evaluates alternatives to these
+        self.sentiment_thresholds = {
+            'strong_buy': 0.3, 'buy': 0.1, 'sell': -0.1, 'strong_sell': -0.3,
+            **analysis_config.get('sentiment_threshold', {})
+        }
+        
+        # Provider responses are cached per provider TTL (news, price, fundamentals, reddit)
+        self.cache = build_provider_cache(analysis_config, config_dir)
+        
+        # One shared Ticker per symbol for news, price history and fundamentals
+        self.market_data = MarketDataFetcher(self.cache, self._request, instrumentation=self.instrumentation)
+        
+        # Optional full-article stage; bodies are cached by URL so shared articles are fetched once
+        self.articles = build_article_fetcher(
+            self.config.get('article_bodies', {}), self.config.get('news_sources', []),
+            self.cache, self._throttle, self.instrumentation
+        )
+        
+        # Syndicated and reposted stories are clustered across refresh cycles; each cluster is scored once
+        self.near_duplicates = build_near_duplicate_index(self.config.get('near_duplicates', {}))
+        
+        # Sector and portfolio runs ingest every feed once and answer per-symbol sentiment from this index
+        index_config = self.config.get('document_index', {})
+        self.documents = None
+        if index_config.get('enabled', True):
+            self.documents = DocumentIndex(
+                lambda texts, kind: self._score_clustered(texts, 'news' if kind == 'news' else 'social'),
+                index_config.get('max_documents', 50000)
+            )
+        self.index_max_age = index_config.get('max_age_minutes', 15) * 60
+        
+        # Whole-symbol results are shared across portfolio, sector and report runs in this session
+        self.results = ResultStore(analysis_config.get('cache_duration_minutes', 15) * 60)
+        
+        # Every computed result is exported to InfluxDB when the influxdb block is enabled
+        self.sink = build_influx_sink(self.config.get('influxdb', {}), self.config.get('sectors', {}), config_dir)
+        
+        # ...and appended to the partitioned Parquet history when history_store is enabled
+        self.history = build_history_store(self.config.get('history_store', {}), config_dir)
+        
+        # Sector and portfolio roll-ups are updated in place as each symbol's sentiment changes
+        self.rollups = RollupBook(self.weight_policies)
+        
+        # One PRAW session serves every subreddit search, fanned out over a small thread pool
+        reddit_config = self.config.get('reddit', {})
+        self.reddit_posts = RedditFetcher(
+            None, self.cache, self._request, client_factory=self._setup_reddit,
+            subreddits=reddit_config.get('subreddits'),
+            max_parallel_searches=reddit_config.get('max_parallel_searches', 5),
+            max_query_length=reddit_config.get('max_query_length', 400),
+            sort=reddit_config.get('sort', 'relevance'),
+            instrumentation=self.instrumentation
+        )
+        
+        self.instrumentation.register_collector('provider_cache', self.cache.stats)
+        self.instrumentation.register_collector('result_store', self.results.stats)
+        self.instrumentation.register_collector('providers', lambda: self.providers.stats())
+        if self.score_memo:
+            self.instrumentation.register_collector('score_memo', self.score_memo.stats)
+        if self.documents is not None:
+            self.instrumentation.register_collector('document_index', self.documents.stats)
+        if self.near_duplicates is not None:
+            self.instrumentation.register_collector('near_duplicates', self.near_duplicates.stats)
     
     def _setup_logger(self):
         logging.basicConfig(level=logging.INFO)
@@ -41,6 +146,7 @@ class SentimentAnalyzer:
             user_agent = os.getenv('REDDIT_USER_AGENT')
             
             if client_id and client_secret and user_agent:
+                import praw
                 reddit = praw.Reddit(
                     client_id=client_id,
                     client_secret=client_secret,
@@ -55,29 +161,57 @@ class SentimentAnalyzer:
             self.logger.error(f"Failed to initialize Reddit API: {e}")
             return None
     
-    def analyze_text(self, text):
-        """Analyze sentiment of a single text using multiple methods"""
-        # VADER sentiment (good for social media)
-        vader_scores = self.vader.polarity_scores(text)
-        
-        # TextBlob sentiment (good for formal text)
-        blob = TextBlob(text)
-        textblob_polarity = blob.sentiment.polarity
-        textblob_subjectivity = blob.sentiment.subjectivity
-        
-        # Combined score
-        combined_score = (vader_scores['compound'] + textblob_polarity) / 2
+    @property
+    def vader(self):
+        """VADER analyzer shared with the batch scorer, built on first use"""
+        return self.batch_scorer.vader
+    
+    @property
+    def reddit(self):
+        """The shared PRAW client, or None without credentials"""
+        return self.reddit_posts.reddit
+    
+    @reddit.setter
+    def reddit(self, client):
+        self.reddit_posts.reddit = client
+    
+    def get_stats(self) -> Dict:
+        """Stage timings, counters and cache statistics collected so far"""
+        return self.instrumentation.stats()
+    
+    def serve_metrics(self, port: int = 9108):
+        """Expose Prometheus-style metrics at http://127.0.0.1:<port>/metrics"""
+        return self.instrumentation.serve(port)
+    
+    def close(self):
+        """Flush pending exports and stop background workers"""
+        if self.sink:
+            self.sink.close()
+        if self.history:
+            self.history.flush()
+        if self.parallel_scorer:
+            self.parallel_scorer.close()
+        self.reddit_posts.close()
+        if self.articles:
+            self.articles.close()
+    
+    def _throttle(self, provider: str):
+        """Wait for a request slot with the given data provider"""
+        self.providers.throttle(provider)
+    
+    def _request(self, provider: str, call):
+        """Run one provider request with pacing, retries and the provider's circuit breaker"""
+        return self.providers.call(provider, call)
+    
+    def analyze_text(self, text, source: str = 'text'):
+        """Analyze sentiment of a single text with the engine configured for the source
         
-        return {
-            'vader_compound': vader_scores['compound'],
-            'vader_positive': vader_scores['pos'],
-            'vader_negative': vader_scores['neg'],
-            'vader_neutral': vader_scores['neu'],
-            'textblob_polarity': textblob_polarity,
-            'textblob_subjectivity': textblob_subjectivity,
-            'combined_score': combined_score,
-            'sentiment_label': self._get_sentiment_label(combined_score)
-        }
+        Fields an engine does not compute (TextBlob fields for 'vader', for example) are NaN.
+        """
+        scores = self.score_texts([text], source)
+        result = {column: float(scores[column][0]) for column in SCORE_COLUMNS}
+        result['sentiment_label'] = scores['sentiment_label'][0]
+        return result
     
     def _get_sentiment_label(self, score):
         """Convert numerical score to categorical label"""
@@ -88,15 +222,93 @@ class SentimentAnalyzer:
         else:
             return 'neutral'
     
-    def analyze_batch(self, texts):
-        """Analyze sentiment for multiple texts"""
-        results = []
-        for text in texts:
-            result = self.analyze_text(text)
-            result['text'] = text[:100] + "..." if len(text) > 100 else text
-            results.append(result)
+    def score_texts(self, texts, source: str = 'text') -> Dict[str, np.ndarray]:
+        """Score a list or Series of texts, returning one NumPy array per analyze_text field"""
+        return self.scorers.get(source, self.batch_scorer).score(texts)
+    
+    def _combined_scores(self, texts, source: str = 'text') -> np.ndarray:
+        return self.score_texts(texts, source)['combined_score']
+    
+    def _cluster_scores(self, clusters: List[int], texts: List[str], source: str) -> np.ndarray:
+        """Combined score per text, scoring each near-duplicate cluster once per engine"""
+        return self.near_duplicates.scores(
+            clusters, texts, lambda batch: self._combined_scores(batch, source), self.scorers[source].engine.name
+        )
+    
+    def _score_clustered(self, texts: List[str], source: str):
+        """Combined scores and near-duplicate cluster ids (None when clustering is disabled)"""
+        if self.near_duplicates is None:
+            return self._combined_scores(texts, source), None
+        with self.instrumentation.timer('near_duplicate_assign'):
+            clusters = self.near_duplicates.assign(texts)
+        return self._cluster_scores(clusters, texts, source), clusters
+    
+    def _get_parallel_scorer(self, processes: Optional[int]) -> ParallelScorer:
+        """Process-pool scorer, created on first use and reused across batches"""
+        batch_config = self.config.get('batch_scoring', {})
+        chunk_size = batch_config.get('chunk_size', 2000)
+        scorer = self.parallel_scorer
+        if scorer is None or scorer.processes != processes or scorer.chunk_size != chunk_size:
+            if scorer is not None:
+                scorer.close()
+            scorer = self.parallel_scorer = ParallelScorer(
+                processes, chunk_size, self.score_memo, self.batch_scorer.engine.name, self.scoring_config
+            )
+        return scorer
+    
+    def analyze_batch(self, texts, processes: Optional[int] = None):
+        """Analyze sentiment for multiple texts, optionally across worker processes"""
+        texts = texts.tolist() if hasattr(texts, 'tolist') else list(texts)
+        
+        # processes=None defers to batch_scoring.processes in config; 0 or 1 scores in-process
+        if processes is None:
+            processes = self.config.get('batch_scoring', {}).get('processes', 0)
+        
+        if processes > 1 and len(texts) > self.config.get('batch_scoring', {}).get('chunk_size', 2000):
+            scorer = self._get_parallel_scorer(processes)
+            scores = scorer.score(texts)
+        else:
+            scores = self.score_texts(texts)
+        
+        import pandas as pd
+        
+        with self.instrumentation.timer('dataframe_build'):
+            results = pd.DataFrame(scores)
+            results['text'] = [text[:100] + "..." if len(text) > 100 else text for text in map(as_text, texts)]
+        
+        return results
+    
+    def score_file(self, input_path: str, output_path: str, text_fields=('text',), keep_fields=(),
+                   processes: Optional[int] = None, resume: bool = False, **options) -> Dict:
+        """Stream-score a JSONL, CSV or text file into CSV, JSONL or Parquet in bounded memory
+        
+        Output is checkpointed, so resume=True continues an interrupted run. Returns counts and throughput.
+        """
+        from stream_scoring import StreamScorer
+        
+        batch_config = self.config.get('batch_scoring', {})
+        chunk_size = batch_config.get('chunk_size', 2000)
+        if processes is None:
+            processes = batch_config.get('processes', 0)
+        if processes > 1:
+            score_chunks = self._get_parallel_scorer(processes).iter_scores
+        else:
+            score_chunks = lambda texts: self.batch_scorer.iter_scores(texts, chunk_size)
         
-        return pd.DataFrame(results)
+        stream = StreamScorer(score_chunks, chunk_size, keep_fields, **options)
+        with self.instrumentation.timer('stream_scoring'):
+            return stream.run(input_path, output_path, text_fields=text_fields, resume=resume)
+    
+    @staticmethod
+    def _degraded(kind: str, error: Exception) -> Dict:
+        """Placeholder for a source whose provider failed, so it is not mistaken for neutral sentiment"""
+        return {
+            'sentiment': None,
+            'articles_count' if kind == 'news' else 'posts_count': 0,
+            'confidence': 0,
+            'degraded': True,
+            'error': str(error)
+        }
     
     def calculate_weighted_sentiment(self, news_sentiment, social_sentiment, technical_sentiment=0):
         """Calculate weighted sentiment score based on different sources"""
@@ -113,50 +325,121 @@ class SentimentAnalyzer:
     def get_stock_news_sentiment(self, symbol: str, days_back: int = 7) -> Dict:
         """Get sentiment analysis for stock-related news"""
         try:
-            # Get stock info
-            stock = yf.Ticker(symbol)
+            max_articles = self.config.get('stock_analysis', {}).get('max_news_articles', 10)
+            
+            # Answer from the document index when this symbol's feeds were ingested recently
+            if self._indexed(symbol):
+                documents = self.documents.documents(symbol, 'news', max_articles)
+                if not documents:
+                    return {'sentiment': 0, 'articles_count': 0, 'confidence': 0}
+                return self._summarize_items(
+                    'news', [d.score for d in documents], [d.timestamp for d in documents],
+                    [d.source for d in documents], clusters=self._document_clusters(documents)
+                )
             
             # Get recent news
-            news = stock.news
+            news = self.market_data.get_news(symbol)
             if not news:
                 self.logger.warning(f"No news found for {symbol}")
                 return {'sentiment': 0, 'articles_count': 0, 'confidence': 0}
             
             # Analyze news sentiment
-            sentiments = []
-            valid_articles = 0
-            
-            for article in news[:10]:  # Limit to recent 10 articles
-                try:
-                    title = article.get('title', '')
-                    summary = article.get('summary', '')
-                    text = f"{title}. {summary}"
-                    
-                    if text.strip():
-                        sentiment = self.analyze_text(text)
-                        sentiments.append(sentiment['combined_score'])
-                        valid_articles += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"Error processing article: {e}")
-                    continue
-            
-            if not sentiments:
+            items = self._news_items(symbol, news[:max_articles])
+            if not items:
                 return {'sentiment': 0, 'articles_count': 0, 'confidence': 0}
             
-            avg_sentiment = np.mean(sentiments)
-            confidence = min(valid_articles / 5.0, 1.0)  # Confidence based on article count
-            
-            return {
-                'sentiment': avg_sentiment,
-                'articles_count': valid_articles,
-                'confidence': confidence,
-                'sentiment_label': self._get_sentiment_label(avg_sentiment)
-            }
+            sentiments, clusters = self._score_clustered([item['text'] for item in items], 'news')
+            return self._summarize_items(
+                'news', sentiments, [item['timestamp'] for item in items], [item['source'] for item in items],
+                clusters=clusters
+            )
             
         except Exception as e:
             self.logger.error(f"Error getting news sentiment for {symbol}: {e}")
-            return {'sentiment': 0, 'articles_count': 0, 'confidence': 0}
+            self.instrumentation.increment('degraded_news')
+            return self._degraded('news', e)
+    
+    def _news_items(self, symbol: str, news: List[Dict]) -> List[Dict]:
+        """Scorable documents for news items, with full article text when article_bodies is enabled"""
+        bodies = self.articles.fetch_many(article.get('link') for article in news) if self.articles else {}
+        items = []
+        
+        for article in news:
+            try:
+                title = article.get('title', '')
+                summary = article.get('summary', '')
+                text = f"{title}. {summary}"
+                
+                body = bodies.get(article.get('link'), '')
+                if body:
+                    # Extracted text usually repeats the headline
+                    if body.startswith(title):
+                        body = body[len(title):]
+                    text = f"{text} {body.strip()}"
+                
+                if text.strip():
+                    items.append({
+                        'id': f"news:{item_id(article)}",
+                        'kind': 'news',
+                        'text': text,
+                        'timestamp': article.get('providerPublishTime'),
+                        'source': article.get('publisher'),
+                        'tickers': [symbol] + list(article.get('relatedTickers') or [])
+                    })
+                    
+            except Exception as e:
+                self.logger.error(f"Error processing article: {e}")
+                continue
+        
+        return items
+    
+    def _post_items(self, symbol: str, posts: List[Dict]) -> List[Dict]:
+        """Scorable documents for Reddit posts"""
+        return [
+            {
+                'id': f"reddit:{item_id(post)}",
+                'kind': 'post',
+                'text': f"{post['title']}. {post['text']}",
+                'timestamp': post.get('created'),
+                'source': post.get('subreddit'),
+                'upvotes': post['score'],
+                'tickers': [symbol]
+            }
+            for post in posts
+        ]
+    
+    def _document_clusters(self, documents) -> Optional[List[int]]:
+        return [d.cluster for d in documents] if self.near_duplicates is not None else None
+    
+    def _summarize_items(self, kind: str, scores, timestamps, sources, upvotes=None, clusters=None) -> Dict:
+        """Weighted sentiment of scored news items ('news') or posts ('post')
+        
+        With cluster ids, near duplicates count once, at the weight of their heaviest copy.
+        """
+        policy = self.weight_policies['news' if kind == 'news' else 'social']
+        weights = policy.weights(len(scores), upvotes=upvotes, timestamps=timestamps, sources=sources)
+        items = len(scores)
+        if clusters is not None:
+            scores, weights = collapse_clusters(scores, weights, clusters)
+        stats = weighted_stats(scores, weights)
+        
+        return {
+            'sentiment': stats.mean,
+            'articles_count' if kind == 'news' else 'posts_count': stats.count,
+            'confidence': policy.confidence(stats),  # Confidence based on effective item count
+            'sentiment_std': stats.std,
+            'effective_sample_size': stats.effective_sample_size,
+            'sentiment_label': self._get_sentiment_label(stats.mean),
+            'duplicates_removed': items - stats.count
+        }
+    
+    def fetch_reddit_posts(self, symbol: str, limit: int = 25, refresh: bool = False) -> List[Dict]:
+        """Collect recent posts about a symbol from the tracked subreddits"""
+        return self.reddit_posts.fetch_posts(symbol, limit, refresh)
+    
+    def prefetch_reddit_posts(self, symbols: List[str], limit: int = 25, refresh: bool = False) -> Set[str]:
+        """Fetch posts for many symbols with combined multireddit queries; returns the symbols covered"""
+        return self.reddit_posts.prefetch(symbols, limit, refresh)
     
     def get_reddit_sentiment(self, symbol: str, limit: int = 25) -> Dict:
         """Get sentiment from Reddit discussions"""
@@ -165,59 +448,92 @@ class SentimentAnalyzer:
             return {'sentiment': 0, 'posts_count': 0, 'confidence': 0}
         
         try:
-            # Search for posts about the stock symbol
-            subreddits = ['stocks', 'investing', 'SecurityAnalysis', 'ValueInvesting', 'StockMarket']
-            all_posts = []
+            if self._indexed(symbol):
+                documents = self.documents.documents(symbol, 'post', limit)
+                if not documents:
+                    return {'sentiment': 0, 'posts_count': 0, 'confidence': 0}
+                return self._summarize_items(
+                    'post', [d.score for d in documents], [d.timestamp for d in documents],
+                    [d.source for d in documents], [d.upvotes for d in documents],
+                    clusters=self._document_clusters(documents)
+                )
             
-            for subreddit_name in subreddits:
-                try:
-                    subreddit = self.reddit.subreddit(subreddit_name)
-                    # Search for the stock symbol
-                    posts = subreddit.search(f"{symbol} OR ${symbol}", limit=limit//len(subreddits), time_filter='week')
-                    
-                    for post in posts:
-                        if post.selftext and len(post.selftext) > 20:  # Filter out very short posts
-                            all_posts.append({
-                                'title': post.title,
-                                'text': post.selftext[:500],  # Limit text length
-                                'score': post.score,
-                                'created': post.created_utc
-                            })
-                except Exception as e:
-                    self.logger.warning(f"Error accessing subreddit {subreddit_name}: {e}")
-                    continue
+            all_posts = self.fetch_reddit_posts(symbol, limit)
             
             if not all_posts:
                 return {'sentiment': 0, 'posts_count': 0, 'confidence': 0}
             
-            # Analyze sentiment of posts
-            sentiments = []
-            for post in all_posts:
-                text = f"{post['title']}. {post['text']}"
-                sentiment = self.analyze_text(text)
-                # Weight by post score (upvotes)
-                weight = max(1, post['score']) if post['score'] > 0 else 1
-                sentiments.extend([sentiment['combined_score']] * min(weight, 5))  # Cap weight at 5
-            
-            if sentiments:
-                avg_sentiment = np.mean(sentiments)
-                confidence = min(len(all_posts) / 10.0, 1.0)  # Confidence based on post count
-                
-                return {
-                    'sentiment': avg_sentiment,
-                    'posts_count': len(all_posts),
-                    'confidence': confidence,
-                    'sentiment_label': self._get_sentiment_label(avg_sentiment)
-                }
-            
-            return {'sentiment': 0, 'posts_count': 0, 'confidence': 0}
+            # Analyze sentiment of posts, weighted by upvotes, age and subreddit
+            scores, clusters = self._score_clustered(
+                [f"{post['title']}. {post['text']}" for post in all_posts], 'social'
+            )
+            return self._summarize_items(
+                'post', scores,
+                timestamps=[post.get('created') for post in all_posts],
+                sources=[post.get('subreddit') for post in all_posts],
+                upvotes=[post['score'] for post in all_posts],
+                clusters=clusters
+            )
             
         except Exception as e:
             self.logger.error(f"Error getting Reddit sentiment for {symbol}: {e}")
-            return {'sentiment': 0, 'posts_count': 0, 'confidence': 0}
+            self.instrumentation.increment('degraded_social')
+            return self._degraded('post', e)
+    
+    def _indexed(self, symbol: str) -> bool:
+        return self.documents is not None and self.documents.covers(symbol, self.index_max_age)
+    
+    def index_documents(self, symbols: List[str], max_workers: Optional[int] = None) -> int:
+        """Fetch news and posts for all symbols, then score and index every document once"""
+        if self.documents is None:
+            return 0
+        
+        max_articles = self.config.get('stock_analysis', {}).get('max_news_articles', 10)
+        
+        def collect(symbol):
+            try:
+                items = self._news_items(symbol, self.market_data.get_news(symbol)[:max_articles])
+                if self.reddit:
+                    items += self._post_items(symbol, self.fetch_reddit_posts(symbol))
+                name = self.market_data.get_fundamentals(symbol).get('longName')
+                return symbol, items, name
+            except Exception as e:
+                self.logger.error(f"Error collecting documents for {symbol}: {e}")
+                return symbol, None, None
+        
+        if self.reddit:
+            self.prefetch_reddit_posts(symbols)
+        workers = max(1, min(max_workers or self.max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            collected = list(executor.map(collect, symbols))
+        
+        indexed = [symbol for symbol, items, _ in collected if items is not None]
+        self.documents.extractor.update(symbols, {symbol: name for symbol, _, name in collected if name})
+        with self.instrumentation.timer('document_ingest'):
+            ingested = self.documents.ingest([item for _, items, _ in collected for item in items or []])
+        self.documents.mark_indexed(indexed)
+        
+        self.logger.info(f"Indexed {ingested} new documents for {len(indexed)} symbols")
+        return ingested
+    
+    def analyze_stock_sentiment(self, symbol: str, force_refresh: bool = False) -> Dict:
+        """Comprehensive stock sentiment analysis, reused within the cache freshness window"""
+        result = self.results.get_or_compute(
+            symbol, lambda: self._compute_stock_sentiment(symbol), force=force_refresh
+        )
+        # A degraded result answers concurrent callers but is recomputed once providers recover
+        if result.get('degraded'):
+            self.results.invalidate(symbol)
+        return result
+    
+    def _compute_stock_sentiment(self, symbol: str) -> Dict:
+        """Run the full news, social and price analysis for one symbol"""
+        with self.instrumentation.symbol_context(symbol), self.instrumentation.timer('analyze_symbol'):
+            result = self._run_stock_analysis(symbol)
+        self.instrumentation.increment('symbols_analyzed')
+        return result
     
-    def analyze_stock_sentiment(self, symbol: str) -> Dict:
-        """Comprehensive stock sentiment analysis"""
+    def _run_stock_analysis(self, symbol: str) -> Dict:
         self.logger.info(f"Analyzing sentiment for {symbol}")
         
         # Get news sentiment
@@ -226,36 +542,76 @@ class SentimentAnalyzer:
         # Get social media sentiment (placeholder)
         social_sentiment = self.get_reddit_sentiment(symbol)
         
-        # Calculate weighted sentiment
-        weighted_sentiment = self.calculate_weighted_sentiment(
-            news_sentiment['sentiment'],
-            social_sentiment['sentiment']
-        )
+        # Calculate weighted sentiment over the sources whose providers answered
+        weighted_sentiment, available = self._available_sentiment(news_sentiment, social_sentiment)
         
         # Get stock price data for context
         stock_data = self.get_stock_context(symbol)
         
-        return {
+        degraded_sources = [
+            name for name, part in (('news', news_sentiment), ('social', social_sentiment), ('context', stock_data))
+            if part.get('degraded')
+        ]
+        
+        result = {
             'symbol': symbol,
             'timestamp': datetime.now().isoformat(),
             'news_sentiment': news_sentiment,
             'social_sentiment': social_sentiment,
             'weighted_sentiment': weighted_sentiment,
-            'sentiment_label': self._get_sentiment_label(weighted_sentiment),
+            'sentiment_label': self._get_sentiment_label(weighted_sentiment) if available else 'unavailable',
             'stock_context': stock_data,
-            'recommendation': self._get_stock_recommendation(weighted_sentiment, stock_data)
+            'recommendation': self._get_stock_recommendation(weighted_sentiment, stock_data) if available
+            else "HOLD - Insufficient data (sentiment providers unavailable)",
+            'degraded': bool(degraded_sources),
+            'degraded_sources': degraded_sources
         }
+        
+        if not available:
+            # Nothing was measured, so the symbol drops out of its roll-ups and exports
+            self.instrumentation.increment('symbols_unavailable')
+            self.rollups.discard(symbol)
+            return result
+        
+        if self.sink:
+            self.sink.submit(result)
+        if self.history:
+            self.history.append(result)
+        self.rollups.update(symbol, weighted_sentiment)
+        
+        return result
+    
+    def _available_sentiment(self, news_sentiment: Dict, social_sentiment: Dict):
+        """Weighted sentiment of the non-degraded sources, and whether any source was available
+        
+        A degraded source's weight is spread over the others, keeping the total weight of
+        news and social, so one provider outage does not pull the score towards zero.
+        """
+        if not news_sentiment.get('degraded') and not social_sentiment.get('degraded'):
+            return self.calculate_weighted_sentiment(news_sentiment['sentiment'], social_sentiment['sentiment']), True
+        
+        weights = self.config['sentiment_weights']
+        parts = [
+            (weights[name], part['sentiment']) for name, part in (('news', news_sentiment), ('social', social_sentiment))
+            if not part.get('degraded')
+        ]
+        available_weight = sum(weight for weight, _ in parts)
+        if not parts or available_weight <= 0:
+            # Nothing was measured: None, so exports store a missing value rather than a neutral zero
+            return None, False
+        scale = (weights['news'] + weights['social']) / available_weight
+        return sum(weight * value for weight, value in parts) * scale, True
     
     def get_stock_context(self, symbol: str) -> Dict:
         """Get basic stock context data"""
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="5d")
-            info = stock.info
+            hist = self.market_data.get_history(symbol)
             
             if hist.empty:
                 return {'error': 'No price data available'}
             
+            info = self.market_data.get_fundamentals(symbol)
+            
             current_price = hist['Close'].iloc[-1]
             prev_price = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
             price_change = ((current_price - prev_price) / prev_price) * 100
@@ -264,14 +620,15 @@ class SentimentAnalyzer:
                 'current_price': round(current_price, 2),
                 'price_change_pct': round(price_change, 2),
                 'volume': int(hist['Volume'].iloc[-1]) if 'Volume' in hist else 0,
-                'market_cap': info.get('marketCap', 'N/A'),
-                'pe_ratio': info.get('trailingPE', 'N/A'),
-                'company_name': info.get('longName', symbol)
+                'market_cap': info.get('marketCap') or 'N/A',
+                'pe_ratio': info.get('trailingPE') or 'N/A',
+                'company_name': info.get('longName') or symbol
             }
             
         except Exception as e:
             self.logger.error(f"Error getting stock context for {symbol}: {e}")
-            return {'error': str(e)}
+            self.instrumentation.increment('degraded_context')
+            return {'error': str(e), 'degraded': True}
     
     def _get_stock_recommendation(self, sentiment: float, stock_data: Dict) -> str:
         """Generate basic stock recommendation based on sentiment and price action"""
@@ -279,57 +636,123 @@ class SentimentAnalyzer:
             return "HOLD - Insufficient data"
         
         price_change = stock_data.get('price_change_pct', 0)
+        thresholds = self.sentiment_thresholds
         
-        # Simple recommendation logic
-        if sentiment > 0.3 and price_change > 0:
+        # Simple recommendation logic; backtest.recommendation_codes is the vectorized twin
+        if sentiment > thresholds['strong_buy'] and price_change > 0:
             return "BUY - Strong positive sentiment with price momentum"
-        elif sentiment > 0.1:
+        elif sentiment > thresholds['buy']:
             return "BUY - Positive sentiment detected"
-        elif sentiment < -0.3 and price_change < 0:
+        elif sentiment < thresholds['strong_sell'] and price_change < 0:
             return "SELL - Strong negative sentiment with price decline"
-        elif sentiment < -0.1:
+        elif sentiment < thresholds['sell']:
             return "SELL - Negative sentiment detected"
         else:
             return "HOLD - Neutral sentiment"
     
-    def analyze_portfolio_sentiment(self, symbols: List[str]) -> pd.DataFrame:
-        """Analyze sentiment for multiple stocks"""
-        results = []
+    def analyze_symbols(self, symbols: List[str], max_workers: Optional[int] = None) -> List[Optional[Dict]]:
+        """Analyze symbols concurrently, returning result dicts (or None on failure) in input order"""
+        workers = max_workers or self.max_workers
         
-        for symbol in symbols:
+        def analyze(symbol):
             try:
-                result = self.analyze_stock_sentiment(symbol)
-                results.append(result)
-                time.sleep(1)  # Rate limiting
+                return self.analyze_stock_sentiment(symbol)
             except Exception as e:
                 self.logger.error(f"Error analyzing {symbol}: {e}")
-                continue
+                self.instrumentation.increment('symbol_failures')
+                # A failed symbol drops out of its roll-ups rather than contributing a stale value
+                self.rollups.discard(symbol)
+                return None
+        
+        # One bulk download covers price history for the whole batch, and one ingest
+        # pass (with combined multireddit searches) scores its news and posts once
+        self.market_data.prefetch_history(symbols)
+        if self.documents is not None and len(symbols) > 1:
+            self.index_documents(symbols, workers)
+        else:
+            self.prefetch_reddit_posts(symbols)
+        
+        if workers <= 1 or len(symbols) <= 1:
+            results = [analyze(symbol) for symbol in symbols]
+        else:
+            # Provider pacing is handled by the token buckets, so workers never sleep between symbols
+            with ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as executor:
+                results = list(executor.map(analyze, symbols))
         
-        return pd.DataFrame(results)
+        # One history file set per batch rather than per symbol
+        if self.history:
+            self.history.flush()
+        return results
     
-    def get_sector_sentiment(self, sector_symbols: Dict[str, List[str]]) -> Dict:
+    def analyze_result_set(self, symbols: List[str], max_workers: Optional[int] = None) -> ResultSet:
+        """Analyze many stocks into one columnar, typed result set"""
+        results = self.analyze_symbols(symbols, max_workers)
+        
+        with self.instrumentation.timer('result_set_build'):
+            return ResultSet.from_results(results)
+    
+    def analyze_portfolio_sentiment(self, symbols: List[str], max_workers: Optional[int] = None) -> 'pd.DataFrame':
+        """Analyze sentiment for multiple stocks as a flat DataFrame with one typed column per field"""
+        result_set = self.analyze_result_set(symbols, max_workers)
+        
+        with self.instrumentation.timer('dataframe_build'):
+            return result_set.to_dataframe()
+    
+    @staticmethod
+    def _sector_universe(sector_symbols: Dict[str, List[str]]) -> List[str]:
+        # Symbols shared by several sectors are analyzed once
+        return list(dict.fromkeys(symbol for symbols in sector_symbols.values() for symbol in symbols))
+    
+    def get_sector_results(self, sector_symbols: Dict[str, List[str]], max_workers: Optional[int] = None) -> ResultSet:
+        """Every sector's constituent results in one result set with a sector column"""
+        unique_symbols = self._sector_universe(sector_symbols)
+        analyzed = dict(zip(unique_symbols, self.analyze_symbols(unique_symbols, max_workers)))
+        
+        rows = [
+            (sector, analyzed[symbol]) for sector, symbols in sector_symbols.items()
+            for symbol in symbols if analyzed.get(symbol) is not None
+        ]
+        return ResultSet.from_results([result for _, result in rows], extra={'sector': [sector for sector, _ in rows]})
+    
+    def get_sector_sentiment(self, sector_symbols: Dict[str, List[str]], max_workers: Optional[int] = None) -> Dict:
         """Analyze sentiment by sector"""
+        # Schedule every constituent at once
+        unique_symbols = self._sector_universe(sector_symbols)
+        self.logger.info(f"Analyzing {len(sector_symbols)} sectors ({len(unique_symbols)} symbols)")
+        for sector, symbols in sector_symbols.items():
+            self.rollups.set_group(sector, symbols, kind='sector')
+        # Each computed result updates its sectors' running sums; cached results already contributed
+        self.analyze_symbols(unique_symbols, max_workers)
+        
         sector_results = {}
         
-        for sector, symbols in sector_symbols.items():
-            self.logger.info(f"Analyzing {sector} sector")
-            sector_sentiments = []
-            
-            for symbol in symbols:
-                try:
-                    result = self.analyze_stock_sentiment(symbol)
-                    sector_sentiments.append(result['weighted_sentiment'])
-                    time.sleep(1)
-                except Exception as e:
-                    self.logger.error(f"Error analyzing {symbol} in {sector}: {e}")
-                    continue
-            
-            if sector_sentiments:
-                avg_sentiment = np.mean(sector_sentiments)
-                sector_results[sector] = {
-                    'average_sentiment': avg_sentiment,
-                    'sentiment_label': self._get_sentiment_label(avg_sentiment),
-                    'stocks_analyzed': len(sector_sentiments)
-                }
-        
-        return sector_results
\ No newline at end of file
+        for sector in sector_symbols:
+            summary = self.rollup_summary(sector)
+            if summary and summary['stocks_analyzed']:
+                sector_results[sector] = summary
+        
+        return sector_results
+    
+    def track_portfolio(self, name: str, symbols: List[str]):
+        """Keep a running roll-up for a named portfolio, updated whenever a member is re-analyzed"""
+        self.rollups.set_group(name, symbols, kind='portfolio')
+    
+    def rollup_summary(self, name: str) -> Optional[Dict]:
+        """Current summary of a tracked sector or portfolio, without re-analyzing its members"""
+        summary = self.rollups.summary(name)
+        if summary is not None:
+            summary['sentiment_label'] = self._get_sentiment_label(summary['average_sentiment'])
+        return summary
+    
+    def summarize_portfolio(self, results: List[Dict]) -> Dict:
+        """Portfolio-wide sentiment summary from analyze_stock_sentiment results"""
+        results = [
+            result for result in results
+            if result is not None and result.get('sentiment_label') != 'unavailable'
+        ]
+        aggregate = GroupAggregate((result['symbol'] for result in results), self.weight_policies['portfolio'])
+        for result in results:
+            aggregate.update(result['symbol'], result['weighted_sentiment'])
+        summary = aggregate.summary()
+        summary['sentiment_label'] = self._get_sentiment_label(summary['average_sentiment'])
+        return summary
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Long-lived local HTTP/JSON service around one warm SentimentAnalyzer
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from batch_scorer import SCORE_COLUMNS
+
+
+def _json_default(value):
+    # NumPy scalars and arrays appear in analysis results
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def score_records(texts: List[str], scores: Dict[str, np.ndarray]) -> List[Dict]:
+    """One dict per text with every score field and its label; fields the engine skips are null"""
+    columns = {column: np.where(np.isnan(scores[column]), None, scores[column]).tolist() for column in SCORE_COLUMNS}
+    labels = list(scores['sentiment_label'])
+    return [
+        {'text': text, **{column: values[i] for column, values in columns.items()}, 'sentiment_label': labels[i]}
+        for i, text in enumerate(texts)
+    ]
+
+
+class MicroBatcher:
+    """Coalesces concurrent text-scoring requests into one batch scorer call"""
+
+    def __init__(self, score: Callable[[List[str]], Dict[str, np.ndarray]], max_batch: int = 256,
+                 max_wait: float = 0.005, instrumentation=None):
+        self.score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.instrumentation = instrumentation
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._stats = {'requests': 0, 'texts': 0, 'batches': 0, 'max_batch_texts': 0}
+        self._stats_lock = threading.Lock()
+        self._closed = threading.Event()
+        # Guards the closed check and the put, so nothing is queued behind the shutdown sentinel
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="text-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for scoring; the future resolves to the score columns for these texts"""
+        future = Future()
+        with self._submit_lock:
+            if self._closed.is_set():
+                future.set_exception(RuntimeError("batcher is closed"))
+                return future
+            self._queue.put((texts, future, time.perf_counter()))
+        return future
+
+    def _collect(self, first) -> List:
+        """The first request plus whatever arrives within max_wait, up to max_batch texts"""
+        batch = [first]
+        count = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._closed.set()
+                break
+            batch.append(request)
+            count += len(request[0])
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    first = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    if self._closed.is_set():
+                        return
+                    continue
+                if first is None:
+                    return
+                self._score_batch(self._collect(first))
+        finally:
+            self._fail_pending()
+
+    def _fail_pending(self):
+        """Fail whatever is still queued once the batching thread stops, so no caller waits forever"""
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None and not request[1].done():
+                request[1].set_exception(RuntimeError("batcher is closed"))
+
+    def _score_batch(self, batch: List):
+        texts = [text for request_texts, _, _ in batch for text in request_texts]
+        started = time.perf_counter()
+        if self.instrumentation is not None:
+            for _, _, queued_at in batch:
+                self.instrumentation.observe('service_queue_wait', started - queued_at)
+
+        try:
+            scores = self.score(texts) if texts else {}
+        except Exception as e:
+            self.logger.error(f"Scoring a batch of {len(texts)} texts failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        if self.instrumentation is not None:
+            self.instrumentation.observe('service_text_batch', time.perf_counter() - started)
+        with self._stats_lock:
+            self._stats['requests'] += len(batch)
+            self._stats['texts'] += len(texts)
+            self._stats['batches'] += 1
+            self._stats['max_batch_texts'] = max(self._stats['max_batch_texts'], len(texts))
+
+        offset = 0
+        for request_texts, future, _ in batch:
+            end = offset + len(request_texts)
+            future.set_result({column: values[offset:end] for column, values in scores.items()})
+            offset = end
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['mean_batch_texts'] = stats['texts'] / stats['batches'] if stats['batches'] else 0.0
+        stats['mean_batch_requests'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def close(self):
+        """Score what is already queued, then stop the batching thread"""
+        with self._submit_lock:
+            if not self._thread.is_alive() or self._closed.is_set():
+                return
+            self._closed.set()
+            self._queue.put(None)
+        self._thread.join()
+
+
+class _ServiceHTTPServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 resets connections under bursts of concurrent clients
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class RequestError(Exception):
+    """A client error reported as HTTP 400"""
+
+
+class SentimentService:
+    """Serves text, symbol, portfolio, sector and stats endpoints from a warm analyzer
+
+    POST /score       {"texts": [...]} or {"text": "..."}
+    GET  /symbol/AAPL ?refresh=1
+    POST /portfolio   {"symbols": [...], "name": optional tracked portfolio name}
+    GET  /sectors     configured sectors, or POST /sectors {"sectors": {name: [symbols]}}
+    GET  /stats, GET /health
+    """
+
+    def __init__(self, analyzer, host: str = "127.0.0.1", port: int = 8750, max_batch: int = 256,
+                 max_wait: float = 0.005, max_request_texts: int = 10000):
+        self.analyzer = analyzer
+        self.host = host
+        self.port = port
+        self.max_request_texts = max_request_texts
+        self.logger = logging.getLogger(__name__)
+        self.batcher = MicroBatcher(analyzer.score_texts, max_batch, max_wait, analyzer.instrumentation)
+        self.analyzer.instrumentation.register_collector('text_batcher', self.batcher.stats)
+        self.server = None
+        self._started = time.time()
+
+    def warm_up(self):
+        """Load the scoring models before the first request instead of during it"""
+        with self.analyzer.instrumentation.timer('service_warm_up'):
+            # Engines bypass the score memo, so every configured lexicon is really loaded
+            engines = {id(scorer.engine): scorer.engine for scorer in self.analyzer.scorers.values()}
+            for engine in engines.values():
+                engine.warm_up()
+
+    def score(self, body: Dict) -> Dict:
+        texts = body.get('texts')
+        if texts is None and 'text' in body:
+            texts = [body['text']]
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise RequestError("expected 'texts' as a list of strings or 'text' as a string")
+        if len(texts) > self.max_request_texts:
+            raise RequestError(f"at most {self.max_request_texts} texts per request")
+        scores = self.batcher.submit(texts).result()
+        return {'results': score_records(texts, scores) if texts else []}
+
+    def symbol(self, symbol: str, refresh: bool = False) -> Dict:
+        if not symbol:
+            raise RequestError("missing symbol")
+        return self.analyzer.analyze_stock_sentiment(symbol.upper(), force_refresh=refresh)
+
+    def portfolio(self, body: Dict) -> Dict:
+        symbols = body.get('symbols')
+        if not isinstance(symbols, list) or not symbols:
+            raise RequestError("expected 'symbols' as a non-empty list")
+        symbols = [str(symbol).upper() for symbol in symbols]
+        name = body.get('name')
+        if name:
+            self.analyzer.track_portfolio(name, symbols)
+
+        results = self.analyzer.analyze_symbols(symbols)
+        summary = self.analyzer.rollup_summary(name) if name else self.analyzer.summarize_portfolio(results)
+        return {
+            'results': [result for result in results if result is not None],
+            'failed': [symbol for symbol, result in zip(symbols, results) if result is None],
+            'summary': summary
+        }
+
+    def sectors(self, body: Optional[Dict] = None) -> Dict:
+        sectors = (body or {}).get('sectors') or self.analyzer.config.get('sectors', {})
+        if not isinstance(sectors, dict):
+            raise RequestError("expected 'sectors' as an object of sector name to symbols")
+        return self.analyzer.get_sector_sentiment(sectors)
+
+    def stats(self) -> Dict:
+        stats = self.analyzer.instrumentation.stats()
+        stats['uptime_seconds'] = time.time() - self._started
+        return stats
+
+    def _handler(self):
+        service = self
+
+        class ServiceHandler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload):
+                body = json.dumps(payload, default=_json_default).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> Dict:
+                length = int(self.headers.get('Content-Length') or 0)
+                if not length:
+                    return {}
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    raise RequestError("request body is not valid JSON")
+                if not isinstance(body, dict):
+                    raise RequestError("request body must be a JSON object")
+                return body
+
+            def _dispatch(self, method: str):
+                url = urlparse(self.path)
+                parts = [part for part in url.path.split('/') if part]
+                endpoint = parts[0] if parts else ''
+                query = parse_qs(url.query)
+
+                routes = {
+                    ('POST', 'score'): lambda: service.score(self._body()),
+                    ('GET', 'symbol'): lambda: service.symbol(
+                        parts[1] if len(parts) > 1 else '', query.get('refresh', ['0'])[0] in ('1', 'true')
+                    ),
+                    ('POST', 'portfolio'): lambda: service.portfolio(self._body()),
+                    ('GET', 'sectors'): lambda: service.sectors(),
+                    ('POST', 'sectors'): lambda: service.sectors(self._body()),
+                    ('GET', 'stats'): service.stats,
+                    ('GET', 'health'): lambda: {'status': 'ok'},
+                }
+                route = routes.get((method, endpoint))
+                if route is None:
+                    self._send(404, {'error': f"no route for {method} {url.path}"})
+                    return
+
+                try:
+                    with service.analyzer.instrumentation.timer(f'service_{endpoint}'):
+                        payload = route()
+                except RequestError as e:
+                    self._send(400, {'error': str(e)})
+                    return
+                except Exception as e:
+                    service.logger.error(f"{method} {url.path} failed: {e}")
+                    service.analyzer.instrumentation.increment('service_errors')
+                    self._send(500, {'error': str(e)})
+                    return
+                self._send(200, payload)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return ServiceHandler
+
+    def start(self, warm: bool = True) -> ThreadingHTTPServer:
+        """Serve from a background thread; port 0 picks a free port"""
+        if warm:
+            self.warm_up()
+        self.server = _ServiceHTTPServer((self.host, self.port), self._handler())
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="sentiment-service", daemon=True).start()
+        self.logger.info(f"Sentiment service listening on http://{self.host}:{self.port}")
+        return self.server
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.batcher.close()
+        self.analyzer.instrumentation.unregister_collector('text_batcher')
+
+
+def build_service(analyzer, host: Optional[str] = None, port: Optional[int] = None) -> SentimentService:
+    """Create the service described by the analyzer's service config block"""
+    service_config = analyzer.config.get('service', {})
+    return SentimentService(
+        analyzer,
+        host=host or service_config.get('host', '127.0.0.1'),
+        port=port if port is not None else service_config.get('port', 8750),
+        max_batch=service_config.get('max_batch_texts', 256),
+        max_wait=service_config.get('max_wait_ms', 5) / 1000,
+        max_request_texts=service_config.get('max_request_texts', 10000)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from sentiment_analyzer import SentimentAnalyzer
+
+    parser = argparse.ArgumentParser(description="Serve sentiment analysis over local HTTP/JSON")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    analyzer = SentimentAnalyzer(args.config)
+    service = build_service(analyzer, args.host, args.port)
+    try:
+        service.serve_forever()
+    finally:
+        analyzer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,8 @@ Usage examples and main execution script
 
 import os
 import sys
-from sentiment_analyzer import SentimentAnalyzer
-import pandas as pd
+from sentiment_analyzer import SentimentAnalyzer, format_sentiment
+from monitor import SentimentMonitor
 import json
 
 def main():
@@ -27,9 +27,13 @@ def main():
     print(f"Company: {result['stock_context'].get('company_name', 'N/A')}")
     print(f"Current Price: ${result['stock_context'].get('current_price', 'N/A')}")
     print(f"Price Change: {result['stock_context'].get('price_change_pct', 'N/A')}%")
-    print(f"News Sentiment: {result['news_sentiment']['sentiment']:.3f} ({result['news_sentiment']['sentiment_label']})")
+    news = result['news_sentiment']
+    if news.get('degraded'):
+        print(f"News Sentiment: unavailable ({news['error']})")
+    else:
+        print(f"News Sentiment: {news['sentiment']:.3f} ({news.get('sentiment_label', 'neutral')})")
     print(f"Articles Analyzed: {result['news_sentiment']['articles_count']}")
-    print(f"Overall Sentiment: {result['weighted_sentiment']:.3f} ({result['sentiment_label']})")
+    print(f"Overall Sentiment: {format_sentiment(result['weighted_sentiment'])} ({result['sentiment_label']})")
     print(f"Recommendation: {result['recommendation']}")
     
     # Example 2: Portfolio analysis
@@ -40,7 +44,7 @@ def main():
     if not portfolio_df.empty:
         print("\nPortfolio Sentiment Summary:")
         for _, row in portfolio_df.iterrows():
-            print(f"{row['symbol']}: {row['weighted_sentiment']:.3f} ({row['sentiment_label']}) - {row['recommendation']}")
+            print(f"{row['symbol']}: {format_sentiment(row['weighted_sentiment'])} ({row['sentiment_label']}) - {row['recommendation']}")
     
     # Example 3: Sector analysis
     print("\n🏭 Sector Analysis Example:")
@@ -81,7 +85,7 @@ def interactive_mode():
                 result = analyzer.analyze_stock_sentiment(symbol)
                 
                 print(f"📊 {symbol} Analysis:")
-                print(f"  Sentiment Score: {result['weighted_sentiment']:.3f}")
+                print(f"  Sentiment Score: {format_sentiment(result['weighted_sentiment'])}")
                 print(f"  Sentiment Label: {result['sentiment_label']}")
                 print(f"  Recommendation: {result['recommendation']}")
                 print(f"  News Articles: {result['news_sentiment']['articles_count']}")
@@ -102,15 +106,59 @@ def save_analysis_report(symbols, output_file="sentiment_report.json"):
         except Exception as e:
             print(f"Error analyzing {symbol}: {e}")
     
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+    if output_file.endswith('.parquet'):
+        # Typed, flattened columns instead of nested JSON
+        from history_store import write_results_parquet
+        write_results_parquet(results, output_file)
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
     
     print(f"📄 Analysis report saved to {output_file}")
 
+def watch_mode(symbols=None):
+    """Continuously monitor the watchlist and configured sectors"""
+    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
+    analyzer = SentimentAnalyzer(config_path)
+    monitor = SentimentMonitor(analyzer, symbols=symbols or None)
+    
+    print(f"\n👀 Watching {len(monitor.symbols)} symbols every {monitor.interval}s (Ctrl+C to stop)")
+    
+    try:
+        for event in monitor.stream():
+            if event['type'] == 'symbol':
+                delta = f" ({event['delta']:+.3f})" if event['delta'] is not None else ""
+                missing = f" [{', '.join(event['degraded_sources'])} unavailable]" if event['degraded_sources'] else ""
+                print(f"[{event['timestamp']}] {event['symbol']}: {event['weighted_sentiment']:.3f}{delta} "
+                      f"{event['sentiment_label']} - {event['new_articles']} new articles, {event['new_posts']} new posts"
+                      f"{missing}")
+            else:
+                print(f"[{event['timestamp']}] 🏭 {event['sector']}: {event['average_sentiment']:.3f} "
+                      f"({event['sentiment_label']}) across {event['stocks_analyzed']} stocks")
+    except KeyboardInterrupt:
+        print("\n⏹️  Monitoring stopped")
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "--interactive":
             interactive_mode()
+        elif sys.argv[1] == "--watch":
+            watch_mode([s.upper() for s in sys.argv[2:]])
+        elif sys.argv[1] == "--score":
+            # Text-only path: no analyzer, providers or pandas are loaded
+            from score_text import main as score_main
+            sys.exit(score_main(sys.argv[2:]))
+        elif sys.argv[1] == "--stream":
+            # Bounded-memory scoring of large JSONL/CSV dumps with checkpoint/resume
+            from stream_scoring import main as stream_main
+            sys.exit(stream_main(sys.argv[2:]))
+        elif sys.argv[1] == "--serve":
+            # One warm analyzer behind a local HTTP/JSON API
+            from service import main as serve_main
+            sys.exit(serve_main(sys.argv[2:]))
+        elif sys.argv[1] == "--backtest":
+            from backtest import main as backtest_main
+            sys.exit(backtest_main(sys.argv[2:]))
         elif sys.argv[1] == "--report":
             symbols = sys.argv[2:] if len(sys.argv) > 2 else ["AAPL", "GOOGL", "MSFT"]
             save_analysis_report(symbols)
@@ -119,5 +167,10 @@ if __name__ == "__main__":
             print("  python stock_sentiment_main.py                 # Run examples")
             print("  python stock_sentiment_main.py --interactive   # Interactive mode")
             print("  python stock_sentiment_main.py --report AAPL GOOGL  # Generate report")
+            print("  python stock_sentiment_main.py --watch [AAPL ...]   # Continuous monitoring")
+            print("  python stock_sentiment_main.py --score headlines.txt  # Score texts only")
+            print("  python stock_sentiment_main.py --stream dump.jsonl scores.parquet  # Stream-score a large file")
+            print("  python stock_sentiment_main.py --serve [--port 8750]   # Local HTTP/JSON service")
+            print("  python stock_sentiment_main.py --backtest [--sweep]    # Backtest recommendation rules")
     else:
         main()
\ No newline at end of file
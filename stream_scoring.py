@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Streaming sentiment scoring of large JSONL, CSV and text dumps with checkpoint/resume
+Input is read lazily and scores are written incrementally, so memory stays bounded by the chunk size
+"""
+
+import argparse
+import csv
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from batch_scorer import SCORE_COLUMNS, ParallelScorer
+from scorers import ENGINES
+
+logger = logging.getLogger(__name__)
+
+INPUT_FORMATS = ('jsonl', 'csv', 'lines')
+OUTPUT_FORMATS = ('jsonl', 'csv', 'parquet')
+
+
+def detect_format(path: str, formats: Sequence[str]) -> str:
+    """Format from the file extension (.jsonl/.ndjson/.json, .csv, .txt, .parquet), ignoring .gz"""
+    name = path[:-3] if path.endswith('.gz') else path
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    detected = {'ndjson': 'jsonl', 'json': 'jsonl', 'txt': 'lines', 'text': 'lines'}.get(extension, extension)
+    if detected not in formats:
+        raise ValueError(f"Cannot tell the format of {path!r}; pass one of {', '.join(formats)}")
+    return detected
+
+
+def _open_binary(path: str):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+class RecordReader:
+    """Reads records lazily from a JSONL, CSV or plain-text file, tracking the byte offset after each
+
+    A record's text is its text fields joined with '. ' (as the analyzer joins titles and bodies);
+    records without text or that fail to parse are counted in skipped. Offsets are positions in the
+    uncompressed stream, so a reader can be restarted at any offset it reported (with the skipped
+    count at that offset, to keep counting from there).
+    """
+
+    def __init__(self, path: str, fmt: str, text_fields: Sequence[str] = ('text',),
+                 offset: int = 0, header: Optional[List[str]] = None, skipped: int = 0):
+        self.path = path
+        self.fmt = fmt
+        self.text_fields = list(text_fields)
+        self.offset = offset
+        self.header = header
+        self.skipped = skipped
+        self.total_bytes = None if path.endswith('.gz') else os.path.getsize(path)
+
+    def _lines(self, f) -> Iterator[str]:
+        for line in f:
+            self.offset += len(line)
+            yield line.decode('utf-8', errors='replace')
+
+    def _text(self, record: Dict) -> str:
+        parts = [str(record[field]).strip() for field in self.text_fields if record.get(field) not in (None, '')]
+        return ". ".join(part for part in parts if part)
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict, str]]:
+        """Yield (offset after the record, record, text)"""
+        with _open_binary(self.path) as f:
+            if self.offset:
+                f.seek(self.offset)
+            lines = self._lines(f)
+
+            if self.fmt == 'csv':
+                # Article bodies can exceed the default 128 KB field limit
+                csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+                # csv pulls lines only as it needs them, so the offset stays at the end of each row
+                rows = csv.reader(lines)
+                if self.header is None:
+                    self.header = next(rows, None)
+                    if self.header is None:
+                        return
+                for row in rows:
+                    record = dict(zip(self.header, row))
+                    text = self._text(record)
+                    if text:
+                        yield self.offset, record, text
+                    else:
+                        self.skipped += 1
+                return
+
+            for line in lines:
+                if not line.strip():
+                    continue
+                if self.fmt == 'lines':
+                    record = {'text': line.strip()}
+                    yield self.offset, record, record['text']
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.skipped += 1
+                    continue
+                text = self._text(record) if isinstance(record, dict) else ''
+                if text:
+                    yield self.offset, record, text
+                else:
+                    self.skipped += 1
+
+
+class _TextWriter:
+    """Appends rows to a CSV or JSONL file; committed state is the file size"""
+
+    def __init__(self, path: str, fmt: str, fields: List[str], state: Optional[Dict] = None):
+        self.path = path
+        self.fmt = fmt
+        self.fields = fields
+        resumed = state is not None
+        if resumed and (not os.path.exists(path) or os.path.getsize(path) < state['bytes']):
+            # Continuing would leave out every row written before the checkpoint
+            raise ValueError(f"Cannot resume: {path} is missing or shorter than its checkpoint "
+                             f"({state['bytes']} bytes); run again without resume")
+        self._file = open(path, 'r+b' if resumed else 'wb')
+        if resumed:
+            # Drop rows written after the last checkpoint; they are scored again
+            self._file.truncate(state['bytes'])
+            self._file.seek(state['bytes'])
+        self._text = io.TextIOWrapper(self._file, encoding='utf-8', newline='')
+        self._csv = csv.writer(self._text) if fmt == 'csv' else None
+        if self._csv is not None and not resumed:
+            self._csv.writerow(fields)
+
+    def write(self, columns: Dict[str, List]):
+        rows = zip(*(columns[field] for field in self.fields))
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            self._text.writelines(json.dumps(dict(zip(self.fields, row)), default=str) + "\n" for row in rows)
+
+    def commit(self) -> Optional[Dict]:
+        self._text.flush()
+        os.fsync(self._file.fileno())
+        return {'bytes': self._file.tell()}
+
+    def close(self) -> Dict:
+        state = self.commit()
+        self._text.close()
+        return state
+
+
+class _ParquetWriter:
+    """Writes a directory of Parquet part files; a part is committed once closed"""
+
+    def __init__(self, path: str, fields: List[str], types: Dict[str, str], part_rows: int = 100000,
+                 state: Optional[Dict] = None):
+        import pyarrow as pa
+
+        self.path = path
+        self.part_rows = part_rows
+        self.schema = pa.schema([
+            pa.field(field, {'int64': pa.int64(), 'float64': pa.float64()}.get(types.get(field), pa.string()))
+            for field in fields
+        ])
+        os.makedirs(path, exist_ok=True)
+        self.parts = state['parts'] if state else 0
+        missing = [part for part in range(self.parts)
+                   if not os.path.exists(os.path.join(path, f"part-{part:05d}.parquet"))]
+        if missing:
+            raise ValueError(f"Cannot resume: {len(missing)} committed part files are missing from {path}; "
+                             f"run again without resume")
+        # Remove parts from an interrupted run: uncommitted ones, or all of them when starting over
+        for part in glob.glob(os.path.join(path, 'part-*.parquet')):
+            if int(os.path.basename(part)[5:-8]) >= self.parts:
+                os.remove(part)
+        self._writer = None
+        self._rows = 0
+
+    def write(self, columns: Dict[str, List]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            self._writer = pq.ParquetWriter(part, self.schema)
+        arrays = []
+        for field in self.schema:
+            values = columns[field.name]
+            if field.type == pa.string():
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._rows += len(arrays[0])
+        if self._rows >= self.part_rows:
+            self._close_part()
+
+    def _close_part(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._rows = 0
+            self.parts += 1
+
+    def commit(self) -> Optional[Dict]:
+        # Only closed parts are readable, so a checkpoint is taken right after a part closes
+        return {'parts': self.parts} if self._writer is None else None
+
+    def close(self) -> Dict:
+        self._close_part()
+        return {'parts': self.parts}
+
+
+def open_writer(path: str, fmt: str, fields: List[str], types: Dict[str, str], part_rows: int = 100000,
+                state: Optional[Dict] = None):
+    if fmt == 'parquet':
+        return _ParquetWriter(path, fields, types, part_rows, state)
+    return _TextWriter(path, fmt, fields, state)
+
+
+class Checkpoint:
+    """Progress of one input -> output run, saved atomically next to the output"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def save(self, state: Dict):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class StreamScorer:
+    """Scores a large file chunk by chunk and writes each chunk's scores before reading much further
+
+    score_chunks is BatchScorer.iter_scores or ParallelScorer.iter_scores: it takes an iterable of
+    texts and yields score columns for consecutive chunks in input order.
+    """
+
+    def __init__(self, score_chunks: Callable, chunk_size: int = 2000, keep_fields: Sequence[str] = (),
+                 part_rows: int = 100000, progress_interval: float = 10.0,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        self.score_chunks = score_chunks
+        self.chunk_size = chunk_size
+        self.keep_fields = list(keep_fields)
+        self.part_rows = part_rows
+        self.progress_interval = progress_interval
+        self.progress = progress
+
+    def run(self, input_path: str, output_path: str, input_format: Optional[str] = None,
+            output_format: Optional[str] = None, text_fields: Sequence[str] = ('text',),
+            resume: bool = False, checkpoint_path: Optional[str] = None) -> Dict:
+        """Score input_path into output_path; with resume, continue from the last checkpoint
+
+        Returns counts and throughput for this run.
+        """
+        input_format = input_format or detect_format(input_path, INPUT_FORMATS)
+        output_format = output_format or detect_format(output_path, OUTPUT_FORMATS)
+        checkpoint = Checkpoint(checkpoint_path or f"{output_path.rstrip(os.sep)}.checkpoint.json")
+        fields = ['record'] + self.keep_fields + list(SCORE_COLUMNS) + ['sentiment_label']
+        types = {'record': 'int64', **{column: 'float64' for column in SCORE_COLUMNS}}
+
+        run = {'input': os.path.abspath(input_path), 'input_format': input_format,
+               'output_format': output_format, 'fields': fields}
+        state = checkpoint.load() if resume else None
+        if state is not None:
+            mismatched = [key for key, value in run.items() if state.get(key) != value]
+            if mismatched:
+                raise ValueError(f"Checkpoint {checkpoint.path} was written for a different run ({', '.join(mismatched)})")
+            if state.get('complete'):
+                logger.info(f"{output_path} is already complete ({state['records']} records)")
+                return {'records': 0, 'total_records': state['records'], 'skipped': state.get('skipped', 0),
+                        'seconds': 0.0,
+                        'texts_per_second': 0.0, 'resumed_from': state['records'], 'complete': True}
+            logger.info(f"Resuming {input_path} at record {state['records']} (byte {state['input_offset']})")
+        elif os.path.exists(checkpoint.path):
+            # Starting over: a stale checkpoint must not describe the new output
+            os.remove(checkpoint.path)
+
+        reader = RecordReader(input_path, input_format, text_fields, state['input_offset'] if state else 0,
+                              state.get('header') if state else None, state.get('skipped', 0) if state else 0)
+        writer = open_writer(output_path, output_format, fields, types, self.part_rows,
+                             state['writer'] if state else None)
+        resumed_from = state['records'] if state else 0
+        records = resumed_from
+        started = last_report = time.perf_counter()
+
+        # Records wait here while their texts are scored; at most the scorer's in-flight chunks
+        pending = deque()
+
+        def texts():
+            for offset, record, text in reader:
+                # The reader runs ahead of the writer, so skips are recorded as of each record
+                pending.append((offset, [record.get(field) for field in self.keep_fields], reader.skipped))
+                yield text
+
+        def save(writer_state: Dict, complete: bool = False):
+            checkpoint.save({**run, 'records': records, 'input_offset': offset, 'skipped': skipped,
+                             'header': reader.header, 'writer': writer_state, 'complete': complete})
+
+        offset = reader.offset
+        skipped = reader.skipped
+        try:
+            for scores in self.score_chunks(texts()):
+                count = len(scores['combined_score'])
+                chunk = [pending.popleft() for _ in range(count)]
+                offset, _, skipped = chunk[-1]
+                columns = {'record': list(range(records, records + count))}
+                for i, field in enumerate(self.keep_fields):
+                    columns[field] = [kept[i] for _, kept, _ in chunk]
+                for column in SCORE_COLUMNS:
+                    values = scores[column]
+                    columns[column] = values if output_format == 'parquet' else \
+                        np.where(np.isnan(values), None, values).tolist()
+                columns['sentiment_label'] = list(scores['sentiment_label'])
+                writer.write(columns)
+                records += count
+
+                writer_state = writer.commit()
+                if writer_state is not None:
+                    save(writer_state)
+
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    last_report = now
+                    self._report(records, resumed_from, now - started, offset, reader.total_bytes)
+        except BaseException:
+            # Leave the last checkpoint in place; everything after it is rescored on resume
+            writer.close()
+            raise
+
+        skipped = reader.skipped
+        save(writer.close(), complete=True)
+        elapsed = time.perf_counter() - started
+        summary = self._report(records, resumed_from, elapsed, offset, reader.total_bytes)
+        summary.update({'total_records': records, 'skipped': reader.skipped, 'complete': True})
+        logger.info(
+            f"Scored {summary['records']} records in {elapsed:.1f}s "
+            f"({summary['texts_per_second']:.0f} texts/sec), {reader.skipped} skipped -> {output_path}"
+        )
+        return summary
+
+    def _report(self, records: int, resumed_from: int, elapsed: float, offset: int,
+                total_bytes: Optional[int]) -> Dict:
+        scored = records - resumed_from
+        report = {
+            'records': scored,
+            'resumed_from': resumed_from,
+            'seconds': elapsed,
+            'texts_per_second': scored / elapsed if elapsed > 0 else 0.0,
+            'bytes_read': offset,
+            'fraction_done': offset / total_bytes if total_bytes else None
+        }
+        if self.progress:
+            self.progress(report)
+        else:
+            done = f" ({report['fraction_done']:.1%})" if report['fraction_done'] is not None else ""
+            logger.info(f"{records} records{done}, {report['texts_per_second']:.0f} texts/sec")
+        return report
+
+
+def build_stream_scorer(scorer, processes: int = 0, chunk_size: int = 2000,
+                        scoring_config: Optional[Dict] = None, **options) -> StreamScorer:
+    """StreamScorer over a BatchScorer, or over worker processes running its engine when processes > 1
+
+    A ParallelScorer created here should be closed by the caller via stream.parallel_scorer.
+    """
+    parallel = None
+    if processes and processes > 1:
+        parallel = ParallelScorer(processes, chunk_size, scorer.memo, scorer.engine.name, scoring_config)
+        score_chunks = parallel.iter_scores
+    else:
+        score_chunks = lambda texts: scorer.iter_scores(texts, chunk_size)
+    stream = StreamScorer(score_chunks, chunk_size, **options)
+    stream.parallel_scorer = parallel
+    return stream
+
+
+def _print_progress(report: Dict):
+    done = f" {report['fraction_done']:.1%}" if report['fraction_done'] is not None else ""
+    print(f"\r{report['resumed_from'] + report['records']:>12,} records{done} "
+          f"{report['texts_per_second']:>10,.0f} texts/sec", end="", file=sys.stderr, flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from score_text import build_scorer
+
+    parser = argparse.ArgumentParser(description="Stream-score a large JSONL, CSV or text file")
+    parser.add_argument('input', help="input file (.jsonl, .csv or .txt, optionally .gz)")
+    parser.add_argument('output', help="output file (.jsonl or .csv) or directory (.parquet)")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+    parser.add_argument('--input-format', choices=INPUT_FORMATS)
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS)
+    parser.add_argument('--text-fields', default='text',
+                        help="comma-separated fields joined into the scored text (e.g. title,selftext)")
+    parser.add_argument('--keep', default='', help="comma-separated input fields copied to the output (e.g. id,created_utc)")
+    parser.add_argument('--engine', choices=list(ENGINES), help="scoring engine (default: scoring.sources.text)")
+    parser.add_argument('--no-memo', dest='memo', action='store_false', help="do not use the score memo")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=0, help="worker processes (0 or 1 scores in-process)")
+    parser.add_argument('--part-rows', type=int, default=100000, help="rows per Parquet part file")
+    parser.add_argument('--resume', action='store_true', help="continue from the output's checkpoint")
+    parser.add_argument('--checkpoint', help="checkpoint path (default: <output>.checkpoint.json)")
+    parser.add_argument('--progress-interval', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    scoring_config = {}
+    if os.path.exists(args.config):
+        with open(args.config, 'r') as f:
+            scoring_config = json.load(f).get('scoring', {})
+    scorer = build_scorer(args.config, args.memo, args.engine)
+    stream = build_stream_scorer(
+        scorer, args.processes, args.chunk_size, scoring_config=scoring_config,
+        keep_fields=[field for field in args.keep.split(',') if field], part_rows=args.part_rows,
+        progress_interval=args.progress_interval, progress=_print_progress
+    )
+    try:
+        summary = stream.run(
+            args.input, args.output, args.input_format, args.output_format,
+            [field for field in args.text_fields.split(',') if field], args.resume, args.checkpoint
+        )
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrupted; rerun with --resume to continue", file=sys.stderr)
+        return 130
+    finally:
+        if stream.parallel_scorer is not None:
+            stream.parallel_scorer.close()
+    print(f"\n📄 {summary['total_records']} records scored into {args.output} "
+          f"({summary['texts_per_second']:.0f} texts/sec, {summary['skipped']} skipped)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
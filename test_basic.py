@@ -5,7 +5,7 @@ Basic test script to verify the sentiment analysis system works
 
 try:
     print("Testing imports...")
-    from sentiment_analyzer import SentimentAnalyzer
+    from sentiment_analyzer import SentimentAnalyzer, format_sentiment
     print("✅ SentimentAnalyzer imported successfully")
     
     print("\nInitializing analyzer...")
@@ -20,7 +20,7 @@ try:
     print("\nTesting stock sentiment analysis...")
     stock_result = analyzer.analyze_stock_sentiment('AAPL')
     print(f"✅ Stock analysis works for AAPL:")
-    print(f"   Sentiment: {stock_result['weighted_sentiment']:.3f} ({stock_result['sentiment_label']})")
+    print(f"   Sentiment: {format_sentiment(stock_result['weighted_sentiment'])} ({stock_result['sentiment_label']})")
     print(f"   Recommendation: {stock_result['recommendation']}")
     print(f"   News articles analyzed: {stock_result['news_sentiment']['articles_count']}")
     
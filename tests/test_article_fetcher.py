@@ -0,0 +1,116 @@
+import os
+import threading
+
+import pytest
+
+from article_fetcher import ArticleFetcher
+from cache import build_provider_cache
+from fixtures import FixtureArticleServer, Latency, article_html
+from sentiment_analyzer import SentimentAnalyzer
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+TITLE = "Acme beats earnings expectations"
+PARAGRAPHS = [
+    "Acme reported record revenue for the quarter, driven by strong demand across every region.",
+    "Analysts raised their price targets after the company lifted its full-year guidance.",
+    "Shares rallied in early trading as investors welcomed the upbeat outlook from management."
+]
+
+
+def make_fetcher(cache=None, **options):
+    cache = cache or build_provider_cache({'cache_duration_minutes': 15})
+    return ArticleFetcher(cache, lambda provider: None, **options)
+
+
+@pytest.fixture
+def server():
+    with FixtureArticleServer({'/acme': article_html(TITLE, PARAGRAPHS)}) as server:
+        yield server
+
+
+@pytest.fixture
+def slow_server():
+    with FixtureArticleServer({'/acme': article_html(TITLE, PARAGRAPHS)}, latency=Latency(0.5)) as server:
+        yield server
+
+
+def test_extracts_article_paragraphs_without_page_chrome(server):
+    fetcher = make_fetcher()
+    try:
+        text = fetcher.fetch_text(server.url('/acme'))
+    finally:
+        fetcher.close()
+    for paragraph in PARAGRAPHS:
+        assert paragraph in text
+    assert "Copyright" not in text
+    assert "Markets" not in text
+
+
+def test_text_is_cached_by_url(server):
+    fetcher = make_fetcher()
+    try:
+        first = fetcher.fetch_text(server.url('/acme'))
+        second = fetcher.fetch_many([server.url('/acme'), server.url('/acme'), None])
+    finally:
+        fetcher.close()
+    assert second == {server.url('/acme'): first}
+    assert server.requests == {'/acme': 1}
+
+
+def test_concurrent_requests_for_one_url_share_a_download(slow_server):
+    # Nothing is cached, so only in-flight coalescing keeps this to one download
+    fetcher = make_fetcher(build_provider_cache({'cache_duration_minutes': 0}))
+    url = slow_server.url('/acme')
+    texts = []
+    barrier = threading.Barrier(4)
+
+    def fetch():
+        barrier.wait()
+        texts.append(fetcher.fetch_text(url))
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        fetcher.close()
+    assert len(texts) == 4 and len(set(texts)) == 1
+    assert slow_server.requests == {'/acme': 1}
+
+
+def test_failed_and_timed_out_downloads_are_left_out(server, slow_server):
+    fetcher = make_fetcher(timeout=0.1)
+    try:
+        texts = fetcher.fetch_many([server.url('/missing'), slow_server.url('/acme'), server.url('/acme')])
+    finally:
+        fetcher.close()
+    assert list(texts) == [server.url('/acme')]
+
+
+def test_disallowed_hosts_are_not_fetched(server):
+    fetcher = make_fetcher(allowed_hosts=['reuters.com'])
+    try:
+        assert fetcher.fetch_many([server.url('/acme')]) == {}
+    finally:
+        fetcher.close()
+    assert server.requests == {}
+
+
+def test_news_items_fall_back_to_summary_when_the_body_fails(server, slow_server):
+    analyzer = SentimentAnalyzer(CONFIG)
+    analyzer.articles = make_fetcher(timeout=0.1)
+    news = [
+        {'title': TITLE, 'summary': "Quarterly results.", 'link': server.url('/acme')},
+        {'title': "Acme faces probe", 'summary': "Regulators are looking.", 'link': server.url('/missing')},
+        {'title': "Acme slides", 'summary': "Shares fell.", 'link': slow_server.url('/acme')}
+    ]
+    try:
+        items = analyzer._news_items('ACME', news)
+    finally:
+        analyzer.close()
+    assert items[0]['text'].startswith(f"{TITLE}. Quarterly results. ")
+    assert PARAGRAPHS[0] in items[0]['text']
+    assert items[1]['text'] == "Acme faces probe. Regulators are looking."
+    assert items[2]['text'] == "Acme slides. Shares fell."
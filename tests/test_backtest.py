@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from backtest import CODE_NAMES, TRADING_DAYS, Panel, observations, sweep, threshold_grid
+
+GRID = {
+    'strong_buy': [0.2, 0.3, 0.5],
+    'buy': [0.0, 0.1, 0.2],
+    'sell': [-0.2, -0.1, 0.0],
+    'strong_sell': [-0.5, -0.3, -0.2],
+}
+
+
+def random_panel(seed=11, days=60, symbols=7):
+    rng = np.random.default_rng(seed)
+    # Sentiment on a 0.05 grid, so many values sit exactly on a threshold
+    sentiment = np.round(rng.uniform(-0.7, 0.7, (days, symbols)) / 0.05) * 0.05
+    sentiment[rng.random((days, symbols)) < 0.15] = np.nan
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (days, symbols)), axis=0)
+    close[rng.random((days, symbols)) < 0.05] = np.nan
+    # Unchanged closes give price changes of exactly zero
+    close[10:12, 0] = close[9, 0]
+    dates = np.datetime64('2024-01-01') + np.arange(days)
+    return Panel(dates, [f"S{i}" for i in range(symbols)], sentiment, close)
+
+
+def naive_evaluate(panel, holding_days, thresholds, allow_short, cost_bps):
+    """Per-day loop over every symbol with the rules written out as in _get_stock_recommendation"""
+    days, symbols = panel.close.shape
+    period_returns = np.zeros(days)
+    classes = {code: [0, 0.0, 0] for code in CODE_NAMES}
+    trades = hits = 0
+    total = 0.0
+    for t in range(days):
+        returns = []
+        for s in range(symbols):
+            if t == 0 or t + holding_days >= days:
+                continue
+            sentiment, previous, today = panel.sentiment[t, s], panel.close[t - 1, s], panel.close[t, s]
+            ahead = panel.close[t + holding_days, s]
+            if np.isnan(sentiment) or np.isnan(previous) or np.isnan(today) or np.isnan(ahead):
+                continue
+            change = (today / previous - 1) * 100
+            forward = ahead / today - 1
+            if sentiment > thresholds['strong_buy'] and change > 0:
+                code = 2
+            elif sentiment > thresholds['buy']:
+                code = 1
+            elif sentiment < thresholds['strong_sell'] and change < 0:
+                code = -2
+            elif sentiment < thresholds['sell']:
+                code = -1
+            else:
+                code = 0
+            entry = classes[code]
+            entry[0] += 1
+            entry[1] += forward
+            entry[2] += (code > 0 and forward > 0) or (code < 0 and forward < 0)
+            if code > 0 or (code < 0 and allow_short):
+                side = 1 if code > 0 else -1
+                returns.append(side * forward - cost_bps / 10000)
+                trades += 1
+                hits += side * forward > 0
+                total += side * forward - cost_bps / 10000
+        if returns:
+            period_returns[t] = np.mean(returns)
+
+    metrics = dict(thresholds, trades=trades, hit_rate=hits / trades if trades else 0.0,
+                   mean_trade_return=total / trades if trades else 0.0)
+    for code, name in CODE_NAMES.items():
+        count, forward_sum, right_way = classes[code]
+        metrics[f'{name}_count'] = count
+        metrics[f'{name}_mean_forward_return'] = forward_sum / count if count else 0.0
+        if code != 0:
+            metrics[f'{name}_hit_rate'] = right_way / count if count else 0.0
+    period_returns = period_returns[::holding_days]
+    equity = np.cumprod(1 + period_returns)
+    std = period_returns.std()
+    metrics['total_return'] = equity[-1] - 1
+    metrics['sharpe'] = period_returns.mean() / std * np.sqrt(TRADING_DAYS / holding_days) if std > 0 else 0.0
+    metrics['max_drawdown'] = (1 - equity / np.maximum.accumulate(equity)).max()
+    return metrics
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+@pytest.mark.parametrize('holding_days,allow_short,cost_bps', [(1, True, 0.0), (3, False, 5.0)])
+def test_sweep_matches_a_per_day_loop(processes, holding_days, allow_short, cost_bps):
+    panel = random_panel()
+    obs = observations(panel, holding_days)
+    grid = threshold_grid(GRID)
+
+    frame = sweep(obs, grid, processes, allow_short=allow_short, cost_bps=cost_bps, chunk_size=8)
+
+    assert len(frame) == len(grid)
+    rows = {tuple(row[key] for key in GRID): row for row in frame.to_dict('records')}
+    for thresholds in grid:
+        row = rows[tuple(thresholds[key] for key in GRID)]
+        expected = naive_evaluate(panel, holding_days, thresholds, allow_short, cost_bps)
+        for name, value in expected.items():
+            assert row[name] == pytest.approx(value, rel=1e-9, abs=1e-12), (thresholds, name)
+    assert list(frame['sharpe']) == sorted(frame['sharpe'], reverse=True)
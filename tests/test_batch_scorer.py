@@ -0,0 +1,94 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from batch_scorer import SCORE_COLUMNS, BatchScorer, ParallelScorer, as_text, concat_scores
+from cache import ScoreMemo
+from sentiment_analyzer import SentimentAnalyzer
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+HEADLINES = [
+    "Apple beats estimates and raises guidance",
+    "Tesla shares plunge after the recall",
+    "Microsoft announces quarterly dividend",
+    "Not a great quarter for Nvidia, analysts are bearish",
+    "",
+    "   ",
+    "😀 to the moon!!!",
+]
+
+
+def mixed_corpus(size=97):
+    """Headlines with repeats, empty strings and non-str values, in a fixed shuffled order"""
+    extras = [None, float('nan'), 42, 3.5, "Apple beats estimates and raises guidance"]
+    base = [f"{HEADLINES[i % len(HEADLINES)]} #{i % 11}" for i in range(size)] + HEADLINES + extras
+    order = np.random.default_rng(5).permutation(len(base))
+    return [base[i] for i in order]
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return SentimentAnalyzer(CONFIG)
+
+
+def expected_rows(analyzer, corpus):
+    return [analyzer.analyze_text(text) for text in corpus]
+
+
+def assert_matches(columns, expected):
+    assert len(columns['combined_score']) == len(expected)
+    for i, row in enumerate(expected):
+        for column in SCORE_COLUMNS:
+            value = columns[column][i]
+            assert value == row[column] or (math.isnan(value) and math.isnan(row[column])), (i, column)
+        assert columns['sentiment_label'][i] == row['sentiment_label']
+
+
+def test_as_text_treats_missing_values_as_empty():
+    assert [as_text(value) for value in ("a", None, float('nan'), 42, 3.5)] == ["a", "", "", "42", "3.5"]
+
+
+@pytest.mark.parametrize('processes', [1, 3])
+def test_parallel_scores_match_analyze_text_in_input_order(analyzer, processes):
+    corpus = mixed_corpus()
+    expected = expected_rows(analyzer, corpus)
+
+    # Small chunks keep more chunks pending than the pool holds, so ordering is exercised
+    with ParallelScorer(processes, chunk_size=7) as scorer:
+        chunks = list(scorer.iter_scores(iter(corpus)))
+
+    assert [len(chunk['combined_score']) for chunk in chunks[:-1]] == [7] * (len(chunks) - 1)
+    assert_matches(concat_scores(chunks), expected)
+    assert scorer.last_run['texts'] == len(corpus)
+
+
+def test_parallel_scores_with_memo_match_and_fill_it(analyzer):
+    corpus = mixed_corpus(40)
+    expected = expected_rows(analyzer, corpus)
+    memo = ScoreMemo()
+
+    with ParallelScorer(2, chunk_size=9, memo=memo) as scorer:
+        first = scorer.score(corpus)
+        second = scorer.score(corpus)
+
+    assert_matches(first, expected)
+    assert_matches(second, expected)
+    assert memo.stats()['hits'] > 0
+
+
+def test_batch_scorer_matches_analyze_text(analyzer):
+    corpus = mixed_corpus(30)
+
+    assert_matches(BatchScorer().score(corpus), expected_rows(analyzer, corpus))
+
+
+def test_analyze_batch_keeps_order_and_text(analyzer):
+    corpus = ["Great, excellent quarter", None, "Terrible, awful quarter", "Great, excellent quarter"]
+
+    frame = analyzer.analyze_batch(corpus, processes=0)
+
+    assert list(frame['text']) == ["Great, excellent quarter", "", "Terrible, awful quarter", "Great, excellent quarter"]
+    assert frame['combined_score'][0] == frame['combined_score'][3] > 0 > frame['combined_score'][2]
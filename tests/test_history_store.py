@@ -0,0 +1,65 @@
+import glob
+import json
+import os
+
+from history_store import COMPACTION_MANIFEST, HistoryStore
+
+
+def make_result(symbol, minute):
+    return {
+        'symbol': symbol,
+        'timestamp': f'2024-01-15T10:{minute:02d}:00',
+        'weighted_sentiment': minute / 100,
+        'sentiment_label': 'neutral',
+        'news_sentiment': {'sentiment': 0.1, 'articles_count': 3},
+        'social_sentiment': {'sentiment': 0.0, 'posts_count': 0},
+        'stock_context': {},
+    }
+
+
+def filled_store(path, flushes=3):
+    store = HistoryStore(str(path), flush_rows=1000)
+    for i in range(flushes):
+        store.extend([make_result('AAPL', i), make_result('MSFT', i)])
+        store.flush()
+    return store
+
+
+def partition_files(path, symbol='AAPL'):
+    return sorted(os.path.basename(f) for f in glob.glob(os.path.join(str(path), 'date=*', f'symbol={symbol}', '*')))
+
+
+def test_compact_merges_each_partition_into_one_file(tmp_path):
+    store = filled_store(tmp_path)
+
+    assert store.compact() == 2
+
+    files = partition_files(tmp_path)
+    assert len(files) == 1 and files[0].endswith('-compacted.parquet')
+    frame = store.query(columns=['symbol', 'weighted_sentiment'])
+    assert sorted(frame['weighted_sentiment'][frame['symbol'] == 'AAPL']) == [0.0, 0.01, 0.02]
+    assert len(frame) == 6
+
+
+def test_interrupted_compaction_is_finished_without_duplicating_rows(tmp_path):
+    store = filled_store(tmp_path)
+    partition = os.path.dirname(glob.glob(os.path.join(str(tmp_path), 'date=*', 'symbol=AAPL', '*.parquet'))[0])
+    sources = {name: open(os.path.join(partition, name), 'rb').read() for name in os.listdir(partition)}
+    store.compact()
+    merged = partition_files(tmp_path)[0]
+
+    # The state a crash leaves right after the manifest is saved: sources in place, merged file hidden
+    os.rename(os.path.join(partition, merged), os.path.join(partition, f".{merged}"))
+    for name, data in sources.items():
+        with open(os.path.join(partition, name), 'wb') as f:
+            f.write(data)
+    with open(os.path.join(partition, COMPACTION_MANIFEST), 'w') as f:
+        json.dump({'target': merged, 'sources': sorted(sources)}, f)
+
+    assert len(store.query(symbols=['AAPL'])) == 3
+
+    reopened = HistoryStore(str(tmp_path))
+
+    assert partition_files(tmp_path) == [merged]
+    assert len(reopened.query(symbols=['AAPL'])) == 3
+    assert len(reopened.query()) == 6
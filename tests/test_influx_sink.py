@@ -0,0 +1,169 @@
+import math
+import time
+
+import pytest
+
+import influx_sink
+from influx_sink import FileBackend, InfluxSink, result_to_line
+
+
+def make_result(symbol="AAPL", **overrides):
+    result = {
+        'symbol': symbol,
+        'timestamp': '2024-01-15T10:30:00',
+        'weighted_sentiment': 0.25,
+        'news_sentiment': {'sentiment': 0.3, 'confidence': 0.8, 'articles_count': 8},
+        'social_sentiment': {'sentiment': 0.1, 'confidence': 0.5, 'posts_count': 12},
+        'stock_context': {'current_price': 185.5, 'price_change_pct': 2.1, 'volume': 1000}
+    }
+    result.update(overrides)
+    return result
+
+
+def read_lines(path):
+    if not path.exists():
+        return []
+    return [line for line in path.read_text().splitlines() if line]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class FlakyBackend(FileBackend):
+    """FileBackend whose first failures writes raise"""
+
+    def __init__(self, path, failures):
+        super().__init__(path)
+        self.failures = failures
+        self.attempts = 0
+
+    def write(self, lines):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("influx down")
+        super().write(lines)
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(influx_sink.time, 'sleep', delays.append)
+    return delays
+
+
+def test_tags_escape_spaces_commas_and_equals():
+    line = result_to_line(make_result("BRK B"), sector="Tech, Media=Big")
+    assert line.startswith("stock_sentiment,symbol=BRK\\ B,sector=Tech\\,\\ Media\\=Big ")
+
+
+def test_counts_are_integers_and_timestamp_is_nanoseconds():
+    line = result_to_line(make_result())
+    measurement_and_tags, fields, timestamp = line.split(" ")
+    assert measurement_and_tags == "stock_sentiment,symbol=AAPL"
+    assert "articles_count=8i" in fields.split(",")
+    assert "volume=1000i" in fields.split(",")
+    assert "weighted_sentiment=0.25" in fields.split(",")
+    assert len(timestamp) == 19
+
+
+def test_none_nan_and_placeholder_fields_are_skipped():
+    result = make_result(
+        weighted_sentiment=None,
+        news_sentiment={'sentiment': math.nan, 'confidence': 0.0, 'articles_count': 0},
+        stock_context={'current_price': 'N/A', 'volume': None}
+    )
+    fields = result_to_line(result).split(" ")[1].split(",")
+    names = {field.split("=")[0] for field in fields}
+    assert 'weighted_sentiment' not in names
+    assert 'news_sentiment' not in names
+    assert 'price' not in names
+    assert 'volume' not in names
+    assert 'news_confidence=0.0' in fields
+
+
+def test_result_without_numeric_fields_produces_no_line():
+    assert result_to_line({'symbol': 'AAPL', 'timestamp': '2024-01-15T10:30:00'}) is None
+
+
+def test_batch_size_triggers_flush(tmp_path):
+    path = tmp_path / "points.lp"
+    sink = InfluxSink(FileBackend(str(path)), batch_size=3, flush_interval=60)
+    try:
+        for symbol in ("A", "B"):
+            sink.submit(make_result(symbol))
+        time.sleep(0.1)
+        assert read_lines(path) == []
+
+        sink.submit(make_result("C"))
+        assert wait_for(lambda: len(read_lines(path)) == 3)
+    finally:
+        sink.close()
+    assert sink.stats['written'] == 3
+
+
+def test_flush_interval_writes_partial_batches(tmp_path):
+    path = tmp_path / "points.lp"
+    sink = InfluxSink(FileBackend(str(path)), batch_size=500, flush_interval=0.05)
+    try:
+        sink.submit(make_result("A"))
+        assert wait_for(lambda: len(read_lines(path)) == 1)
+    finally:
+        sink.close()
+
+
+def test_close_flushes_remaining_points_with_sectors(tmp_path):
+    path = tmp_path / "points.lp"
+    sink = InfluxSink(FileBackend(str(path)), sectors={'Tech': ['AAPL']}, batch_size=500, flush_interval=60)
+    sink.submit(make_result("AAPL"))
+    sink.submit(make_result("XOM"))
+    sink.close()
+    lines = read_lines(path)
+    assert len(lines) == 2
+    assert lines[0].startswith("stock_sentiment,symbol=AAPL,sector=Tech ")
+    assert lines[1].startswith("stock_sentiment,symbol=XOM ")
+
+
+def test_symbol_in_several_sectors_gets_a_point_per_sector(tmp_path):
+    path = tmp_path / "points.lp"
+    sink = InfluxSink(FileBackend(str(path)), sectors={'Tech': ['AAPL', 'MSFT'], 'Consumer': ['AAPL']},
+                      batch_size=500, flush_interval=60)
+    sink.submit(make_result("AAPL"))
+    sink.submit(make_result("MSFT"))
+    sink.close()
+    tags = sorted(line.split(" ")[0] for line in read_lines(path))
+    assert tags == [
+        "stock_sentiment,symbol=AAPL,sector=Consumer",
+        "stock_sentiment,symbol=AAPL,sector=Tech",
+        "stock_sentiment,symbol=MSFT,sector=Tech",
+    ]
+    assert sink.stats['written'] == 3
+
+
+def test_failed_writes_are_retried(tmp_path, no_sleep):
+    path = tmp_path / "points.lp"
+    backend = FlakyBackend(str(path), failures=2)
+    sink = InfluxSink(backend, batch_size=500, flush_interval=60, max_retries=3)
+    sink.submit(make_result("A"))
+    sink.close()
+    assert backend.attempts == 3
+    assert len(no_sleep) == 2
+    assert len(read_lines(path)) == 1
+    assert sink.stats == {'written': 1, 'dropped': 0, 'failed_batches': 0}
+
+
+def test_batch_is_dropped_after_max_retries(tmp_path, no_sleep):
+    path = tmp_path / "points.lp"
+    backend = FlakyBackend(str(path), failures=10)
+    sink = InfluxSink(backend, batch_size=500, flush_interval=60, max_retries=2)
+    sink.submit(make_result("A"))
+    sink.submit(make_result("B"))
+    sink.close()
+    assert backend.attempts == 3
+    assert read_lines(path) == []
+    assert sink.stats == {'written': 0, 'dropped': 2, 'failed_batches': 1}
@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+from near_duplicates import NearDuplicateIndex, collapse_clusters, normalize
+from sentiment_analyzer import SentimentAnalyzer
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+BASE = "Acme Corp beats third quarter estimates as cloud revenue climbs and margins widen"
+VARIANT = "Acme Corp beats third quarter estimates as cloud revenue climbs and margins widen - Reuters"
+FLIPPED = "Acme Corp misses third quarter estimates as cloud revenue climbs and margins widen"
+
+
+def estimated_similarity(index, a, b):
+    return np.count_nonzero(index.signature(a) == index.signature(b)) / index.num_perm
+
+
+def test_copies_differing_in_case_and_punctuation_share_a_cluster():
+    index = NearDuplicateIndex()
+
+    clusters = index.assign([BASE, BASE.upper() + "!!", "  " + BASE.replace(" ", "   ")])
+
+    assert len(set(clusters)) == 1
+    assert index.stats()['exact_hits'] == 2
+
+
+@pytest.mark.parametrize('text', [VARIANT, FLIPPED])
+def test_clustering_at_the_threshold_boundary(text):
+    similarity = estimated_similarity(NearDuplicateIndex(), BASE, text)
+    assert 0.5 < similarity < 1
+
+    # Exactly at the threshold the texts are one story; one band of agreement above it, two
+    at_threshold = NearDuplicateIndex(threshold=similarity)
+    above = NearDuplicateIndex(threshold=similarity + 1 / at_threshold.num_perm)
+
+    assert len(set(at_threshold.assign([BASE, text]))) == 1
+    assert len(set(above.assign([BASE, text]))) == 2
+
+
+def test_unrelated_texts_get_their_own_clusters():
+    index = NearDuplicateIndex()
+
+    clusters = index.assign([BASE, "Regulators open a probe into Globex accounting", "Initech to cut 500 jobs"])
+
+    assert len(set(clusters)) == 3
+
+
+def test_flipped_word_in_the_same_cluster_keeps_its_own_polarity():
+    analyzer = SentimentAnalyzer(CONFIG)
+    index = analyzer.near_duplicates
+    assert estimated_similarity(index, BASE, FLIPPED) >= index.threshold
+
+    scores, clusters = analyzer._score_clustered([BASE, FLIPPED, BASE.lower()], 'news')
+
+    assert clusters[0] == clusters[1] == clusters[2]
+    assert scores[0] == scores[2] == analyzer.analyze_text(BASE, 'news')['combined_score']
+    assert scores[1] == analyzer.analyze_text(FLIPPED, 'news')['combined_score']
+    # Inheriting the representative's score would have hidden the negative headline
+    assert scores[1] < scores[0]
+
+
+def test_each_wording_is_scored_once_across_batches():
+    index = NearDuplicateIndex()
+    scored = []
+
+    def score(texts):
+        scored.extend(texts)
+        return [len(text) for text in texts]
+
+    texts = [BASE, VARIANT, BASE + "."]
+    first = index.scores(index.assign(texts), texts, score)
+    second = index.scores(index.assign(texts), texts, score)
+
+    assert scored == [BASE, VARIANT]
+    assert list(first) == list(second) == [len(BASE), len(VARIANT), len(BASE)]
+    # Another engine has its own scores
+    index.scores(index.assign(texts), texts, score, engine='lexicon')
+    assert len(scored) == 4
+
+
+def test_collapse_clusters_keeps_the_heaviest_copy():
+    scores = [0.5, -0.4, 0.1, 0.3, 0.2]
+    weights = [1.0, 3.0, 2.0, 3.0, 0.5]
+    clusters = [7, 7, 2, 7, 9]
+
+    collapsed_scores, collapsed_weights = collapse_clusters(scores, weights, clusters)
+
+    # Clusters in id order; cluster 7's tie at weight 3 goes to its first copy
+    assert list(collapsed_scores) == [0.1, -0.4, 0.2]
+    assert list(collapsed_weights) == [2.0, 3.0, 0.5]
+
+
+def test_normalize_collapses_punctuation_and_whitespace():
+    assert normalize("  Acme's  $ACME -- beats!\n") == "acme s $acme beats"
@@ -0,0 +1,286 @@
+import logging
+import os
+
+import pytest
+
+from fixtures import FaultInjector, Latency, ProviderFault, generate_fixtures
+from provider_access import (
+    AdaptiveRate, CircuitBreaker, ProviderAccess, ProviderUnavailable, build_provider_access
+)
+from rate_limiter import TokenBucket
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+class FakeClock:
+    """Monotonic clock that only moves when sleep is called"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_access(clock, rate=None, breaker=None, bucket_rate=None, **kwargs):
+    bucket = TokenBucket(bucket_rate, clock=clock, sleep=clock.sleep)
+    return ProviderAccess(
+        'yahoo', bucket, rate(bucket) if rate else None, breaker or CircuitBreaker(clock=clock),
+        backoff_base=0.0, sleep=clock.sleep, clock=clock, **kwargs
+    )
+
+
+def test_adaptive_rate_starts_at_and_never_exceeds_the_configured_rate(clock):
+    bucket = TokenBucket(4.0, clock=clock, sleep=clock.sleep)
+    rate = AdaptiveRate(bucket, min_rate=0.5, max_rate=4.0)
+
+    for _ in range(20):
+        rate.on_success(latency=0.1)
+
+    assert rate.rate == bucket.rate == 4.0
+
+
+def test_adaptive_rate_steps_down_on_429_and_pauses_for_retry_after(clock):
+    bucket = TokenBucket(4.0, clock=clock, sleep=clock.sleep)
+    rate = AdaptiveRate(bucket, min_rate=0.5, max_rate=4.0)
+    bucket.acquire()
+
+    rate.on_throttled(pause=5.0)
+
+    assert rate.rate == bucket.rate == 2.0
+    bucket.acquire()
+    # The whole Retry-After passes before the next token, which then accrues at the halved rate
+    assert clock.now == pytest.approx(5.5)
+
+
+def test_adaptive_rate_slows_on_slow_responses_and_recovers_to_the_configured_rate(clock):
+    bucket = TokenBucket(4.0, clock=clock, sleep=clock.sleep)
+    rate = AdaptiveRate(bucket, min_rate=0.5, max_rate=4.0, target_latency=1.0)
+
+    rate.on_success(latency=3.0)
+    assert rate.rate == pytest.approx(3.2)
+    for _ in range(3):
+        rate.on_throttled(pause=0.0)
+    assert rate.rate == 0.5
+
+    for _ in range(11):
+        rate.on_success(latency=0.1)
+    assert rate.rate == 4.0
+
+
+def test_429_through_provider_access_cuts_the_rate_and_honours_retry_after(clock):
+    responses = iter([ProviderFault('yahoo', 429, retry_after=3.0), 'ok'])
+
+    def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    access = make_access(clock, rate=lambda bucket: AdaptiveRate(bucket, 0.5, 2.0), bucket_rate=2.0)
+
+    assert access.call(request) == 'ok'
+    # Halved by the 429, then one recovery step for the successful retry
+    assert access.rate.rate == pytest.approx(1.0 + access.rate.step)
+    assert access.stats()['rate_limited'] == 1
+    # The retry's wait overlaps the bucket pause; the retry then waits one interval at the halved rate
+    assert clock.now == pytest.approx(3.0 + 1.0)
+
+
+def test_unlimited_provider_stays_unlimited_but_pauses_for_retry_after(clock):
+    registry = build_provider_access({'rate_limit_delay': 0}, {}, providers=('yahoo',))
+    assert registry['yahoo'].rate is None
+    assert registry['yahoo'].bucket.rate is None
+
+    access = make_access(clock)
+    responses = iter([ProviderFault('yahoo', 429, retry_after=2.0), 'ok'])
+
+    def request():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert access.call(request) == 'ok'
+    assert access.bucket.rate is None
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_configured_rate_is_the_ceiling():
+    registry = build_provider_access({'rate_limit_delay': 0.5}, {'max_rate_limit_delay': 4}, providers=('yahoo',))
+    rate = registry['yahoo'].rate
+
+    assert rate.max_rate == rate.rate == 2.0
+    assert rate.min_rate == 0.25
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and breaker.opened == 1
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == 'open' and breaker.opened == 2
+    assert breaker.retry_in() == 10
+
+
+def test_open_breaker_rejects_without_calling_the_provider(clock):
+    access = make_access(clock, breaker=CircuitBreaker(failure_threshold=1, recovery_seconds=60, clock=clock),
+                         max_retries=0)
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise ProviderFault('yahoo', 503)
+
+    with pytest.raises(ProviderFault):
+        access.call(request)
+    with pytest.raises(ProviderUnavailable):
+        access.call(request)
+
+    assert len(calls) == 1
+    assert access.stats()['rejected'] == 1
+
+
+def test_transient_errors_are_retried_with_backoff(clock):
+    access = make_access(clock, max_retries=3)
+    calls = []
+
+    def request():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ProviderFault('yahoo', 503)
+        return 'ok'
+
+    assert access.call(request) == 'ok'
+    assert len(calls) == 3
+    assert access.stats()['retries'] == 2
+
+
+@pytest.mark.parametrize('error', [ValueError("bad symbol"), ProviderFault('yahoo', 404), KeyError('news')])
+def test_errors_retrying_cannot_fix_are_raised_at_once(clock, error):
+    access = make_access(clock, max_retries=3)
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise error
+
+    with pytest.raises(type(error)):
+        access.call(request)
+
+    assert len(calls) == 1
+    assert clock.sleeps == []
+    assert access.breaker.state == 'closed'
+    assert access.stats()['retries'] == 0
+
+
+def test_errors_retrying_cannot_fix_leave_the_breaker_unchanged(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30, clock=clock)
+    access = make_access(clock, breaker=breaker, max_retries=0)
+
+    def fail(error):
+        def request():
+            raise error
+        return request
+
+    with pytest.raises(ProviderFault):
+        access.call(fail(ProviderFault('yahoo', 503)))
+    with pytest.raises(ProviderFault):
+        access.call(fail(ProviderFault('yahoo', 404)))
+    # The 404 did not reset the count, so the next 503 opens the breaker
+    assert breaker.state == 'closed' and breaker.failures == 1
+    with pytest.raises(ProviderFault):
+        access.call(fail(ProviderFault('yahoo', 503)))
+    assert breaker.state == 'open'
+
+    # A bad request as the half-open probe neither closes nor reopens, and frees the probe slot
+    clock.now += 30
+    with pytest.raises(ValueError):
+        access.call(fail(ValueError("bad symbol")))
+    assert breaker.state == 'half_open' and breaker.failures == 2
+    assert access.call(lambda: 'ok') == 'ok'
+    assert breaker.state == 'closed'
+
+
+@pytest.fixture
+def offline_analyzer(caplog):
+    from benchmark import build_offline_analyzer
+
+    caplog.set_level(logging.CRITICAL)
+    faults = FaultInjector(seed=7)
+    analyzer = build_offline_analyzer(generate_fixtures(['AAA', 'BBB'], seed=7), Latency(), CONFIG, faults)
+    return analyzer, faults
+
+
+def test_reddit_outage_degrades_social_and_keeps_news(offline_analyzer):
+    analyzer, faults = offline_analyzer
+    faults.start_outage('reddit')
+
+    result = analyzer.analyze_stock_sentiment('AAA')
+
+    assert result['degraded'] and result['degraded_sources'] == ['social']
+    assert result['social_sentiment']['sentiment'] is None
+    assert result['sentiment_label'] != 'unavailable'
+    # The news weight is scaled up to the combined news and social weight
+    weights = analyzer.config['sentiment_weights']
+    expected = result['news_sentiment']['sentiment'] * (weights['news'] + weights['social'])
+    assert result['weighted_sentiment'] == pytest.approx(expected)
+    assert faults.stats()['outage'] > 0
+
+
+def test_outage_of_every_source_reports_no_sentiment(offline_analyzer):
+    analyzer, faults = offline_analyzer
+    faults.start_outage('yahoo')
+    faults.start_outage('reddit')
+
+    result = analyzer.analyze_stock_sentiment('AAA')
+
+    assert result['weighted_sentiment'] is None
+    assert result['sentiment_label'] == 'unavailable'
+    assert set(result['degraded_sources']) == {'news', 'social', 'context'}
+    assert analyzer.summarize_portfolio([result])['stocks_analyzed'] == 0
+
+
+def test_degraded_results_are_recomputed_after_recovery(offline_analyzer):
+    analyzer, faults = offline_analyzer
+    faults.start_outage('reddit')
+    assert analyzer.analyze_stock_sentiment('BBB')['degraded']
+
+    faults.end_outage('reddit')
+    analyzer.providers['reddit'].breaker.record_success()
+
+    assert not analyzer.analyze_stock_sentiment('BBB')['degraded']
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from cache import MemoryCacheBackend, ProviderCache
+from reddit_client import RedditFetcher, symbol_pattern
+
+
+class FakeReddit:
+    """PRAW stand-in that records each search's subreddit and sort"""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.searches = []
+
+    def subreddit(self, name):
+        def search(query, limit=25, sort='relevance', time_filter='week'):
+            self.searches.append((name, sort))
+            return self.posts[:limit]
+        return SimpleNamespace(search=search)
+
+
+def post(post_id, title):
+    return SimpleNamespace(id=post_id, subreddit='stocks', title=title,
+                           selftext="A long enough body for the post filter", score=1, created_utc=0.0)
+
+
+def make_fetcher(reddit, **kwargs):
+    cache = ProviderCache(MemoryCacheBackend(), {'reddit': 60}, 60)
+    return RedditFetcher(reddit, cache, lambda provider, call: call(), subreddits=['stocks', 'investing'], **kwargs)
+
+
+def test_cashtags_match_in_any_case_and_bare_tickers_only_in_uppercase():
+    pattern = symbol_pattern('AAPL')
+
+    for text in ("AAPL beats", "$AAPL beats", "$aapl beats", "long $Aapl."):
+        assert pattern.search(text), text
+    for text in ("aapl beats", "AAPLX beats", "$AAPLX"):
+        assert not pattern.search(text), text
+
+
+def test_combined_demux_keeps_lowercase_cashtags():
+    reddit = FakeReddit([post('1', "$aapl to the moon"), post('2', "MSFT earnings")])
+    fetcher = make_fetcher(reddit)
+
+    seeded = fetcher.prefetch(['AAPL', 'MSFT'])
+
+    assert seeded == {'AAPL', 'MSFT'}
+    assert [p['id'] for p in fetcher.fetch_posts('AAPL')] == ['1']
+    fetcher.close()
+
+
+def test_combined_and_per_subreddit_searches_use_the_configured_sort():
+    reddit = FakeReddit([post('1', "AAPL beats")])
+    fetcher = make_fetcher(reddit, sort='top')
+
+    fetcher.prefetch(['AAPL', 'MSFT'])
+    fetcher.fetch_posts('GOOGL')
+
+    assert {sort for _, sort in reddit.searches} == {'top'}
+    assert {name for name, _ in reddit.searches} == {'stocks+investing', 'stocks', 'investing'}
+    fetcher.close()
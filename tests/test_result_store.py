@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from cache import ResultStore
+from fixtures import FaultInjector, Latency, generate_fixtures
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+CALLERS = 8
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return condition()
+
+
+def call_concurrently(store, compute, key="AAPL"):
+    """Start CALLERS threads on one key; compute is released once every other caller is waiting"""
+    release = threading.Event()
+    outcomes = [None] * CALLERS
+
+    def blocking_compute():
+        release.wait(5)
+        return compute()
+
+    def caller(i):
+        try:
+            outcomes[i] = ('value', store.get_or_compute(key, blocking_compute))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: store.stats()['coalesced'] == CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_computation():
+    store = ResultStore(60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'symbol': 'AAPL'}
+
+    outcomes = call_concurrently(store, compute)
+
+    assert len(calls) == 1
+    assert all(kind == 'value' for kind, _ in outcomes)
+    assert len({id(value) for _, value in outcomes}) == 1
+    assert store.stats() == {'hits': 0, 'computed': 1, 'coalesced': CALLERS - 1, 'stored': 1, 'inflight': 0}
+
+    assert store.get_or_compute("AAPL", compute) is outcomes[0][1]
+    assert len(calls) == 1 and store.stats()['hits'] == 1
+
+
+def test_failed_computation_reaches_every_waiter_and_is_not_stored():
+    store = ResultStore(60)
+    error = RuntimeError("provider down")
+
+    def compute():
+        raise error
+
+    outcomes = call_concurrently(store, compute)
+
+    assert outcomes == [('error', error)] * CALLERS
+    assert store.stats()['stored'] == 0 and store.stats()['inflight'] == 0
+    assert store.get_or_compute("AAPL", lambda: "recovered") == "recovered"
+
+
+def test_force_and_expiry_recompute():
+    store = ResultStore(0)
+    values = iter(range(10))
+
+    assert store.get_or_compute("AAPL", lambda: next(values)) == 0
+    assert store.get_or_compute("AAPL", lambda: next(values)) == 1
+
+    store.ttl_seconds = 60
+    assert store.get_or_compute("AAPL", lambda: next(values)) == 2
+    assert store.get_or_compute("AAPL", lambda: next(values)) == 2
+    assert store.get_or_compute("AAPL", lambda: next(values), force=True) == 3
+
+
+@pytest.fixture
+def analyzer(caplog):
+    from benchmark import build_offline_analyzer
+
+    caplog.set_level(logging.CRITICAL)
+    faults = FaultInjector(seed=3)
+    analyzer = build_offline_analyzer(generate_fixtures(['AAA'], seed=3), Latency(), CONFIG, faults)
+    analyzer.results = ResultStore(300)
+    return analyzer, faults
+
+
+def test_degraded_result_is_recomputed_on_the_next_call(analyzer):
+    analyzer, faults = analyzer
+    faults.start_outage('reddit')
+
+    assert analyzer.analyze_stock_sentiment('AAA')['degraded']
+    assert analyzer.analyze_stock_sentiment('AAA')['degraded']
+    assert analyzer.results.stats()['computed'] == 2
+
+    faults.end_outage('reddit')
+    analyzer.providers['reddit'].breaker.record_success()
+    healthy = analyzer.analyze_stock_sentiment('AAA')
+
+    assert not healthy['degraded']
+    assert analyzer.analyze_stock_sentiment('AAA') is healthy
+    assert analyzer.results.stats()['computed'] == 3
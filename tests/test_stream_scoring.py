@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from batch_scorer import BatchScorer
+from stream_scoring import StreamScorer
+
+HEADLINES = [
+    "Apple beats estimates and raises guidance",
+    "Tesla shares plunge after the recall",
+    "Microsoft announces quarterly dividend",
+    "Nvidia rallies to an all time high",
+]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def chunks(scorer, chunk_size=5, fail_after=None):
+    """score_chunks for StreamScorer that dies after fail_after chunks, like a killed process"""
+    def score_chunks(texts):
+        for i, columns in enumerate(scorer.iter_scores(texts, chunk_size)):
+            if fail_after is not None and i == fail_after:
+                raise Interrupted()
+            yield columns
+    return score_chunks
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return BatchScorer()
+
+
+@pytest.fixture
+def jsonl_input(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    with open(path, 'w') as f:
+        for i in range(53):
+            if i % 9 == 4:
+                f.write("{not json\n")
+            elif i % 13 == 6:
+                f.write(json.dumps({'id': i, 'title': ''}) + "\n")
+            else:
+                f.write(json.dumps({'id': i, 'title': f"{HEADLINES[i % 4]} #{i}"}) + "\n")
+    return str(path)
+
+
+def run(scorer, input_path, output_path, resume=False, fail_after=None):
+    stream = StreamScorer(chunks(scorer, fail_after=fail_after), keep_fields=['id'], progress=lambda report: None)
+    return stream.run(input_path, output_path, text_fields=['title'], resume=resume)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_killed_and_resumed_run_matches_a_clean_run(scorer, jsonl_input, tmp_path, extension):
+    clean = str(tmp_path / f"clean.{extension}")
+    resumed = str(tmp_path / f"resumed.{extension}")
+    expected = run(scorer, jsonl_input, clean)
+
+    with pytest.raises(Interrupted):
+        run(scorer, jsonl_input, resumed, fail_after=4)
+    # A second kill after the first resume, before finishing
+    with pytest.raises(Interrupted):
+        run(scorer, jsonl_input, resumed, resume=True, fail_after=2)
+    summary = run(scorer, jsonl_input, resumed, resume=True)
+
+    with open(clean, 'rb') as f, open(resumed, 'rb') as g:
+        assert f.read() == g.read()
+    assert summary['resumed_from'] == 30
+    assert summary['total_records'] == expected['total_records'] == 43
+    assert summary['skipped'] == expected['skipped'] == 10
+
+
+def test_resume_of_a_complete_run_reports_totals(scorer, jsonl_input, tmp_path):
+    output = str(tmp_path / "scores.csv")
+    expected = run(scorer, jsonl_input, output)
+
+    summary = run(scorer, jsonl_input, output, resume=True)
+
+    assert summary['complete'] and summary['records'] == 0
+    assert (summary['total_records'], summary['skipped']) == (expected['total_records'], expected['skipped'])
+
+
+def test_resume_without_the_output_fails(scorer, jsonl_input, tmp_path):
+    output = str(tmp_path / "scores.csv")
+    with pytest.raises(Interrupted):
+        run(scorer, jsonl_input, output, fail_after=3)
+    os.remove(output)
+
+    with pytest.raises(ValueError, match="missing or shorter"):
+        run(scorer, jsonl_input, output, resume=True)
+    assert not os.path.exists(output)
+
+
+def test_resume_with_a_truncated_output_fails(scorer, jsonl_input, tmp_path):
+    output = str(tmp_path / "scores.jsonl")
+    with pytest.raises(Interrupted):
+        run(scorer, jsonl_input, output, fail_after=3)
+    with open(output, 'r+b') as f:
+        f.truncate(10)
+
+    with pytest.raises(ValueError, match="missing or shorter"):
+        run(scorer, jsonl_input, output, resume=True)